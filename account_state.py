@@ -0,0 +1,527 @@
+import collections
+import json
+import threading
+import time
+from binance.websocket.spot.websocket_stream import SpotWebsocketStreamClient
+import binance_connect
+import instrumentation
+
+# Default Binance Spot websocket endpoint, which also serves the user data streams
+DEFAULT_STREAM_URL = "wss://stream.binance.com:9443"
+
+# Default number of seconds between listen key renewals; keys expire after 60 minutes
+DEFAULT_KEEPALIVE_INTERVAL = 30 * 60.0
+
+# Default number of seconds between reconciliations against the REST account and open orders
+DEFAULT_RECONCILE_INTERVAL = 5 * 60.0
+
+# Default number of fills kept per symbol
+DEFAULT_MAX_FILLS = 100
+
+# Number of closed order ids remembered so a stale REST snapshot does not reopen them
+CLOSED_ORDERS = 10000
+
+# Order statuses of an order still resting on the book
+OPEN_STATUSES = ("NEW", "PARTIALLY_FILLED", "PENDING_NEW")
+
+# Function to query the account over REST with the keys of the project settings
+def fetch_account(project_settings):
+    keys = project_settings["BinanceKeys"]
+    return binance_connect.query_account(
+        keys["API_KEY"], keys["SECRET_KEY"], binance_connect.get_trading_base_url(project_settings)
+    )
+
+# Function to open the user data websocket stream of a listen key
+def open_user_data_stream(listen_key, on_message, on_close=None, stream_url=DEFAULT_STREAM_URL):
+    """
+    Subscribes to the user data stream of a listen key.
+
+    Args:
+        listen_key (str): The listen key returned by binance_connect.new_listen_key.
+        on_message (callable): Called as on_message(client, message) with each JSON message.
+        on_close (callable): Called with no arguments when the connection closes or fails.
+        stream_url (str): The websocket base URL.
+
+    Returns:
+        SpotWebsocketStreamClient: The connected client, closed with stop().
+    """
+    client = SpotWebsocketStreamClient(
+        stream_url=stream_url,
+        on_message=on_message,
+        on_close=(lambda _: on_close()) if on_close else None,
+        on_error=(lambda _, error: on_close()) if on_close else None,
+        is_combined=True,
+    )
+    client.user_data(listen_key=listen_key, id=1)
+    return client
+
+# Function to convert an executionReport event into the REST order format
+def execution_report_to_order(event):
+    client_order_id = event["C"] if event["x"] == "CANCELED" and event.get("C") else event["c"]
+    return {
+        "symbol": event["s"],
+        "orderId": event["i"],
+        "orderListId": event.get("g", -1),
+        "clientOrderId": client_order_id,
+        "price": event["p"],
+        "origQty": event["q"],
+        "executedQty": event["z"],
+        "cummulativeQuoteQty": event.get("Z", "0"),
+        "status": event["X"],
+        "timeInForce": event.get("f", "GTC"),
+        "type": event["o"],
+        "side": event["S"],
+        "stopPrice": event.get("P", "0"),
+        "time": event.get("O", event["T"]),
+        "updateTime": event["T"],
+    }
+
+# Class keeping the account balances, open orders and fills in memory
+class AccountState:
+    """
+    In-memory copy of the account, kept current from the user data stream.
+
+    outboundAccountPosition and balanceUpdate events update the balances and
+    executionReport events the open orders and fills, so reads need no network
+    calls and cost one dictionary lookup per asset or symbol. A background thread
+    renews the listen key every keepalive_interval seconds and reconciles the
+    store against the REST account and open orders every reconcile_interval
+    seconds. When the connection closes or fails the store stops counting as
+    synced, so get_state readers fall back to REST, and the thread reconnects
+    with a new listen key and reconciles before the store is synced again.
+    Updates are ordered by their exchange timestamps, so a REST snapshot never
+    overwrites a newer stream event.
+
+    Args:
+        project_settings (dict): Project-specific settings, passed to the REST functions.
+        stream_url (str): The websocket base URL of the default stream.
+        keepalive_interval (float): Seconds between listen key renewals.
+        reconcile_interval (float): Seconds between REST reconciliations.
+        max_fills (int): The number of fills kept per symbol.
+        fetch_account (callable): Returns the REST account, called as fetch_account(project_settings).
+        fetch_open_orders (callable): Returns the REST open orders, same signature.
+        listen_keys (object): Has new_listen_key, renew_listen_key and close_listen_key
+            with the binance_connect signatures.
+        stream_factory (callable): Opens the stream, called as stream_factory(listen_key, on_message, on_close),
+            and returns an object with a stop() method; on_close() must be called when the
+            connection drops. Replace it to use a local fake stream.
+    """
+
+    def __init__(
+        self,
+        project_settings,
+        stream_url=DEFAULT_STREAM_URL,
+        keepalive_interval=DEFAULT_KEEPALIVE_INTERVAL,
+        reconcile_interval=DEFAULT_RECONCILE_INTERVAL,
+        max_fills=DEFAULT_MAX_FILLS,
+        fetch_account=fetch_account,
+        fetch_open_orders=binance_connect.query_open_trades,
+        listen_keys=binance_connect,
+        stream_factory=None,
+    ):
+        self.project_settings = project_settings
+        self.keepalive_interval = keepalive_interval
+        self.reconcile_interval = reconcile_interval
+        self.max_fills = max_fills
+        self.fetch_account = fetch_account
+        self.fetch_open_orders = fetch_open_orders
+        self.listen_keys = listen_keys
+        if stream_factory is None:
+            stream_factory = lambda listen_key, on_message, on_close: open_user_data_stream(
+                listen_key, on_message, on_close, stream_url
+            )
+        self.stream_factory = stream_factory
+        self.can_trade = False
+        self.balances = {}
+        self.open_orders = {}
+        self.fills = {}
+        self.synced = False
+        self.listen_key = None
+        self.client = None
+        self.listeners = []
+        self.counters = collections.Counter()
+        self.last_event_time = None
+        self.last_reconcile_time = None
+        self._balance_times = {}
+        self._order_times = {}
+        self._closed = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._reconnect = False
+        self._generation = 0
+        self._thread = None
+
+    def start(self):
+        """
+        Opens the user data stream, loads the REST snapshot and starts the keepalive thread.
+
+        The stream is opened first so that the events following the snapshot are not lost.
+        """
+        self._connect()
+        self.reconcile()
+        self._thread = threading.Thread(target=self._maintain, name="account-state", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._disconnect()
+
+    def _connect(self):
+        self._disconnect()
+        self.listen_key = self.listen_keys.new_listen_key(self.project_settings)
+        generation = self._generation
+        self.client = self.stream_factory(self.listen_key, self._on_message, lambda: self._on_close(generation))
+        self.counters["connections"] += 1
+
+    def _disconnect(self):
+        # The close of a stream stopped on purpose is not a dropped connection
+        self._generation += 1
+        if self.client is not None:
+            self.client.stop()
+            self.client = None
+        if self.listen_key is not None:
+            try:
+                self.listen_keys.close_listen_key(self.listen_key, self.project_settings)
+            except Exception as error:
+                print(f"Closing the listen key failed: {error}")
+            self.listen_key = None
+
+    def _maintain(self):
+        next_keepalive = time.monotonic() + self.keepalive_interval
+        next_reconcile = time.monotonic() + self.reconcile_interval
+        while True:
+            self._wake.wait(max(0.0, min(next_keepalive, next_reconcile) - time.monotonic()))
+            self._wake.clear()
+            if self._stopping:
+                return
+            now = time.monotonic()
+            try:
+                if self._reconnect:
+                    # A new listen key means a new stream; the snapshot covers the events in between
+                    self._reconnect = False
+                    try:
+                        self._connect()
+                        self.reconcile()
+                    except Exception:
+                        self._reconnect = True
+                        raise
+                    next_keepalive = now + self.keepalive_interval
+                    next_reconcile = now + self.reconcile_interval
+                    continue
+                if now >= next_keepalive:
+                    self.renew()
+                    next_keepalive = now + self.keepalive_interval
+                if now >= next_reconcile:
+                    self.reconcile()
+                    next_reconcile = now + self.reconcile_interval
+            except Exception as error:
+                # The next wake-up retries; the store keeps serving the last known state
+                self.counters["errors"] += 1
+                print(f"Account state maintenance failed: {error}")
+                next_keepalive = min(next_keepalive, now + 10)
+                next_reconcile = min(next_reconcile, now + 10)
+
+    def renew(self):
+        """
+        Extends the listen key, reconnecting with a new key if the exchange no longer knows it.
+        """
+        try:
+            self.listen_keys.renew_listen_key(self.listen_key, self.project_settings)
+            self.counters["keepalives"] += 1
+        except Exception as error:
+            print(f"Renewing the listen key failed, reconnecting: {error}")
+            self._connect()
+            self.reconcile()
+
+    def _on_close(self, generation):
+        if self._stopping or generation != self._generation:
+            return
+        with self._lock:
+            self.synced = False
+            self.counters["disconnects"] += 1
+        print("User data stream closed, reconnecting")
+        self._reconnect = True
+        self._wake.set()
+
+    def _on_message(self, _, message):
+        event = json.loads(message)
+        # Combined streams wrap the event in {"stream": ..., "data": ...}
+        self.handle_event(event.get("data", event))
+
+    def handle_event(self, event):
+        """
+        Applies one user data stream event to the store.
+
+        Args:
+            event (dict): An outboundAccountPosition, balanceUpdate, executionReport
+                or listenKeyExpired event; other events are ignored.
+        """
+        event_type = event.get("e")
+        order = None
+        with self._lock:
+            if event_type == "outboundAccountPosition":
+                self._apply_position(event)
+            elif event_type == "balanceUpdate":
+                self._apply_balance_update(event)
+            elif event_type == "executionReport":
+                order = self._apply_execution_report(event)
+            elif event_type == "listenKeyExpired":
+                # No more events arrive on this key
+                self.synced = False
+                self._reconnect = True
+                self._wake.set()
+            else:
+                return
+            self.counters["events"] += 1
+            self.last_event_time = event.get("E")
+        # Listeners run outside the lock so they can read the store or place orders
+        if order is not None:
+            for listener in self.listeners:
+                listener(order)
+
+    def add_listener(self, listener):
+        """
+        Registers a callback receiving every order update, in the REST order format.
+
+        The callback runs on the stream thread after the store has applied the
+        update; it must return quickly and hand slow work to another thread.
+
+        Args:
+            listener (callable): Called as listener(order).
+        """
+        self.listeners.append(listener)
+
+    def _set_balance(self, asset, free, locked, update_time):
+        if update_time < self._balance_times.get(asset, 0):
+            return False
+        self.balances[asset] = (float(free), float(locked))
+        self._balance_times[asset] = update_time
+        return True
+
+    def _apply_position(self, event):
+        for balance in event["B"]:
+            self._set_balance(balance["a"], balance["f"], balance["l"], event["u"])
+
+    def _apply_balance_update(self, event):
+        # Deposits and withdrawals; the position already holds them when it is newer
+        asset = event["a"]
+        if event["T"] <= self._balance_times.get(asset, 0):
+            return
+        free, locked = self.balances.get(asset, (0.0, 0.0))
+        self.balances[asset] = (free + float(event["d"]), locked)
+
+    def _apply_execution_report(self, event):
+        order_id = event["i"]
+        if order_id in self._closed or event["T"] < self._order_times.get(order_id, 0):
+            return None
+        order = execution_report_to_order(event)
+        self._store_order(order)
+        if event["x"] == "TRADE":
+            fills = self.fills.get(order["symbol"])
+            if fills is None:
+                fills = self.fills[order["symbol"]] = collections.deque(maxlen=self.max_fills)
+            fills.append({
+                "symbol": order["symbol"],
+                "orderId": order_id,
+                "tradeId": event.get("t"),
+                "side": order["side"],
+                "price": float(event["L"]),
+                "qty": float(event["l"]),
+                "quoteQty": float(event.get("Y", 0)),
+                "commission": float(event.get("n") or 0),
+                "commissionAsset": event.get("N"),
+                "time": event["T"],
+            })
+        return order
+
+    def _store_order(self, order):
+        order_id = order["orderId"]
+        self._order_times[order_id] = order["updateTime"]
+        if order["status"] in OPEN_STATUSES:
+            self.open_orders.setdefault(order["symbol"], {})[order_id] = order
+            return
+        orders = self.open_orders.get(order["symbol"])
+        if orders is not None:
+            orders.pop(order_id, None)
+            if not orders:
+                del self.open_orders[order["symbol"]]
+        del self._order_times[order_id]
+        self._closed[order_id] = True
+        if len(self._closed) > CLOSED_ORDERS:
+            self._closed.popitem(last=False)
+
+    @instrumentation.timed()
+    def reconcile(self):
+        """
+        Reloads the account and open orders over REST and repairs the store.
+
+        Returns:
+            int: The number of balances and orders the stream had missed.
+        """
+        snapshot_time = int(time.time() * 1000)
+        account = self.fetch_account(self.project_settings)
+        orders = self.fetch_open_orders(self.project_settings) or []
+        corrections = 0
+        with self._lock:
+            self.can_trade = account["canTrade"]
+            update_time = account.get("updateTime", 0)
+            for balance in account["balances"]:
+                known = self.balances.get(balance["asset"])
+                values = (float(balance["free"]), float(balance["locked"]))
+                if self._set_balance(balance["asset"], *values, update_time) and known not in (None, values):
+                    corrections += 1
+            listed = set()
+            for order in orders:
+                order_id = order["orderId"]
+                listed.add(order_id)
+                if order_id in self._closed or order["updateTime"] < self._order_times.get(order_id, 0):
+                    continue
+                if order_id not in self._order_times:
+                    corrections += 1
+                self._store_order(order)
+            # Orders the snapshot no longer lists were closed, unless opened after it was taken
+            for symbol_orders in list(self.open_orders.values()):
+                for order_id, order in list(symbol_orders.items()):
+                    if order_id not in listed and order["updateTime"] < snapshot_time:
+                        self._store_order(dict(order, status="UNKNOWN"))
+                        corrections += 1
+            self.synced = True
+            self.last_reconcile_time = time.time()
+            self.counters["reconciles"] += 1
+            self.counters["corrections"] += corrections
+        return corrections
+
+    def balance(self, asset):
+        """
+        Returns the (free, locked) balance of an asset, (0.0, 0.0) when it is not held.
+        """
+        return self.balances.get(asset, (0.0, 0.0))
+
+    def free(self, asset):
+        return self.balances.get(asset, (0.0, 0.0))[0]
+
+    def get_open_orders(self, symbol=None):
+        """
+        Returns the open orders of a symbol, or of every symbol, in the REST openOrders format.
+        """
+        with self._lock:
+            if symbol is not None:
+                return list(self.open_orders.get(symbol, {}).values())
+            return [order for orders in self.open_orders.values() for order in orders.values()]
+
+    def has_open_orders(self, symbol):
+        return symbol in self.open_orders
+
+    def recent_fills(self, symbol, limit=None):
+        """
+        Returns the last fills of a symbol, oldest first.
+
+        Args:
+            symbol (str): The trading symbol.
+            limit (int): The maximum number of fills, every kept fill when None.
+
+        Returns:
+            list: Fill dictionaries with the order id, side, price, qty, commission and time.
+        """
+        with self._lock:
+            fills = list(self.fills.get(symbol, ()))
+        return fills if limit is None else fills[-limit:]
+
+    def account(self):
+        """
+        Returns the stored account in the binance_connect.query_account format.
+        """
+        with self._lock:
+            return {
+                "canTrade": self.can_trade,
+                "balances": [
+                    {"asset": asset, "free": f"{free:.8f}", "locked": f"{locked:.8f}"}
+                    for asset, (free, locked) in self.balances.items()
+                ],
+            }
+
+    def metrics(self):
+        """
+        Returns the event, keepalive, reconciliation and correction counters and the store sizes.
+        """
+        with self._lock:
+            result = {
+                "synced": self.synced,
+                "connected": self.client is not None,
+                "assets": len(self.balances),
+                "open_orders": sum(len(orders) for orders in self.open_orders.values()),
+                "last_event_time": self.last_event_time,
+                "last_reconcile_time": self.last_reconcile_time,
+            }
+            result.update(self.counters)
+            return result
+
+# Store shared by the decision code, None until start_account_state is called
+_active_state = None
+
+# Function to start the shared account state store
+def start_account_state(project_settings, **kwargs):
+    """
+    Starts the shared store read by get_account and get_open_orders.
+
+    Args:
+        project_settings (dict): Project-specific settings.
+        **kwargs: Extra AccountState arguments.
+
+    Returns:
+        AccountState: The running store.
+    """
+    global _active_state
+    state = AccountState(project_settings, **kwargs)
+    state.start()
+    _active_state = state
+    return state
+
+# Function to stop the shared account state store
+def stop_account_state():
+    global _active_state
+    if _active_state is not None:
+        _active_state.stop()
+        _active_state = None
+
+# Function to get the shared store
+def get_state():
+    """
+    Returns the running, synced store, or None when the account is not streamed.
+    """
+    state = _active_state
+    if state is None or not state.synced:
+        return None
+    return state
+
+# Function to get the account from the shared store, or over REST if not streamed
+def get_account(project_settings):
+    """
+    Returns the account information, served from memory when the account is streamed.
+
+    Args:
+        project_settings (dict): Project-specific settings.
+
+    Returns:
+        dict: Account information with at least 'canTrade' and 'balances'.
+    """
+    state = get_state()
+    if state is not None:
+        return state.account()
+    return fetch_account(project_settings)
+
+# Function to get open orders from the shared store, or over REST if not streamed
+def get_open_orders(project_settings, symbol=None):
+    """
+    Returns the open orders of a symbol or of every symbol, served from memory when the account is streamed.
+    """
+    state = get_state()
+    if state is not None:
+        return state.get_open_orders(symbol)
+    orders = binance_connect.query_open_trades(project_settings) or []
+    return [order for order in orders if symbol is None or order["symbol"] == symbol]
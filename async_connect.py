@@ -0,0 +1,82 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import account_state
+import binance_connect
+import strategy
+import symbol_cache
+
+# Default number of threads running blocking requests for the async API
+DEFAULT_WORKERS = 16
+
+# Executor shared by every async call; binance-connector and requests are blocking
+_executor = ThreadPoolExecutor(max_workers=DEFAULT_WORKERS, thread_name_prefix="async-connect")
+
+# Function to replace the executor, e.g. to change the number of concurrent requests
+def set_workers(workers):
+    global _executor
+    previous = _executor
+    _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="async-connect")
+    previous.shutdown(wait=False)
+
+# Function to run a blocking call on the shared executor
+async def run_blocking(function, *args, **kwargs):
+    """
+    Runs a blocking function on the shared executor and awaits its result.
+
+    The blocking calls go through the pooled clients of binance_connect, so
+    concurrent requests reuse the same keep-alive connections.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(function, *args, **kwargs))
+
+# Function to query account information
+async def query_account(api_key, secret_key, base_url=binance_connect.TESTNET_BASE_URL):
+    return await run_blocking(binance_connect.query_account, api_key, secret_key, base_url)
+
+# Function to query historical candlestick data
+async def get_candlestick_data(symbol, timeframe, qty):
+    return await run_blocking(binance_connect.get_candlestick_data, symbol, timeframe, qty)
+
+# Function to query historical candlestick data as NumPy columns
+async def get_candlestick_columns(symbol, timeframe, qty):
+    return await run_blocking(binance_connect.get_candlestick_columns, symbol, timeframe, qty)
+
+# Function to query the exchange information
+async def query_exchange_info():
+    return await run_blocking(lambda: binance_connect.get_client().exchange_info())
+
+# Function to query trading pairs with a specific quote asset
+async def query_quote_asset_list(quote_asset_symbol):
+    return await run_blocking(binance_connect.query_quote_asset_list, quote_asset_symbol)
+
+# Function to look up cached symbol metadata
+async def get_symbol(symbol):
+    return await run_blocking(symbol_cache.get_symbol, symbol)
+
+# Function to place a trade with given parameters
+async def make_trade_with_params(params, project_settings):
+    return await run_blocking(binance_connect.make_trade_with_params, params, project_settings)
+
+# Function to get the account from the user data stream store, or over REST if not streamed
+async def get_account(project_settings):
+    state = account_state.get_state()
+    if state is not None:
+        return state.account()
+    return await run_blocking(account_state.fetch_account, project_settings)
+
+# Function to query open trades
+async def query_open_trades(project_settings):
+    return await run_blocking(binance_connect.query_open_trades, project_settings)
+
+# Function to cancel an open trade by symbol
+async def cancel_order_by_symbol(symbol, project_settings):
+    return await run_blocking(binance_connect.cancel_order_by_symbol, symbol, project_settings)
+
+# Function to get the prices of several tokens in one request
+async def get_token_prices(addresses, chain):
+    return await run_blocking(strategy.get_token_prices, addresses, chain)
+
+# Function to get the price of a token
+async def get_token_price(address, chain):
+    return await run_blocking(strategy.get_token_price, address, chain)
@@ -0,0 +1,349 @@
+import argparse
+import os
+import numpy
+import pandas
+import indicators
+import kline_store
+import market_stream
+import strategy
+import symbol_cache
+import trade_journal
+
+# Number of candles searched at once when looking for an order fill
+FILL_SEARCH_CHUNK = 256
+
+# Class raised when klines cannot be backtested
+class BacktestError(Exception):
+    pass
+
+# Function to load stored klines from a CSV or Parquet file
+def load_klines(path):
+    """
+    Loads stored klines into NumPy columns.
+
+    CSV files may either have a header with the get_candlestick_data keys or be
+    headerless Binance kline dumps. A kline_store dataset directory is memory-mapped
+    instead of being read into memory.
+
+    Args:
+        path (str): The CSV or Parquet file, or a kline_store dataset directory.
+
+    Returns:
+        dict: One NumPy array per KLINE_FIELDS key, oldest candle first.
+    """
+    if os.path.isdir(path):
+        return kline_store.read_directory(path)
+    if path.endswith(".parquet"):
+        df = pandas.read_parquet(path)
+    else:
+        df = pandas.read_csv(path)
+        if "open" not in df.columns:
+            df = pandas.read_csv(path, header=None)
+            df = df.iloc[:, : len(market_stream.KLINE_FIELDS)]
+            df.columns = list(market_stream.KLINE_FIELDS)
+
+    columns = {}
+    for field in market_stream.KLINE_FIELDS:
+        dtype = numpy.int64 if field in market_stream.INTEGER_FIELDS else numpy.float64
+        columns[field] = df[field].to_numpy(dtype=dtype)
+    return columns
+
+# Function to check that klines follow each other without missing candles
+def check_contiguous(columns, timeframe):
+    """
+    Raises when the open times of the klines skip or repeat a candle.
+
+    The signals count consecutive candles by position, so a gap would join candles
+    hours apart into one run.
+
+    Args:
+        columns (dict): Kline columns as returned by load_klines.
+        timeframe (str): The timeframe of the klines; unknown timeframes are not checked.
+
+    Raises:
+        BacktestError: At the first gap, with the open times on both sides.
+    """
+    interval_ms = market_stream.TIMEFRAME_MS.get(timeframe)
+    times = columns.get("time")
+    if interval_ms is None or times is None or len(times) < 2:
+        return
+    gaps = numpy.flatnonzero(numpy.diff(times) != interval_ms)
+    if len(gaps):
+        first = int(gaps[0])
+        raise BacktestError(
+            f"{len(gaps)} gap(s) in the {timeframe} klines, the first between open times "
+            f"{int(times[first])} and {int(times[first + 1])}"
+        )
+
+# Function to flag the candles closing a run of same-colored candles
+def consecutive_signals(opens, closes, number_of_candles, percentage_change, candle_color):
+    """
+    Evaluates the determine_trade_event rule at the close of every candle.
+
+    This is the batch form of indicators.ConsecutiveCounter: the rule holds where
+    the run of qualifying candles is at least number_of_candles long.
+
+    Args:
+        opens (numpy.ndarray): Open prices.
+        closes (numpy.ndarray): Close prices.
+        number_of_candles (int): The number of consecutive candles required.
+        percentage_change (float): The minimum change of every candle.
+        candle_color (str): 'Green' or 'Red'.
+
+    Returns:
+        numpy.ndarray: Boolean array, True where the rule holds for the window ending there.
+    """
+    counts = indicators.consecutive_counts(opens, closes, percentage_change, candle_color)
+    return counts >= number_of_candles
+
+# Class serving stored candles to the strategy functions as of a replay position
+class ReplayMarketData:
+    """
+    Candle source replaying stored klines, passed as get_candles to the strategy functions.
+
+    Args:
+        columns (dict): Kline columns as returned by load_klines.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.index = 0
+
+    def get_candles(self, symbol, timeframe, qty):
+        start = max(0, self.index - qty + 1)
+        candles = []
+        for row in range(start, self.index + 1):
+            candle = {field: self.columns[field][row].item() for field in market_stream.KLINE_FIELDS}
+            candles.append(candle)
+        return candles
+
+# Class simulating STOP_LOSS_LIMIT order fills against stored candles
+class SimulatedExchange:
+    """
+    Fills stop-limit orders on the first candle trading through their price.
+
+    The bot sends STOP_LOSS_LIMIT orders with the stop equal to the limit price,
+    so an order fills at its price on the first candle whose range contains it.
+
+    Args:
+        columns (dict): Kline columns as returned by load_klines.
+    """
+
+    def __init__(self, columns):
+        self.lows = columns["low"]
+        self.highs = columns["high"]
+
+    def find_fill(self, price, start, end):
+        """
+        Returns the index of the first candle in [start, end) that fills the order, or None.
+        """
+        chunk = FILL_SEARCH_CHUNK
+        while start < end:
+            stop = min(end, start + chunk)
+            hits = numpy.flatnonzero((self.lows[start:stop] <= price) & (self.highs[start:stop] >= price))
+            if len(hits):
+                return start + int(hits[0])
+            start = stop
+            chunk *= 2
+        return None
+
+# Function to backtest the consecutive-candle strategy over stored klines
+def run_backtest(
+    columns,
+    symbol,
+    pair,
+    timeframe,
+    percentage_change=0.000001,
+    number_of_candles=3,
+    fee_rate=0.001,
+    initial_cash=1000.0,
+    buy_params=strategy.calculate_buy_params,
+    sell_params=strategy.calculate_sell_params,
+):
+    """
+    Replays stored klines through the strategy and simulates its orders.
+
+    Signals are evaluated for all candles in one vectorized pass; the strategy's
+    parameter functions are only called when a signal fires. The bot is long-only:
+    a buy signal while flat places the order from buy_params, and a sell signal
+    while long places the order from sell_params, closing the whole position.
+    An unfilled order is replaced by the next signal of the same side. The klines
+    must be contiguous, see check_contiguous.
+
+    Args:
+        columns (dict): Kline columns as returned by load_klines.
+        symbol (str): The trading symbol (e.g., 'SOLUSDT').
+        pair (dict): Symbol metadata from symbol_cache.get_symbol.
+        timeframe (str): The timeframe of the klines.
+        percentage_change (float): The minimum change of every signal candle.
+        number_of_candles (int): The number of consecutive candles required.
+        fee_rate (float): The fee charged on the traded value of each fill.
+        initial_cash (float): The quote balance the equity curve starts from.
+        buy_params (callable): Builds the buy order, same signature as calculate_buy_params.
+        sell_params (callable): Builds the sell order, same signature as calculate_sell_params.
+
+    Returns:
+        tuple: A summary dictionary and a pandas.DataFrame of round-trip trades.
+
+    Raises:
+        BacktestError: When candles are missing from the klines.
+    """
+    check_contiguous(columns, timeframe)
+    opens, closes = columns["open"], columns["close"]
+    candle_count = len(closes)
+    signals = {
+        "BUY": numpy.flatnonzero(consecutive_signals(opens, closes, number_of_candles, percentage_change, "Green")),
+        "SELL": numpy.flatnonzero(consecutive_signals(opens, closes, number_of_candles, percentage_change, "Red")),
+    }
+    market = ReplayMarketData(columns)
+    exchange = SimulatedExchange(columns)
+
+    fills = []
+    position = None
+    index = 0
+    while True:
+        side = "BUY" if position is None else "SELL"
+        side_signals = signals[side]
+        signal_number = numpy.searchsorted(side_signals, index)
+        if signal_number == len(side_signals):
+            break
+        signal_index = int(side_signals[signal_number])
+
+        market.index = signal_index
+        if side == "BUY":
+            params = buy_params(symbol, pair, timeframe, get_candles=market.get_candles)
+        else:
+            params = sell_params(symbol, pair, timeframe, get_candles=market.get_candles)
+
+        # The order stays open until the close of the next same-side signal replaces it
+        if signal_number + 1 < len(side_signals):
+            expiry = int(side_signals[signal_number + 1]) + 1
+        else:
+            expiry = candle_count
+        fill_index = exchange.find_fill(params["price"], signal_index + 1, expiry)
+        if fill_index is None:
+            if expiry == candle_count:
+                break
+            index = expiry - 1
+            continue
+
+        if side == "BUY":
+            position = (fill_index, params["price"], params["quantity"])
+        else:
+            fills.append(position + (fill_index, params["price"]))
+            position = None
+        index = fill_index
+
+    trades = pandas.DataFrame(fills, columns=["entry_index", "entry_price", "quantity", "exit_index", "exit_price"])
+    trades["entry_time"] = pandas.to_datetime(columns["time"][trades["entry_index"].to_numpy(dtype=numpy.int64)], unit="ms")
+    trades["exit_time"] = pandas.to_datetime(columns["time"][trades["exit_index"].to_numpy(dtype=numpy.int64)], unit="ms")
+    fees = (trades["entry_price"] + trades["exit_price"]) * trades["quantity"] * fee_rate
+    trades["pnl"] = (trades["exit_price"] - trades["entry_price"]) * trades["quantity"] - fees
+
+    # Mark the position to market at every close to build the equity curve
+    entry_index = trades["entry_index"].to_numpy(dtype=numpy.int64)
+    exit_index = trades["exit_index"].to_numpy(dtype=numpy.int64)
+    quantity = trades["quantity"].to_numpy(dtype=numpy.float64)
+    leg_index = numpy.concatenate((entry_index, exit_index))
+    leg_price = numpy.concatenate((trades["entry_price"].to_numpy(), trades["exit_price"].to_numpy()))
+    leg_quantity = numpy.concatenate((quantity, -quantity))
+    if position is not None:
+        leg_index = numpy.append(leg_index, position[0])
+        leg_price = numpy.append(leg_price, position[1])
+        leg_quantity = numpy.append(leg_quantity, position[2])
+    quantity_delta = numpy.zeros(candle_count)
+    cash_delta = numpy.zeros(candle_count)
+    numpy.add.at(quantity_delta, leg_index, leg_quantity)
+    numpy.add.at(cash_delta, leg_index, -leg_price * leg_quantity - numpy.abs(leg_price * leg_quantity) * fee_rate)
+    equity = initial_cash + numpy.cumsum(cash_delta) + numpy.cumsum(quantity_delta) * closes
+    peak = numpy.maximum.accumulate(equity) if candle_count else equity
+    drawdown = peak - equity
+
+    summary = {
+        "symbol": symbol,
+        "candles": candle_count,
+        "trades": len(trades),
+        "pnl": float(trades["pnl"].sum()),
+        "win_rate": float((trades["pnl"] > 0).mean()) if len(trades) else 0.0,
+        "final_equity": float(equity[-1]) if candle_count else initial_cash,
+        "max_drawdown": float(drawdown.max()) if candle_count else 0.0,
+        "max_drawdown_pct": float((drawdown / peak).max()) if candle_count else 0.0,
+        "open_position": position is not None,
+    }
+    return summary, trades
+
+# Function to replay the journaled decisions of a symbol through the strategy's order functions
+def replay_journal(journal, symbol, pair, start_ms=None, end_ms=None, buy_params=None, sell_params=None):
+    """
+    Recomputes the order of every journaled decision that traded, from the candles it saw.
+
+    Each recomputed order is set beside the order submitted in the same trace, so a
+    change to the parameter functions can be checked against what was sent live.
+
+    Args:
+        journal (trade_journal.TradeJournal): The journal to read.
+        symbol (str): The trading symbol (e.g., 'SOLUSDT').
+        pair (dict): Symbol metadata from symbol_cache.get_symbol.
+        start_ms (int): Only decisions at or after this time in milliseconds.
+        end_ms (int): Only decisions before this time in milliseconds.
+        buy_params (callable): Builds the buy order, defaults to strategy.calculate_buy_params.
+        sell_params (callable): Builds the sell order, defaults to strategy.calculate_sell_params.
+
+    Returns:
+        pandas.DataFrame: One row per decision with the recorded and replayed price and quantity.
+    """
+    buy_params = buy_params or strategy.calculate_buy_params
+    sell_params = sell_params or strategy.calculate_sell_params
+    kinds = (trade_journal.DECISION, trade_journal.ORDER)
+    submitted = {}
+    decisions = []
+    for entry in journal.query(symbol, kinds, start_ms, end_ms):
+        if entry["kind"] == trade_journal.ORDER:
+            submitted.setdefault(entry["trace_id"], entry["payload"])
+        elif entry["payload"].get("analysis"):
+            decisions.append(entry)
+
+    rows = []
+    for entry in decisions:
+        decision = entry["payload"]
+        candles = decision["candles"]
+        get_candles = lambda symbol, timeframe, qty: candles[-qty:]
+        calculate = buy_params if decision["action"] == "buy" else sell_params
+        params = calculate(symbol, pair, decision["timeframe"], get_candles=get_candles)
+        recorded = submitted.get(entry["trace_id"], {}) if entry["trace_id"] is not None else {}
+        rows.append({
+            "time": pandas.to_datetime(entry["time"], unit="ms"),
+            "action": decision["action"],
+            "recorded_price": float(recorded["price"]) if "price" in recorded else numpy.nan,
+            "replayed_price": params["price"],
+            "recorded_quantity": float(recorded["quantity"]) if "quantity" in recorded else numpy.nan,
+            "replayed_quantity": params["quantity"],
+        })
+    return pandas.DataFrame(
+        rows, columns=["time", "action", "recorded_price", "replayed_price", "recorded_quantity", "replayed_quantity"]
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the consecutive-candle strategy over stored klines")
+    parser.add_argument("klines", help="CSV or Parquet file of klines, a kline store directory, or a trade journal")
+    parser.add_argument("--symbol", default="SOLUSDT")
+    parser.add_argument("--timeframe", default="1m")
+    parser.add_argument("--symbols-file", default="sol_pair.json", help="exchange_info snapshot with the symbol filters")
+    parser.add_argument("--percentage", type=float, default=0.000001)
+    parser.add_argument("--journal", action="store_true", help="recompute the orders of the journaled decisions")
+    args = parser.parse_args()
+
+    pair = symbol_cache.read_symbol(args.symbols_file, args.symbol)
+    if pair is None:
+        parser.error(f"{args.symbol} is not listed in {args.symbols_file}, pass a snapshot that has it with --symbols-file")
+    if args.journal:
+        # The decisions journal only the last few candles each, too sparse to backtest
+        journal = trade_journal.TradeJournal(args.klines)
+        print(replay_journal(journal, args.symbol, pair).to_string())
+        journal.stop()
+    else:
+        columns = load_klines(args.klines)
+        summary, trades = run_backtest(columns, args.symbol, pair, args.timeframe, args.percentage)
+        print(trades.to_string())
+        for key, value in summary.items():
+            print(f"{key}: {value}")
@@ -0,0 +1,137 @@
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import account_state
+import binance_connect
+import rate_limiter
+import simulator
+
+# Function to time a call in microseconds, averaged over repeats
+def time_call(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+# Function to check the store against the simulator's REST view of the account
+def check_consistency(state, engine):
+    rest_orders = {order["orderId"] for order in engine.get_open_orders()}
+    stored_orders = {order["orderId"] for order in state.get_open_orders()}
+    rest_balances = {
+        balance["asset"]: (float(balance["free"]), float(balance["locked"])) for balance in engine.account()["balances"]
+    }
+    mismatched = [asset for asset, values in rest_balances.items() if state.balance(asset) != values]
+    return rest_orders == stored_orders, mismatched
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Account state store fed by the simulator's user data stream")
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT, "sol_pair.json"), "r") as file:
+        template = json.load(file)[0]
+    symbols = []
+    for index in range(args.symbols):
+        entry = copy.deepcopy(template)
+        entry["baseAsset"] = f"TOKEN{index}"
+        entry["symbol"] = f"TOKEN{index}USDT"
+        symbols.append(entry)
+    balances = {"USDT": "1e12"}
+    balances.update({entry["baseAsset"]: "1e9" for entry in symbols})
+    server, base_url = simulator.start_simulator(
+        symbols, prices={entry["symbol"]: "20" for entry in symbols}, balances=balances
+    )
+    engine = server.engine
+    # Lift the client-side limits so the benchmark measures the store, not the governor
+    rate_limiter.set_governor(base_url, rate_limiter.RateLimitGovernor(weight_limit=10**9, order_limit=10**9))
+    project_settings = {
+        "BaseUrl": base_url,
+        "BinanceKeys": {"API_KEY": "sim-key", "SECRET_KEY": "sim-secret"},
+    }
+    binance_connect.get_client("sim-key", "sim-secret", base_url=base_url, pool_size=args.workers)
+
+    # Record every streamed event to replay them without the simulator afterwards
+    recorded = []
+    engine.add_listener(recorded.append)
+    streams = []
+    state = account_state.AccountState(
+        project_settings,
+        keepalive_interval=0.5,
+        stream_factory=simulator.user_data_stream_factory(engine, streams),
+    )
+    state.start()
+
+    def place(index):
+        symbol = symbols[index % args.symbols]["symbol"]
+        # Alternate resting bids and asks that fill on the price moves below
+        if index % 2:
+            binance_connect.place_limit_order(symbol, "BUY", 0.1, 19.5, project_settings)
+        else:
+            binance_connect.place_limit_order(symbol, "SELL", 0.1, 20.5, project_settings)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(place, range(args.orders)))
+    placed_seconds = time.perf_counter() - start
+    for entry in symbols[: args.symbols // 2]:
+        engine.set_price(entry["symbol"], "19.4")
+    orders_match, mismatched = check_consistency(state, engine)
+    print(f"placed {args.orders} orders over REST in {placed_seconds:.2f}s, streamed {len(recorded)} events")
+    print(f"store matches REST: open orders={orders_match} mismatched balances={len(mismatched)}")
+
+    # An expired listen key reconnects with a new key and reconciles
+    streams[-1].expire()
+    deadline = time.monotonic() + 5
+    while state.counters["connections"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    place(1)
+    orders_match, mismatched = check_consistency(state, engine)
+    print(
+        f"after listen key expiry: connections={state.counters['connections']} "
+        f"open orders match={orders_match} mismatched balances={len(mismatched)}"
+    )
+
+    # A dropped connection unsyncs the store at once, then it reconnects and reconciles
+    streams[-1].drop()
+    dropped_synced = state.synced
+    deadline = time.monotonic() + 5
+    while not state.synced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    place(0)
+    orders_match, mismatched = check_consistency(state, engine)
+    print(
+        f"after a dropped connection: synced right after={dropped_synced} resynced={state.synced} "
+        f"connections={state.counters['connections']} open orders match={orders_match} mismatched balances={len(mismatched)}"
+    )
+    time.sleep(1.1)
+    print(f"keepalives={state.counters['keepalives']} reconcile corrections={state.counters['corrections']}")
+
+    symbol = symbols[-1]["symbol"]
+    asset = symbols[-1]["baseAsset"]
+    print(f"open orders of {symbol}: {len(state.get_open_orders(symbol))} of {len(state.get_open_orders())}")
+    print(f"store get_open_orders(symbol) {time_call(lambda: state.get_open_orders(symbol), args.lookups):.2f}us")
+    print(f"store balance(asset)          {time_call(lambda: state.balance(asset), args.lookups):.2f}us")
+    print(f"store account()               {time_call(state.account, args.lookups // 100):.2f}us")
+    print(f"REST account                  {time_call(lambda: account_state.fetch_account(project_settings), 200):.2f}us")
+    print(f"REST openOrders               {time_call(lambda: binance_connect.query_open_trades(project_settings), 200):.2f}us")
+    state.stop()
+
+    # Event application alone, replayed into a store with no stream or REST attached
+    replay = account_state.AccountState(project_settings)
+    start = time.perf_counter()
+    for event in recorded:
+        replay.handle_event(event)
+    elapsed = time.perf_counter() - start
+    print(f"replayed {len(recorded)} events in {elapsed * 1000:.1f}ms ({len(recorded) / elapsed:,.0f} events/s)")
+    server.shutdown()
@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+import backtest
+import symbol_cache
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sol_pair.json")
+
+# Function to build synthetic 1m klines as a random walk
+def make_klines(candle_count, seed=11):
+    generator = numpy.random.default_rng(seed)
+    closes = 20 * numpy.exp(numpy.cumsum(generator.normal(0, 0.001, candle_count)))
+    opens = numpy.concatenate(([20.0], closes[:-1]))
+    spread = numpy.abs(generator.normal(0, 0.0005, candle_count)) * closes
+    times = 1672531200000 + numpy.arange(candle_count, dtype=numpy.int64) * 60000
+    volumes = generator.uniform(100, 1000, candle_count)
+    return {
+        "time": times,
+        "open": opens,
+        "high": numpy.maximum(opens, closes) + spread,
+        "low": numpy.minimum(opens, closes) - spread,
+        "close": closes,
+        "volume": volumes,
+        "close_time": times + 59999,
+        "quote_asset_volume": volumes * closes,
+        "number_of_trades": numpy.full(candle_count, 10, dtype=numpy.int64),
+        "taker_buy_base_asset_volume": volumes / 2,
+        "taker_buy_quote_asset_volume": volumes * closes / 2,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest throughput over synthetic 1m klines")
+    parser.add_argument("--candles", type=int, default=525600, help="defaults to one year of 1m candles")
+    args = parser.parse_args()
+
+    pair = symbol_cache.SymbolCache(cache_path=FIXTURE, ttl=float("inf")).get_symbol("SOLUSDT")
+    columns = make_klines(args.candles)
+
+    start = time.perf_counter()
+    summary, trades = backtest.run_backtest(columns, "SOLUSDT", pair, "1m")
+    elapsed = time.perf_counter() - start
+
+    print(f"candles={args.candles} trades={summary['trades']} elapsed={elapsed:.2f}s "
+          f"({args.candles / elapsed:,.0f} candles/s)")
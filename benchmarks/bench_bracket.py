@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import account_state
+import binance_connect
+import bracket
+import rate_limiter
+import simulator
+
+# Prices of the brackets: entries marketable at a market of 20, exits around them
+MARKET = "20"
+TAKE_PROFIT = 21.0
+STOP = 19.0
+STOP_LIMIT = 18.9
+
+# Function to compute a percentile from a sorted list of samples
+def percentile(sorted_samples, fraction):
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+# Function to report the throughput and time-to-protected of a run
+def report(name, brackets, elapsed, orders_per_bracket, latencies):
+    latencies = sorted(latencies)
+    print(
+        f"{name:<26} brackets={brackets} {brackets * orders_per_bracket / elapsed:>8,.0f} orders/s  "
+        f"protected p50={percentile(latencies, 0.5) * 1000:.2f}ms p99={percentile(latencies, 0.99) * 1000:.2f}ms"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bracket placement against the local exchange simulator")
+    parser.add_argument("--brackets", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT, "sol_pair.json"), "r") as file:
+        symbols = json.load(file)
+    server, base_url = simulator.start_simulator(
+        symbols, prices={"SOLUSDT": MARKET}, balances={"USDT": "1e12", "SOL": "1e9"}
+    )
+    engine = server.engine
+    # Lift the client-side limits so the benchmark measures the order path, not the governor
+    rate_limiter.set_governor(base_url, rate_limiter.RateLimitGovernor(weight_limit=10**9, order_limit=10**9))
+    project_settings = {
+        "BaseUrl": base_url,
+        "BinanceKeys": {"API_KEY": "sim-key", "SECRET_KEY": "sim-secret"},
+    }
+    binance_connect.get_client("sim-key", "sim-secret", base_url=base_url, pool_size=args.workers)
+    state = account_state.AccountState(project_settings, stream_factory=simulator.user_data_stream_factory(engine))
+    state.start()
+
+    # Three single orders sent one after the other: the entry, then the stop, then the take profit
+    def place_serial(_):
+        start = time.perf_counter()
+        binance_connect.place_limit_order("SOLUSDT", "BUY", 0.1, 20.1, project_settings)
+        binance_connect.place_stop_loss_order("SOLUSDT", "SELL", 0.1, STOP, STOP_LIMIT, project_settings)
+        protected = time.perf_counter() - start
+        binance_connect.place_take_profit_order("SOLUSDT", "SELL", 0.1, TAKE_PROFIT, TAKE_PROFIT, project_settings)
+        return protected
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        latencies = list(executor.map(place_serial, range(args.brackets)))
+    report("serial single orders", args.brackets, time.perf_counter() - start, 3, latencies)
+    engine.cancel_open_orders("SOLUSDT")
+
+    specs = [
+        {"symbol": "SOLUSDT", "side": "BUY", "quantity": 0.1, "entry_price": 20.1,
+         "take_profit_price": TAKE_PROFIT, "stop_price": STOP, "stop_limit_price": STOP_LIMIT}
+    ] * args.brackets
+    for mode in (bracket.SEQUENTIAL, bracket.ORDER_LIST):
+        manager = bracket.BracketManager(project_settings, mode=mode, workers=args.workers)
+        manager.subscribe(state)
+        start = time.perf_counter()
+        placed = manager.place_many(specs)
+        elapsed = time.perf_counter() - start
+        report(f"{mode} brackets (filled)", args.brackets, elapsed, 3, [item.time_to_protected() for item in placed])
+        failed = sum(item.status == bracket.FAILED for item in placed)
+
+        # Resting entries are protected when the user data stream reports their fill
+        resting = [dict(spec, entry_price=19.5) for spec in specs[: args.brackets // 10 or 1]]
+        pending = manager.place_many(resting)
+        move_start = time.perf_counter()
+        engine.set_price("SOLUSDT", "19.4")
+        deadline = time.monotonic() + 10
+        while any(item.status != bracket.PROTECTED for item in pending) and time.monotonic() < deadline:
+            time.sleep(0.001)
+        after_fill = sorted(item.protected_at - move_start for item in pending if item.protected_at is not None)
+        print(
+            f"{'':<26} resting entries protected after the fill: {len(after_fill)}/{len(pending)} "
+            f"p50={percentile(after_fill, 0.5) * 1000:.2f}ms max={after_fill[-1] * 1000:.2f}ms failed={failed}"
+        )
+
+        # Moving the stop of a protected bracket replaces its OCO pair; canceling removes it
+        moved = manager.replace(placed[0].group_id, stop_price=19.2, stop_limit_price=19.1)
+        canceled = manager.cancel(placed[1].group_id)
+        open_lists = {order["orderListId"] for order in engine.get_open_orders("SOLUSDT")}
+        print(
+            f"{'':<26} replace -> {moved.status} list {moved.order_list_id} open={moved.order_list_id in open_lists}, "
+            f"cancel -> {canceled.status} open={canceled.order_list_id in open_lists}"
+        )
+        engine.set_price("SOLUSDT", MARKET)
+        engine.cancel_open_orders("SOLUSDT")
+        manager.stop()
+
+    # Independent orders pipelined over the pooled client
+    manager = bracket.BracketManager(project_settings, workers=args.workers)
+    orders = [
+        {"symbol": "SOLUSDT", "side": "BUY", "type": "LIMIT", "timeInForce": "GTC", "quantity": 0.1, "price": 19.5}
+    ] * args.brackets
+    start = time.perf_counter()
+    responses = manager.place_orders(orders)
+    elapsed = time.perf_counter() - start
+    errors = sum(isinstance(response, Exception) for response in responses)
+    print(f"{'pipelined single orders':<26} orders={len(orders)} {len(orders) / elapsed:>8,.0f} orders/s errors={errors}")
+    manager.stop()
+    state.stop()
+    server.shutdown()
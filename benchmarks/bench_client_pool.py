@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binance.spot import Spot
+import binance_connect
+import rate_limiter
+from stub_server import start_stub_server
+
+ORDER_PARAMS = {
+    "symbol": "SOLUSDT",
+    "side": "BUY",
+    "type": "LIMIT",
+    "timeInForce": "GTC",
+    "quantity": 0.1,
+    "price": 20.0,
+}
+
+# Function to compute a percentile from a sorted list of samples
+def percentile(sorted_samples, fraction):
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+# Function to time N orders, building the client with the given factory
+def time_orders(make_client, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client = make_client()
+        client.new_order(**ORDER_PARAMS)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples
+
+# Function to report the latency distribution of a run
+def report(label, samples):
+    print(
+        f"{label:<10} n={len(samples)} "
+        f"p50={percentile(samples, 0.50):.3f}ms "
+        f"p99={percentile(samples, 0.99):.3f}ms"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Order latency with and without client pooling")
+    parser.add_argument("--orders", type=int, default=500)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server()
+    # Lift the client-side limits so the benchmark measures connection reuse only
+    rate_limiter.set_governor(base_url, rate_limiter.RateLimitGovernor(weight_limit=10**9, order_limit=10**9))
+    api_key, secret_key = "bench-key", "bench-secret"
+
+    unpooled = time_orders(
+        lambda: Spot(api_key=api_key, api_secret=secret_key, base_url=base_url), args.orders
+    )
+    pooled = time_orders(
+        lambda: binance_connect.get_client(api_key, secret_key, base_url=base_url), args.orders
+    )
+
+    report("unpooled", unpooled)
+    report("pooled", pooled)
+
+    binance_connect.close_clients()
+    server.shutdown()
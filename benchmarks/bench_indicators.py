@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+import indicators
+from bench_backtest import make_klines
+
+# Function to build the indicator set measured by the benchmark
+def make_indicator_set():
+    return indicators.IndicatorSet({
+        "ema_20": indicators.EMA(20),
+        "sma_20": indicators.SMA(20),
+        "rsi_14": indicators.RSI(14),
+        "atr_14": indicators.ATR(14),
+        "vwap": indicators.VWAP(),
+        "vwap_60": indicators.VWAP(60),
+        "green_run": indicators.ConsecutiveCounter(0.001, "Green"),
+        "red_run": indicators.ConsecutiveCounter(0.001, "Red"),
+    })
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental versus batch indicator computation")
+    parser.add_argument("--candles", type=int, default=100000)
+    args = parser.parse_args()
+
+    columns = make_klines(args.candles)
+    candles = [dict(zip(columns, values)) for values in zip(*(column.tolist() for column in columns.values()))]
+
+    start = time.perf_counter()
+    batch = make_indicator_set().batch(columns)
+    batch_elapsed = time.perf_counter() - start
+
+    indicator_set = make_indicator_set()
+    streamed = {name: numpy.empty(args.candles) for name in batch}
+    start = time.perf_counter()
+    for index, candle in enumerate(candles):
+        for name, value in indicator_set.update(candle).items():
+            streamed[name][index] = value
+    stream_elapsed = time.perf_counter() - start
+
+    mismatches = [name for name in batch if not numpy.array_equal(batch[name], streamed[name], equal_nan=True)]
+    print(f"candles={args.candles} indicators={len(batch)}")
+    print(f"batch elapsed={batch_elapsed:.3f}s ({args.candles / batch_elapsed:,.0f} candles/s)")
+    print(f"incremental elapsed={stream_elapsed:.3f}s ({stream_elapsed / args.candles * 1e6:.2f}us per candle)")
+    print(f"identical={not mismatches}" + (f" mismatches={mismatches}" if mismatches else ""))
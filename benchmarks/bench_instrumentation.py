@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instrumentation
+
+# Function standing in for an instrumented stage
+def stage():
+    return None
+
+# Function to time a callable, returning the cost per call in nanoseconds
+def per_call_ns(function, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1e9
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-span cost of the instrumentation layer")
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    timed_stage = instrumentation.timed("bench.timed")(stage)
+
+    # Function opening a span around the stage
+    def span_stage():
+        with instrumentation.span("bench.span"):
+            stage()
+
+    # Function opening a root span with one child, like a webhook calling one stage
+    def nested_stage():
+        with instrumentation.trace("bench.trace"):
+            timed_stage()
+
+    baseline = per_call_ns(stage, args.iterations)
+    results = [
+        ("enabled timed", per_call_ns(timed_stage, args.iterations)),
+        ("enabled span", per_call_ns(span_stage, args.iterations)),
+        ("enabled trace + timed child", per_call_ns(nested_stage, args.iterations)),
+    ]
+    instrumentation.set_enabled(False)
+    results += [
+        ("disabled timed", per_call_ns(timed_stage, args.iterations)),
+        ("disabled span", per_call_ns(span_stage, args.iterations)),
+    ]
+
+    print(f"baseline call={baseline:.0f}ns")
+    for name, cost in results:
+        print(f"{name}: {cost:.0f}ns per call ({cost - baseline:+.0f}ns over baseline)")
@@ -0,0 +1,66 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import binance_connect
+import strategy
+
+# Function to build a raw klines response like the one returned by Spot.klines
+def make_payload(candle_count, seed=3):
+    generator = random.Random(seed)
+    payload = []
+    open_time = 1700000000000
+    for _ in range(candle_count):
+        price = 20 + generator.random()
+        payload.append([
+            open_time,
+            f"{price:.8f}",
+            f"{price * 1.01:.8f}",
+            f"{price * 0.99:.8f}",
+            f"{price + generator.uniform(-0.2, 0.2):.8f}",
+            f"{generator.uniform(0, 1000):.8f}",
+            open_time + 59999,
+            f"{generator.uniform(0, 20000):.8f}",
+            generator.randint(1, 1000),
+            f"{generator.uniform(0, 500):.8f}",
+            f"{generator.uniform(0, 10000):.8f}",
+            "0",
+        ])
+        open_time += 60000
+    return payload
+
+# Function to time a callable, returning the median of the runs in microseconds
+def median_us(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dictionary and columnar kline parsing paths")
+    parser.add_argument("--candles", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    payload = make_payload(args.candles)
+    old_frame = strategy.transform_data(binance_connect.convert_candlestick_data(payload))
+    new_frame = strategy.transform_columns(binance_connect.parse_kline_columns(payload))
+    assert (old_frame["close"].to_numpy() == new_frame["close"].to_numpy()).all()
+    assert ((old_frame["RedOrGreen"] == "Green").to_numpy() == new_frame["is_green"].to_numpy()).all()
+
+    stages = [
+        ("parse: dicts", lambda: binance_connect.convert_candlestick_data(payload)),
+        ("parse: columns", lambda: binance_connect.parse_kline_columns(payload)),
+        ("parse+frame: dicts", lambda: strategy.transform_data(binance_connect.convert_candlestick_data(payload))),
+        ("parse+frame: columns", lambda: strategy.transform_columns(binance_connect.parse_kline_columns(payload))),
+    ]
+    print(f"candles={args.candles}")
+    for label, function in stages:
+        print(f"{label:<22} {median_us(function, args.repeats):10.1f}us")
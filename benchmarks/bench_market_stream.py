@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy
+import requests
+import binance_connect
+import market_stream
+import simulator
+import strategy
+import symbol_cache
+
+# Timeframe pushed through the fake stream; hour candles keep the open candle current for the whole run
+TIMEFRAME = "1h"
+INTERVAL_MS = market_stream.TIMEFRAME_MS[TIMEFRAME]
+
+# Function to build a candle opening at a time
+def make_candle(open_time, close):
+    return {
+        "time": open_time, "open": close - 0.01, "high": close + 0.05, "low": close - 0.05, "close": close,
+        "volume": 100.0, "close_time": open_time + INTERVAL_MS - 1, "quote_asset_volume": 100.0 * close,
+        "number_of_trades": 10, "taker_buy_base_asset_volume": 50.0, "taker_buy_quote_asset_volume": 50.0 * close,
+    }
+
+# Function to wait for a condition, polling every 100 microseconds
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.0001)
+    return True
+
+# Function to compute a percentile in microseconds from a list of seconds
+def percentile_us(samples, fraction):
+    return float(numpy.percentile(samples, fraction * 100)) * 1e6
+
+# Function to time a call repeatedly
+def time_calls(function, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kline websocket stream against a local fake server")
+    parser.add_argument("--symbol", default="SOLUSDT")
+    parser.add_argument("--candles", type=int, default=500, help="closed candles pushed before reading")
+    parser.add_argument("--updates", type=int, default=2000, help="open candle updates pushed to time the delivery")
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+    symbol = args.symbol
+
+    # REST backfills go to the simulator's klines endpoint over a local socket
+    rest_server, rest_url = simulator.start_simulator([], prices={symbol: "20"})
+    session = requests.Session()
+    rest_calls = []
+
+    def rest_fetch(symbol, timeframe, qty):
+        rest_calls.append((symbol, timeframe, qty))
+        response = session.get(f"{rest_url}/api/v3/klines", params={"symbol": symbol, "interval": timeframe, "limit": qty})
+        return binance_connect.convert_candlestick_data(response.json())
+
+    stream_server, stream_url = simulator.start_kline_stream()
+    stream = market_stream.start_stream([(symbol, TIMEFRAME)], stream_url=stream_url, rest_fetch=rest_fetch)
+    failures = []
+    if not wait_for(lambda: stream_server.subscriber_count(symbol, TIMEFRAME) == 1):
+        print("the stream did not subscribe")
+        sys.exit(1)
+
+    # Closed candles up to the last hour, then the open candle of the current hour
+    current_open = int(time.time() * 1000) // INTERVAL_MS * INTERVAL_MS
+    first_open = current_open - args.candles * INTERVAL_MS
+    delivered = threading.Event()
+    stream.add_listener(symbol, TIMEFRAME, lambda candle: delivered.set() if candle["time"] == current_open - INTERVAL_MS else None)
+    for index in range(args.candles):
+        stream_server.push_kline(symbol, TIMEFRAME, make_candle(first_open + index * INTERVAL_MS, 20 + index * 0.001), True)
+    if not delivered.wait(5):
+        failures.append("closed candles not delivered")
+
+    # Delivery latency of the open candle updates, from the push to the read of the new price
+    latencies = []
+    for update in range(args.updates):
+        price = round(30 + update * 0.0001, 4)
+        start = time.perf_counter()
+        stream_server.push_kline(symbol, TIMEFRAME, make_candle(current_open, price), False)
+        wait_for(lambda: stream.live.get((symbol, TIMEFRAME), ((0,) * 5,))[0][4] == price)
+        latencies.append(time.perf_counter() - start)
+    last_price = round(30 + (args.updates - 1) * 0.0001, 4)
+
+    # The buffer holds the closed candles only, the last price comes from the open candle
+    closed = market_stream.get_candles(symbol, TIMEFRAME, 3)
+    live = market_stream.get_live_candle(symbol, TIMEFRAME)
+    if [candle["time"] for candle in closed] != [current_open - offset * INTERVAL_MS for offset in (3, 2, 1)]:
+        failures.append("closed candles out of order")
+    if live["time"] != current_open or live["close"] != last_price:
+        failures.append(f"live candle {live['time']} {live['close']}, expected {current_open} {last_price}")
+    with open(os.path.join(ROOT, "sol_pair.json"), "r") as file:
+        pair = symbol_cache.parse_symbol(json.load(file)[0])
+    params = strategy.calculate_buy_params(symbol, pair, TIMEFRAME, stop_multiplier=1.0)
+    if params["price"] != last_price:
+        failures.append(f"buy priced at {params['price']}, not at the live price {last_price}")
+    if rest_calls:
+        failures.append(f"{len(rest_calls)} REST calls while the stream was current")
+
+    memory = time_calls(lambda: market_stream.get_candles(symbol, TIMEFRAME, 3), args.reads)
+    memory_live = time_calls(lambda: market_stream.get_live_candle(symbol, TIMEFRAME), args.reads)
+    rest = time_calls(lambda: rest_fetch(symbol, TIMEFRAME, 3), min(args.reads, 500))
+    rest_calls.clear()
+
+    # A skipped candle is detected and backfilled from REST once
+    stream_server.push_kline(symbol, TIMEFRAME, make_candle(current_open + INTERVAL_MS, 31), True)
+    wait_for(lambda: stream.buffers[(symbol, TIMEFRAME)].has_gap)
+    market_stream.get_candles(symbol, TIMEFRAME, 3)
+    market_stream.get_candles(symbol, TIMEFRAME, 3)
+    if len(rest_calls) != 1:
+        failures.append(f"{len(rest_calls)} backfills after a gap, expected 1")
+
+    # Pairs that are not streamed fall back to REST, which returns the closed candles only as well
+    binance_connect.configure({"MarketDataBaseUrl": rest_url})
+    now_ms = time.time() * 1000
+    fallback = market_stream.get_candles(symbol, "1m", 3)
+    fallback_columns = market_stream.get_candle_columns(symbol, "1m", 3)
+    if len(fallback) != 3 or fallback[-1]["close_time"] >= now_ms:
+        failures.append(f"REST fallback returned {len(fallback)} candles ending at {fallback[-1]['close_time']}")
+    if list(fallback_columns["time"]) != [candle["time"] for candle in fallback]:
+        failures.append("REST fallback columns differ from the candles")
+
+    # A stale open candle is not used for prices
+    stream.live_max_age = 0.05
+    time.sleep(0.1)
+    if stream.get_live_candle(symbol, TIMEFRAME) is not None:
+        failures.append("stale live candle still served")
+
+    market_stream.stop_stream()
+    stream_server.shutdown()
+    rest_server.shutdown()
+
+    print(f"stream delivery of {args.updates} open candle updates: p50={percentile_us(latencies, 0.5):.0f}us p99={percentile_us(latencies, 0.99):.0f}us")
+    print(f"get_candles(3) from memory:      p50={percentile_us(memory, 0.5):8.1f}us p99={percentile_us(memory, 0.99):8.1f}us")
+    print(f"get_live_candle from memory:     p50={percentile_us(memory_live, 0.5):8.1f}us p99={percentile_us(memory_live, 0.99):8.1f}us")
+    print(f"klines(3) over local REST:       p50={percentile_us(rest, 0.5):8.1f}us p99={percentile_us(rest, 0.99):8.1f}us")
+    if failures:
+        print(f"FAILED: {failures}")
+        sys.exit(1)
+    print("checks passed: closed candles ordered, orders priced from the live candle, one backfill per gap, closed candles over REST, stale live candle ignored")
@@ -0,0 +1,78 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+import order_book
+
+# Function to build a snapshot with levels every tick around a mid price
+def make_snapshot(levels, mid=20.0, tick=0.01):
+    return {
+        "lastUpdateId": 1,
+        "bids": [[f"{mid - tick * (index + 1):.2f}", "1.0"] for index in range(levels)],
+        "asks": [[f"{mid + tick * (index + 1):.2f}", "1.0"] for index in range(levels)],
+    }
+
+# Function to build depthUpdate events changing levels near the top of the book
+def make_events(symbol, count, updates_per_event, seed=5, mid=20.0, tick=0.01):
+    generator = numpy.random.default_rng(seed)
+    offsets = numpy.abs(generator.normal(0, 50, (count, updates_per_event, 2))).astype(int) + 1
+    quantities = generator.choice([0.0, 0.5, 1.0, 2.5], (count, updates_per_event, 2))
+    events = []
+    for index in range(count):
+        events.append({
+            "e": "depthUpdate",
+            "s": symbol,
+            "U": index + 2,
+            "u": index + 2,
+            "b": [[f"{mid - tick * o:.2f}", f"{q}"] for o, q in zip(offsets[index, :, 0], quantities[index, :, 0])],
+            "a": [[f"{mid + tick * o:.2f}", f"{q}"] for o, q in zip(offsets[index, :, 1], quantities[index, :, 1])],
+        })
+    return events
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local order book update and fill estimation throughput")
+    parser.add_argument("--books", type=int, default=100)
+    parser.add_argument("--events", type=int, default=2000, help="diff events per book")
+    parser.add_argument("--levels", type=int, default=1000)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{index}USDT" for index in range(args.books)]
+    events = {symbol: make_events(symbol, args.events, 10, seed=index) for index, symbol in enumerate(symbols)}
+
+    # Function to build the books and replay every event into them
+    def replay():
+        manager = order_book.OrderBookManager(symbols, max_levels=args.levels)
+        for symbol in symbols:
+            manager.books[symbol].apply_snapshot(make_snapshot(args.levels))
+        start = time.perf_counter()
+        for index in range(args.events):
+            for symbol in symbols:
+                manager.apply_event(events[symbol][index])
+        return manager, time.perf_counter() - start
+
+    manager, elapsed = replay()
+    manager.executor.shutdown()
+
+    # Memory is measured on a second, untimed replay since tracing slows every allocation
+    tracemalloc.start()
+    traced_manager, _ = replay()
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    traced_manager.executor.shutdown()
+
+    book = manager.get_book(symbols[0])
+    quantities = numpy.linspace(0.1, 50, 1000)
+    start = time.perf_counter()
+    for quantity in quantities:
+        book.estimate_fill("BUY", quantity)
+    fill_us = (time.perf_counter() - start) / len(quantities) * 1e6
+
+    total_events = args.events * args.books
+    gaps = sum(book.gaps for book in manager.books.values())
+    print(f"books={args.books} levels={args.levels} events={total_events} elapsed={elapsed:.2f}s ({total_events / elapsed:,.0f} events/s)")
+    print(f"memory={memory_mb:.1f}MB gaps={gaps} estimate_fill={fill_us:.1f}us")
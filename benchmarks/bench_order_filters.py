@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import sys
+import time
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy
+import order_filters
+import symbol_cache
+
+# Function to round a quantity the way calculate_buy_params did before order_filters
+def legacy_quantity(quantity, pair):
+    step_size = pair["step_size"]
+    return max(pair["min_qty"], round(quantity - (quantity % step_size), pair["base_asset_precision"]))
+
+# Function to round a price the way calculate_buy_params did before order_filters
+def legacy_price(price, pair):
+    tick_size = pair["tick_size"]
+    return round(price / tick_size) * tick_size
+
+# Function to round a value to a grid with Decimal, the reference the integer path must match
+def reference(value, grid, rounding):
+    return (Decimal(repr(value)) / grid).to_integral_value(rounding=rounding) * grid
+
+# Function to check the integer path against the filters and the Decimal reference
+def check_properties(rules, pair, prices, quantities):
+    filters = pair["filters"]
+    tick = Decimal(filters["PRICE_FILTER"]["tickSize"])
+    step = Decimal(filters["LOT_SIZE"]["stepSize"])
+    min_qty = Decimal(filters["LOT_SIZE"]["minQty"])
+    max_qty = Decimal(filters["LOT_SIZE"]["maxQty"])
+    min_price = Decimal(filters["PRICE_FILTER"]["minPrice"])
+    max_price = Decimal(filters["PRICE_FILTER"]["maxPrice"])
+
+    failures = {}
+    def fail(name):
+        failures[name] = failures.get(name, 0) + 1
+
+    price_units, quantity_units = rules.normalize_batch(prices, quantities, order_filters.DOWN, order_filters.DOWN)
+    price_strings, quantity_strings = rules.format_batch(price_units, quantity_units)
+    for index, (price, quantity) in enumerate(zip(prices.tolist(), quantities.tolist())):
+        price_string = price_strings[index]
+        quantity_string = quantity_strings[index]
+        exact_price = Decimal(price_string)
+        exact_quantity = Decimal(quantity_string)
+        # Filter conformance: on the grid and inside the bounds
+        if exact_price % tick or not min_price <= exact_price <= max_price:
+            fail("price off the tick grid or out of bounds")
+        if exact_quantity % step or not min_qty <= exact_quantity <= max_qty:
+            fail("quantity off the step grid or out of bounds")
+        # Exactness: the strings match Decimal rounding of the input and carry the filter's decimals
+        expected_price = max(min(reference(price, tick, ROUND_FLOOR), max_price), min_price, tick)
+        if exact_price != expected_price or len(price_string.split(".")[-1]) != rules.price_decimals:
+            fail("price differs from the Decimal reference")
+        expected_quantity = max(min(reference(quantity, step, ROUND_FLOOR), max_qty), min_qty)
+        if exact_quantity != expected_quantity or len(quantity_string.split(".")[-1]) != rules.quantity_decimals:
+            fail("quantity differs from the Decimal reference")
+        # The scalar path agrees with the batch path
+        if rules.format_price(rules.price_units(price, order_filters.DOWN)) != price_string:
+            fail("scalar price differs from batch")
+        if rules.format_quantity(rules.quantity_units(quantity)) != quantity_string:
+            fail("scalar quantity differs from batch")
+        # Rounding up lands on the next tick at most
+        up = Decimal(rules.format_price(rules.price_units(price, order_filters.UP)))
+        if up != max(min(reference(price, tick, ROUND_CEILING), max_price), min_price, tick):
+            fail("price rounded up differs from the Decimal reference")
+        # Floats printed from the rounded values carry no artifacts
+        if Decimal(repr(rules.round_quantity(quantity))) != exact_quantity:
+            fail("round_quantity float prints inexactly")
+
+    # Values already on the grid are left unchanged, including float artifacts of them
+    on_grid = numpy.arange(1, 10001) * float(step)
+    _, units = rules.normalize_batch(numpy.ones(len(on_grid)), on_grid * 3 / 3)
+    if not numpy.array_equal(units, numpy.arange(1, 10001) * rules.step):
+        fail("on-grid quantities moved")
+    return failures
+
+# Function to check the minimum notional using a copy of the pair with a NOTIONAL filter added
+def check_min_notional(pair, min_notional="5"):
+    filters = dict(pair["filters"], NOTIONAL={"filterType": "NOTIONAL", "minNotional": min_notional})
+    rules = order_filters.SymbolRules(dict(pair, filters=filters))
+    generator = numpy.random.default_rng(3)
+    prices = generator.uniform(0.5, 500, 20000)
+    quantities = generator.uniform(0.0001, 0.05, 20000)
+    price_units, quantity_units = rules.normalize_batch(prices, quantities)
+    price_strings, quantity_strings = rules.format_batch(price_units, quantity_units)
+    notionals = [Decimal(price) * Decimal(quantity) for price, quantity in zip(price_strings, quantity_strings)]
+    below = sum(notional < Decimal(min_notional) for notional in notionals)
+    # The smallest quantity over the minimum: one step less would fall below it
+    step = Decimal(pair["filters"]["LOT_SIZE"]["stepSize"])
+    loose = sum(
+        (Decimal(quantity) - step) * Decimal(price) >= Decimal(min_notional) and Decimal(quantity) > Decimal(raw)
+        for price, quantity, raw in zip(price_strings, quantity_strings, quantities.tolist())
+    )
+    return below, loose
+
+# Function to time a callable over a number of orders
+def orders_per_second(function, count):
+    start = time.perf_counter()
+    function()
+    return count / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Order price and quantity normalization to symbol filters")
+    parser.add_argument("--orders", type=int, default=100000)
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT, "sol_pair.json"), "r") as file:
+        pair = symbol_cache.parse_symbol(json.load(file)[0])
+    rules = order_filters.get_rules(pair["symbol"], pair)
+    print(
+        f"{pair['symbol']}: price scale 1e{rules.price_decimals} tick={rules.tick}, "
+        f"quantity scale 1e{rules.quantity_decimals} step={rules.step}"
+    )
+
+    generator = numpy.random.default_rng(7)
+    # Prices with 1 to 8 decimals, so some sit on the tick grid and some between ticks
+    scales = 10.0 ** generator.integers(1, 9, args.orders)
+    prices = numpy.round(generator.uniform(0.5, 500, args.orders) * scales) / scales
+    quantities = 0.1 / prices
+
+    failures = check_properties(rules, pair, prices, quantities)
+    print(f"property checks over {args.orders} orders: {'passed' if not failures else failures}")
+    below, loose = check_min_notional(pair)
+    print(f"min notional checks: below minimum={below} larger than needed={loose}")
+    if below:
+        failures["orders below the minimum notional"] = below
+    if loose:
+        failures["quantities raised past the minimum notional"] = loose
+
+    # Float artifacts left by the float modulo path, e.g. 0.30000000000000004
+    legacy_artifacts = sum(
+        len(repr(legacy_quantity(quantity, pair)).split(".")[-1]) > rules.quantity_decimals
+        or len(repr(legacy_price(price, pair)).split(".")[-1]) > rules.price_decimals
+        for price, quantity in zip(prices.tolist(), quantities.tolist())
+    )
+    print(f"float modulo path: {legacy_artifacts}/{args.orders} orders with digits past the tick or step size")
+
+    price_list = prices.tolist()
+    quantity_list = quantities.tolist()
+    legacy = orders_per_second(
+        lambda: [(legacy_price(p, pair), legacy_quantity(q, pair)) for p, q in zip(price_list, quantity_list)],
+        args.orders,
+    )
+    scalar = orders_per_second(
+        lambda: [(rules.round_price(p), rules.round_quantity(q, p)) for p, q in zip(price_list, quantity_list)],
+        args.orders,
+    )
+    scalar_strings = orders_per_second(
+        lambda: [
+            (rules.format_price(rules.price_units(p)), rules.format_quantity(rules.quantity_units(q)))
+            for p, q in zip(price_list, quantity_list)
+        ],
+        args.orders,
+    )
+    batch = orders_per_second(lambda: rules.normalize_batch(prices, quantities), args.orders)
+    batch_strings = orders_per_second(lambda: rules.format_batch(*rules.normalize_batch(prices, quantities)), args.orders)
+    print(f"float modulo per order      {legacy:>14,.0f} orders/s")
+    print(f"integer per order (floats)  {scalar:>14,.0f} orders/s")
+    print(f"integer per order (strings) {scalar_strings:>14,.0f} orders/s")
+    print(f"integer batch (units)       {batch:>14,.0f} orders/s")
+    print(f"integer batch (strings)     {batch_strings:>14,.0f} orders/s")
+
+    # A failed property check fails the run, after the timings are printed
+    if failures:
+        print(f"FAILED: {failures}")
+        sys.exit(1)
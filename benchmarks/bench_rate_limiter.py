@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binance.error import ClientError
+import binance_connect
+import rate_limiter
+from stub_server import start_stub_server
+
+# Class enforcing a wall-clock aligned weight limit like the Binance servers do
+class WindowedLimit:
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.window_start = time.time() // window * window
+        self.used = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def gate(self, method, path, params):
+        with self.lock:
+            now = time.time()
+            if now - self.window_start >= self.window:
+                self.window_start, self.used = now // self.window * self.window, 0
+            self.used += rate_limiter.request_weight(method, path, params)
+            if self.used > self.limit:
+                self.rejected += 1
+                return 429, {"code": -1003, "msg": "Too many requests"}
+            return None
+
+    def headers(self):
+        retry_after = max(0.0, self.window - (time.time() - self.window_start))
+        return {"X-MBX-USED-WEIGHT-1M": str(self.used), "Retry-After": f"{retry_after:.3f}"}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of kline requests under a stubbed weight limit")
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--limit", type=int, default=400, help="weight allowed per window")
+    parser.add_argument("--window", type=float, default=2.0, help="window length in seconds")
+    args = parser.parse_args()
+
+    limit = WindowedLimit(args.limit, args.window)
+    server, base_url = start_stub_server(
+        responses={("GET", "/api/v3/klines"): lambda params: []},
+        extra_headers=limit.headers,
+        gate=limit.gate,
+    )
+    governor = rate_limiter.RateLimitGovernor(weight_limit=args.limit, weight_period=args.window)
+    rate_limiter.set_governor(base_url, governor)
+    client = binance_connect.get_client(base_url=base_url, pool_size=args.workers)
+
+    errors = []
+    def fetch(_):
+        try:
+            client.klines(symbol="SOLUSDT", interval="1m", limit=3)
+        except ClientError as error:
+            errors.append(error)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(fetch, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    weight = args.requests * rate_limiter.request_weight("GET", "/api/v3/klines", {})
+    ceiling = args.limit / args.window
+    print(f"requests={args.requests} weight={weight} elapsed={elapsed:.2f}s")
+    print(f"throughput={weight / elapsed:.0f} weight/s (limit {ceiling:.0f} weight/s)")
+    print(f"429 responses={limit.rejected} client errors={len(errors)} metrics={governor.metrics()}")
+    server.shutdown()
@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import runner
+import strategy
+
+# Function to build candles that always satisfy the green rule
+def make_candles(symbol, timeframe, qty):
+    return [{"open": 20.0 + index, "close": 20.5 + index} for index in range(qty)]
+
+# Class replacing the account query so the benchmark needs no exchange
+class OfflineRunner(runner.StrategyRunner):
+    def get_account(self):
+        return {"canTrade": True}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Strategy runner scaling with the number of symbols")
+    parser.add_argument("--symbols", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--io-ms", type=float, default=5.0, help="simulated exchange round-trip per decision")
+    parser.add_argument("--workers", type=int, default=runner.DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    # Function making one decision: the candle rule plus a simulated order round-trip
+    def decide(strategy_config, action, project_settings, account):
+        if strategy_config["Symbol"].startswith("FAIL"):
+            raise RuntimeError("simulated exchange error")
+        if strategy.determine_trade_event(
+            strategy_config["Symbol"], strategy_config["Timeframe"], 0.001, "Green", get_candles=make_candles
+        ):
+            time.sleep(args.io_ms / 1000)
+
+    # Silence the decision logging of determine_trade_event
+    sys.stdout = open(os.devnull, "w")
+    results = []
+    for symbol_count in args.symbols:
+        # One symbol in fifty fails on every decision, which must not slow the others down
+        strategies = [
+            {"Symbol": f"{'FAIL' if index % 50 == 0 else 'SYM'}{index}USDT"} for index in range(symbol_count)
+        ]
+        strategy_runner = OfflineRunner(strategies, {}, workers=args.workers, decide=decide)
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        for _ in range(args.rounds):
+            strategy_runner.dispatch("buy")
+        threads = threading.active_count()
+        strategy_runner.stop()
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+
+        metrics = strategy_runner.metrics().values()
+        decisions = symbol_count * args.rounds
+        failed = sum(worker.get("failed", 0) for worker in metrics)
+        p99 = sorted(worker["latency_p99"] for worker in metrics)[-1]
+        results.append((symbol_count, decisions, elapsed, cpu, threads, failed, p99))
+    sys.stdout = sys.__stdout__
+
+    for symbol_count, decisions, elapsed, cpu, threads, failed, p99 in results:
+        print(
+            f"symbols={symbol_count} decisions={decisions} elapsed={elapsed:.2f}s "
+            f"cpu/decision={cpu / decisions * 1e6:.0f}us threads={threads} failed={failed} worst p99={p99 * 1000:.2f}ms"
+        )
@@ -0,0 +1,61 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy
+import pandas
+import scanner
+
+# Function to build a synthetic (symbol, candle, OHLCV) dataset
+def make_dataset(symbol_count, number_of_candles, seed=7):
+    generator = numpy.random.default_rng(seed)
+    opens = generator.uniform(1, 100, size=(symbol_count, number_of_candles))
+    closes = opens * (1 + generator.normal(0.002, 0.01, size=opens.shape))
+    highs = numpy.maximum(opens, closes) * 1.01
+    lows = numpy.minimum(opens, closes) * 0.99
+    volumes = generator.uniform(100, 1000, size=opens.shape)
+    candles = numpy.stack((opens, highs, lows, closes, volumes), axis=2)
+    symbols = [f"SYM{index}USDT" for index in range(symbol_count)]
+    return symbols, candles
+
+# Function to evaluate the rule one symbol at a time, like determine_trade_event
+def scan_per_symbol(symbols, candles, percentage_change):
+    hits = []
+    for index, symbol in enumerate(symbols):
+        df = pandas.DataFrame(candles[index], columns=scanner.OHLCV_FIELDS)
+        df["RedOrGreen"] = numpy.where((df["open"] < df["close"]), "Green", "Red")
+        if (df["RedOrGreen"] == "Green").all():
+            changes = (df["close"] - df["open"]) / df["open"]
+            if (changes >= percentage_change).all():
+                hits.append(symbol)
+    return hits
+
+# Function to time a callable over several repeats, returning the best run in ms
+def best_of(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vectorized scanner against a per-symbol loop")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--candles", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    symbols, candles = make_dataset(args.symbols, args.candles)
+    loop_ms, loop_hits = best_of(lambda: scan_per_symbol(symbols, candles, 0.000001), args.repeats)
+    vector_ms, vector_hits = best_of(
+        lambda: scanner.scan_candle_array(symbols, candles, 0.000001, "Green"), args.repeats
+    )
+
+    assert sorted(loop_hits) == sorted(vector_hits["symbol"])
+    print(f"symbols={args.symbols} candles={args.candles} hits={len(vector_hits)}")
+    print(f"per-symbol loop {loop_ms:9.3f}ms")
+    print(f"vectorized      {vector_ms:9.3f}ms ({loop_ms / vector_ms:.0f}x)")
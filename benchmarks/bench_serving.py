@@ -0,0 +1,250 @@
+import argparse
+import collections
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "moralis"))
+
+import numpy
+import requests
+from werkzeug.serving import make_server
+import simulator
+import symbol_cache
+
+# Wallet watched by the app when no watchlist is configured, see moralis/app.py
+WHALE_ADDRESS = "0xcA3B6f18Ebc4E7C66885eaAde4C2FF3Edcf48d02"
+
+# Token addresses of the default strategy; the stubbed prices (SOL 20, USDT 10, BUSD 10.1) pass its buy ratio check
+TOKENS = {"SOL": f"0x{200:040x}", "USDT": f"0x{100:040x}", "BUSD": f"0x{101:040x}"}
+
+# Function to write the settings and environment the app reads on import
+def prepare_environment(directory, args, exchange_url):
+    settings_path = os.path.join(directory, "settings.json")
+    with open(settings_path, "w") as file:
+        json.dump({
+            "BinanceKeys": {"API_KEY": "load-key", "SECRET_KEY": "load-secret"},
+            "Tokens": TOKENS,
+            "BaseUrl": exchange_url,
+            "MarketDataBaseUrl": exchange_url,
+        }, file)
+    os.environ.update({
+        "SETTINGS_FILE": settings_path,
+        "SETTINGS_POLL_INTERVAL": "0",
+        "TRADE_JOURNAL": os.path.join(directory, "journal.db"),
+        "TRADE_COALESCE_WINDOW": "0",
+        "TRADE_WORKERS": "4",
+        "PRICE_CACHE_TTL": str(args.price_ttl),
+        "PRICE_WORKERS": str(args.price_workers),
+        "MORALIS_API_KEY": "load-test",
+    })
+
+# Function to build a webhook payload moving a token into or out of the watched wallet
+def make_payload(generator):
+    stranger = "0x" + "".join(generator.choice("0123456789abcdef") for _ in range(40))
+    incoming = generator.random() < 0.5
+    return json.dumps({
+        "txs": [],
+        "erc20Transfers": [{
+            "transactionHash": f"0x{generator.getrandbits(256):064x}",
+            "logIndex": "0",
+            "tokenAddress": "0x570a5d26f7765ecb712c0924e4de545b89fd43df",
+            "tokenDecimals": "18",
+            "fromAddress": stranger if incoming else WHALE_ADDRESS.lower(),
+            "toAddress": WHALE_ADDRESS.lower() if incoming else stranger,
+            "value": str(generator.randint(1, 10**20)),
+        }],
+    }).encode()
+
+# Class serving the app on a background thread
+class ServerThread:
+    """
+    Runs a server on a background thread, stopped by stop().
+
+    Args:
+        kind (str): 'dev' for the single-threaded server app.run used, 'threaded'
+            for a thread per request, 'asgi' for uvicorn with the async handlers.
+        port (int): The local port.
+    """
+
+    def __init__(self, kind, port):
+        import app as moralis_app
+        self.kind = kind
+        if kind == "asgi":
+            import uvicorn
+            import asgi
+            config = uvicorn.Config(asgi.application, host="127.0.0.1", port=port, lifespan="off", log_level="warning")
+            self.server = uvicorn.Server(config)
+            self.server.install_signal_handlers = lambda: None
+            self.thread = threading.Thread(target=self.server.run, daemon=True)
+        else:
+            self.server = make_server("127.0.0.1", port, moralis_app.app, threaded=kind == "threaded")
+            self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                requests.get(f"{self.url}/queue", timeout=1)
+                return
+            except requests.ConnectionError:
+                time.sleep(0.05)
+
+    def stop(self):
+        if self.kind == "asgi":
+            self.server.should_exit = True
+        else:
+            self.server.shutdown()
+        self.thread.join()
+
+# Function to drive both endpoints from concurrent clients for a duration
+def drive(url, args, seed):
+    """
+    Sends /getPrice and /webhook requests from args.connections keep-alive clients.
+
+    Returns:
+        dict: Latencies in seconds and status counts per endpoint, and the elapsed time.
+    """
+    deadline = time.monotonic() + args.duration
+    addresses = [f"0x{index:040x}" for index in range(args.addresses)]
+
+    def client(index):
+        generator = random.Random(seed + index)
+        session = requests.Session()
+        latencies = collections.defaultdict(list)
+        statuses = collections.Counter()
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                if generator.random() < args.webhook_share:
+                    endpoint = "webhook"
+                    response = session.post(f"{url}/webhook", data=make_payload(generator), timeout=30)
+                else:
+                    endpoint = "getPrice"
+                    address = generator.choice(addresses)
+                    response = session.get(f"{url}/getPrice", params={"address": address, "chain": "bsc"}, timeout=30)
+                statuses[(endpoint, response.status_code)] += 1
+            except requests.RequestException as error:
+                statuses[(endpoint, type(error).__name__)] += 1
+                continue
+            latencies[endpoint].append(time.perf_counter() - start)
+        return latencies, statuses
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.connections) as executor:
+        results = list(executor.map(client, range(args.connections)))
+    elapsed = time.perf_counter() - start
+    latencies = collections.defaultdict(list)
+    statuses = collections.Counter()
+    for client_latencies, client_statuses in results:
+        for endpoint, samples in client_latencies.items():
+            latencies[endpoint].extend(samples)
+        statuses.update(client_statuses)
+    return {"latencies": latencies, "statuses": statuses, "elapsed": elapsed}
+
+# Function to print the throughput and tail latency of one run
+def report(name, result):
+    elapsed = result["elapsed"]
+    total = sum(len(samples) for samples in result["latencies"].values())
+    print(f"{name}: {total / elapsed:,.0f} requests/s over {elapsed:.1f}s")
+    for endpoint, samples in sorted(result["latencies"].items()):
+        samples = numpy.array(samples) * 1000
+        print(
+            f"  {endpoint:<9} {len(samples) / elapsed:>8,.0f} req/s  p50={numpy.percentile(samples, 50):7.1f}ms  "
+            f"p99={numpy.percentile(samples, 99):7.1f}ms  max={samples.max():7.1f}ms"
+        )
+    errors = {f"{endpoint} {status}": count for (endpoint, status), count in result["statuses"].items() if status != 200}
+    if errors:
+        print(f"  errors: {errors}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test of the webhook app's /getPrice and /webhook endpoints")
+    parser.add_argument("--servers", nargs="+", default=["dev", "threaded", "asgi"], choices=["dev", "threaded", "asgi"])
+    parser.add_argument("--url", help="drive an already running server instead, e.g. one started with gunicorn")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per server")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--webhook-share", type=float, default=0.2, help="fraction of the requests sent to /webhook")
+    parser.add_argument("--addresses", type=int, default=2000, help="distinct token addresses priced")
+    parser.add_argument("--price-ttl", type=float, default=2.0, help="PRICE_CACHE_TTL of the app")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="seconds per stubbed Moralis price call")
+    parser.add_argument("--price-workers", type=int, default=8, help="PRICE_WORKERS of the app")
+    parser.add_argument("--drain-burst", type=int, default=200, help="webhooks accepted right before the shutdown")
+    parser.add_argument("--port", type=int, default=5012)
+    args = parser.parse_args()
+
+    if args.url:
+        report(args.url, drive(args.url.rstrip("/"), args, 0))
+        sys.exit(0)
+
+    # Orders, klines and symbol filters come from the exchange simulator, so the strategy decisions run for real
+    with open(os.path.join(ROOT, "sol_pair.json"), "r") as file:
+        exchange_server, exchange_url = simulator.start_simulator(json.load(file), prices={"SOLUSDT": "20"})
+    directory = tempfile.mkdtemp(prefix="serving-bench-")
+    prepare_environment(directory, args, exchange_url)
+    import app as moralis_app
+    import execute
+    symbol_cache._default_cache = symbol_cache.SymbolCache(cache_path=os.path.join(directory, "exchange_info.json"))
+
+    # Stubbed Moralis client: a fixed upstream latency per price call
+    def get_token_price(api_key, params):
+        time.sleep(args.upstream_latency)
+        return {"usdPrice": int(params["address"], 16) % 1000 / 10, "tokenAddress": params["address"]}
+
+    moralis_app.evm_api.token.get_token_price = get_token_price
+
+    # Real decisions, counted by outcome; their prices come from the app's cache, not from its listener
+    decisions = collections.Counter()
+    decisions_lock = threading.Lock()
+
+    async def decide(strategy_config, action, project_settings, account):
+        response = await execute.execute_strategy_async(strategy_config, action, project_settings, account)
+        with decisions_lock:
+            decisions["ordered" if response is not None else "skipped"] += 1
+        return response
+
+    moralis_app.strategy_runner.decide = decide
+    moralis_app.start_services(streams=False)
+    # One line per request would dominate the dev server's time
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    for index, kind in enumerate(args.servers):
+        try:
+            server = ServerThread(kind, args.port + index)
+        except ImportError as error:
+            print(f"{kind}: skipped, {error}")
+            continue
+        try:
+            report(kind, drive(server.url, args, index * 1000))
+        finally:
+            server.stop()
+
+    # Graceful shutdown: a burst of webhooks is accepted, then every intent it queued must run before the app stops
+    generator = random.Random(99)
+    for _ in range(args.drain_burst):
+        moralis_app.handle_webhook(make_payload(generator))
+    queued_intents = moralis_app.intent_queue.queue.qsize()
+    queued_actions = sum(len(worker.actions) for worker in moralis_app.strategy_runner.workers.values())
+    failed_before = sum(worker.get("failed", 0) for worker in moralis_app.strategy_runner.metrics().values())
+    with decisions_lock:
+        decided_before = sum(decisions.values())
+    start = time.perf_counter()
+    drained = moralis_app.shutdown()
+    elapsed = time.perf_counter() - start
+    exchange_server.shutdown()
+    processed = drained.get("processed", 0) + drained.get("failed", 0)
+    failed = sum(worker.get("failed", 0) for worker in moralis_app.strategy_runner.metrics().values()) - failed_before
+    print(
+        f"shutdown: {queued_intents} intents and {queued_actions} strategy actions pending, drained in {elapsed * 1000:.0f}ms; "
+        f"{processed}/{drained.get('queued', 0)} intents run, {sum(decisions.values()) - decided_before} strategy decisions "
+        f"({dict(decisions)} in total), {failed} failed while draining"
+    )
+    if failed or processed != drained.get("queued", 0):
+        sys.exit(1)
@@ -0,0 +1,127 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import settings
+
+# Function to load the settings the way execute.get_settings did on every trade
+def legacy_get_settings(path):
+    if os.path.exists(path):
+        file = open(path, "r")
+        project_settings = json.load(file)
+        file.close()
+        return project_settings
+    return ImportError
+
+# Function to write a settings file whose values all carry the same revision number
+def write_settings(path, revision, strategies):
+    data = {
+        "BaseUrl": "https://testnet.binance.vision",
+        "MarketDataBaseUrl": "https://api.binance.com",
+        "BinanceKeys": {"API_KEY": f"key-{revision}", "SECRET_KEY": f"secret-{revision}"},
+        "Tokens": {"SOL": f"sol-{revision}", "USDT": f"usdt-{revision}", "BUSD": f"busd-{revision}"},
+        "Strategies": [{"Symbol": f"TOKEN{index}USDT", "QuoteSize": revision + 1} for index in range(strategies)],
+    }
+    # Write then rename, so the watcher never reads a half-written file
+    with open(path + ".tmp", "w") as file:
+        json.dump(data, file)
+    os.replace(path + ".tmp", path)
+
+# Function to check that every value of a snapshot comes from the same file revision
+def consistent(project_settings):
+    revision = project_settings["BinanceKeys"]["API_KEY"].split("-")[1]
+    return (
+        project_settings["BinanceKeys"]["SECRET_KEY"] == f"secret-{revision}"
+        and project_settings["Tokens"]["SOL"] == f"sol-{revision}"
+        and all(entry["QuoteSize"] == int(revision) + 1 for entry in project_settings["Strategies"])
+    )
+
+# Function to time a callable in microseconds per call
+def per_call_us(function, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1e6
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Settings lookups per trade and hot reloads")
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--strategies", type=int, default=50)
+    parser.add_argument("--reloads", type=int, default=200)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="settings-bench-")
+    path = os.path.join(directory, "settings.json")
+    write_settings(path, 0, args.strategies)
+
+    legacy = per_call_us(lambda: legacy_get_settings(path), args.calls)
+    snapshot = settings.load(path, env_path=None)
+    current = per_call_us(settings.current, args.calls)
+    load = per_call_us(lambda: settings.load_settings(path, env_path=None), max(1, args.calls // 20))
+    print(f"json.load per trade      {legacy:>10.2f}us per call")
+    print(f"settings.current()       {current:>10.2f}us per call ({legacy / current:,.0f}x faster)")
+    print(f"load and validate        {load:>10.2f}us per reload, {args.strategies} strategies")
+
+    # Missing keys fail at load time instead of at the first trade
+    with open(path, "r") as file:
+        broken = json.load(file)
+    broken["BinanceKeys"] = {"API_Key": "", "Secret_Key": ""}
+    del broken["Tokens"]["BUSD"]
+    # A second strategy on the same symbol and timeframe would replace the first one's worker
+    broken["Strategies"].append({"Symbol": "token0usdt", "QuoteSize": 5})
+    broken_path = os.path.join(directory, "broken.json")
+    with open(broken_path, "w") as file:
+        json.dump(broken, file)
+    try:
+        settings.load_settings(broken_path, env_path=None)
+        print("broken settings: accepted")
+    except settings.SettingsError as error:
+        print(f"broken settings: rejected with {len(error.problems)} problems")
+        for problem in error.problems:
+            print(f"  {problem}")
+
+    # Readers take snapshots while the file is rewritten and reloaded; every snapshot must be one revision
+    watcher = settings.SettingsWatcher(path, None, interval=0.001)
+    watcher.start()
+    stop = threading.Event()
+    counts = {"snapshots": 0, "inconsistent": 0}
+
+    def read():
+        while not stop.is_set():
+            project_settings = settings.current()
+            counts["snapshots"] += 1
+            if not consistent(project_settings):
+                counts["inconsistent"] += 1
+
+    readers = [threading.Thread(target=read) for _ in range(args.readers)]
+    for reader in readers:
+        reader.start()
+    start = time.perf_counter()
+    latencies = []
+    for revision in range(1, args.reloads + 1):
+        written = time.perf_counter()
+        write_settings(path, revision, args.strategies)
+        while settings.current()["BinanceKeys"]["API_KEY"] != f"key-{revision}":
+            time.sleep(0.0002)
+        latencies.append(time.perf_counter() - written)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for reader in readers:
+        reader.join()
+    watcher.stop()
+
+    latencies.sort()
+    print(
+        f"{args.reloads} reloads in {elapsed:.2f}s, applied {latencies[len(latencies) // 2] * 1000:.1f}ms "
+        f"(p50) / {latencies[-1] * 1000:.1f}ms (max) after the write with a 1ms poll"
+    )
+    print(f"{counts['snapshots']:,} snapshots taken during reloads, {counts['inconsistent']} mixed revisions")
+    print(f"watcher: {watcher.metrics()}")
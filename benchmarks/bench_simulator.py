@@ -0,0 +1,70 @@
+import argparse
+import http.client
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import binance_connect
+import rate_limiter
+import simulator
+
+# Function to compute a percentile from a sorted list of samples
+def percentile(sorted_samples, fraction):
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Order pipeline throughput against the local exchange simulator")
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT, "sol_pair.json"), "r") as file:
+        symbols = json.load(file)
+    server, base_url = simulator.start_simulator(symbols, prices={"SOLUSDT": "20"}, balances={"USDT": "1e12", "SOL": "1e9"})
+    # Lift the client-side limits so the benchmark measures the pipeline, not the governor
+    rate_limiter.set_governor(base_url, rate_limiter.RateLimitGovernor(weight_limit=10**9, order_limit=10**9))
+
+    project_settings = {
+        "BaseUrl": base_url,
+        "BinanceKeys": {"API_KEY": "sim-key", "SECRET_KEY": "sim-secret"},
+    }
+    binance_connect.get_client("sim-key", "sim-secret", base_url=base_url, pool_size=args.workers)
+
+    def place(index):
+        start = time.perf_counter()
+        # Alternate resting bids and stop-loss sells that wait for a price move
+        if index % 2:
+            binance_connect.place_limit_order("SOLUSDT", "BUY", 0.1, 19.5, project_settings)
+        else:
+            binance_connect.place_stop_loss_order("SOLUSDT", "SELL", 0.1, 19.0, 18.9, project_settings)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        latencies = sorted(executor.map(place, range(args.orders)))
+    elapsed = time.perf_counter() - start
+
+    # Raw keep-alive requests isolate the simulator from the client-side signing and pooling cost
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+    raw_start = time.perf_counter()
+    for index in range(args.orders):
+        connection.request("POST", "/api/v3/order?symbol=SOLUSDT&side=BUY&type=LIMIT&timeInForce=GTC&quantity=0.1&price=19.5")
+        connection.getresponse().read()
+    raw_elapsed = time.perf_counter() - raw_start
+    connection.close()
+
+    move_start = time.perf_counter()
+    filled = server.engine.set_price("SOLUSDT", "18.9")
+    move_ms = (time.perf_counter() - move_start) * 1000
+
+    print(f"orders={args.orders} workers={args.workers} elapsed={elapsed:.2f}s rate={args.orders / elapsed:,.0f} orders/s")
+    print(f"raw simulator rate={args.orders / raw_elapsed:,.0f} orders/s")
+    print(f"latency p50={percentile(latencies, 0.5) * 1000:.3f}ms p99={percentile(latencies, 0.99) * 1000:.3f}ms")
+    print(f"price move filled {len(filled)} orders in {move_ms:.1f}ms")
+    server.shutdown()
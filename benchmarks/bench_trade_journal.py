@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy
+import backtest
+import symbol_cache
+import trade_journal
+
+# Start of the synthetic journal, 2024-01-01 in milliseconds
+START_MS = 1704067200000
+
+# Function to build the entries of one synthetic decision: the decision, its order and the response
+def make_entries(index, symbols, candle):
+    symbol = symbols[index % len(symbols)]
+    time_ms = START_MS + index * 1000
+    decision = {
+        "action": "buy" if index % 2 else "sell",
+        "timeframe": "1m",
+        "reference_ratio": 20.0,
+        "current_ratio": 1.0,
+        "ratio_check": True,
+        "analysis": True,
+        "candles": [candle(time_ms - offset * 60000) for offset in (2, 1, 0)],
+    }
+    order = {"symbol": symbol, "side": "BUY", "type": "STOP_LOSS_LIMIT", "quantity": "0.0049", "price": "20.324691"}
+    response = {"symbol": symbol, "orderId": index, "status": "NEW", "transactTime": time_ms}
+    return symbol, time_ms, ((trade_journal.DECISION, decision), (trade_journal.ORDER, order), (trade_journal.RESPONSE, response))
+
+# Function to build a candle opening at a time
+def candle(open_time):
+    price = 20 + (open_time // 60000 % 50) * 0.01
+    return {
+        "time": open_time, "open": price, "high": price + 0.05, "low": price - 0.05, "close": price + 0.01,
+        "volume": 100.0, "close_time": open_time + 59999, "quote_asset_volume": 2000.0, "number_of_trades": 10,
+        "taker_buy_base_asset_volume": 50.0, "taker_buy_quote_asset_volume": 1000.0,
+    }
+
+# Function to compute a percentile in microseconds from a list of seconds
+def percentile_us(samples, fraction):
+    return float(numpy.percentile(samples, fraction * 100)) * 1e6
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trade journal write latency, query and replay speed")
+    parser.add_argument("--decisions", type=int, default=340000, help="decisions journaled, three entries each")
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--synchronous", type=int, default=2000, help="entries committed one at a time as a baseline")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="journal-bench-")
+    symbols = [f"TOKEN{index}USDT" for index in range(args.symbols)]
+
+    # Baseline: one transaction, so one fsync, per entry on the trading path
+    connection = trade_journal.connect(os.path.join(directory, "synchronous.db"))
+    samples = []
+    for index in range(args.synchronous):
+        symbol, time_ms, entries = make_entries(index, symbols, candle)
+        start = time.perf_counter()
+        with connection:
+            connection.execute(
+                "INSERT INTO entries (time, kind, symbol, trace_id, payload) VALUES (?, ?, ?, ?, ?)",
+                (time_ms, trade_journal.ORDER, symbol, None, json.dumps(entries[1][1])),
+            )
+        samples.append(time.perf_counter() - start)
+    connection.close()
+    print(
+        f"commit per entry      {len(samples) / sum(samples):>10,.0f} entries/s  "
+        f"p50={percentile_us(samples, 0.5):.1f}us p99={percentile_us(samples, 0.99):.1f}us"
+    )
+
+    # Journal: record() queues, the writer commits batches
+    path = os.path.join(directory, "journal.db")
+    journal = trade_journal.TradeJournal(path)
+    journal.start()
+
+    def write(worker):
+        latencies = []
+        for index in range(worker, args.decisions, args.writers):
+            symbol, time_ms, entries = make_entries(index, symbols, candle)
+            for kind, payload in entries:
+                start = time.perf_counter()
+                journal.record(kind, symbol, payload, time_ms)
+                latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.writers) as executor:
+        latencies = [sample for samples in executor.map(write, range(args.writers)) for sample in samples]
+    recorded = time.perf_counter() - start
+    journal.flush()
+    durable = time.perf_counter() - start
+    metrics = journal.metrics()
+    print(
+        f"batched journal       {len(latencies) / durable:>10,.0f} entries/s durable  "
+        f"record p50={percentile_us(latencies, 0.5):.1f}us p99={percentile_us(latencies, 0.99):.1f}us  "
+        f"recorded in {recorded:.2f}s, durable after {durable:.2f}s"
+    )
+    print(
+        f"{'':<22}{metrics['entries']:,} entries in {metrics['batches']:,} transactions "
+        f"({metrics['entries'] / metrics['batches']:.0f} per fsync), {os.path.getsize(path) / 2**20:.0f} MiB"
+    )
+
+    # Queries by symbol and time range over the whole journal
+    symbol = symbols[3]
+    hour_start = START_MS + args.decisions // 2 * 1000
+    queries = (
+        ("one symbol, one hour", lambda: list(journal.query(symbol, None, hour_start, hour_start + 3600000))),
+        ("one symbol, orders", lambda: list(journal.query(symbol, trade_journal.ORDER))),
+        ("all symbols, one minute", lambda: list(journal.query(None, None, hour_start, hour_start + 60000))),
+        ("count one symbol", lambda: journal.count(symbol)),
+    )
+    for name, run in queries:
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        size = result if isinstance(result, int) else len(result)
+        print(f"query {name:<24} {size:>8,} entries in {elapsed * 1000:8.1f}ms")
+
+    # The same queries without the indexes, scanning the table
+    with sqlite3.connect(path) as scan:
+        start = time.perf_counter()
+        rows = scan.execute(
+            "SELECT payload FROM entries NOT INDEXED WHERE symbol = ? AND time >= ? AND time < ?",
+            (symbol, hour_start, hour_start + 3600000),
+        ).fetchall()
+        print(f"scan  {'one symbol, one hour':<24} {len(rows):>8,} entries in {(time.perf_counter() - start) * 1000:8.1f}ms")
+
+    # Replay the journaled decisions through the strategy's order functions
+    with open(os.path.join(ROOT, "sol_pair.json"), "r") as file:
+        pair = symbol_cache.parse_symbol(json.load(file)[0])
+    start = time.perf_counter()
+    columns = journal.candle_columns(symbol)
+    print(f"candle_columns {symbol}: {len(columns['close']):,} candles from the journal in {(time.perf_counter() - start) * 1000:.0f}ms")
+    start = time.perf_counter()
+    compared = backtest.replay_journal(journal, symbol, pair, hour_start, hour_start + 3600000)
+    print(f"replay_journal: {len(compared)} decisions recomputed in {(time.perf_counter() - start) * 1000:.0f}ms")
+    journal.stop()
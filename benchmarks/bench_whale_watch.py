@@ -0,0 +1,85 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "moralis"))
+
+import whale_watch
+
+# Function to build a random EVM address
+def make_address(generator):
+    return "0x" + "".join(generator.choice("0123456789abcdef") for _ in range(40))
+
+# Function to build a Moralis stream payload with native and token transfers
+def make_payload(generator, transfers, watched, tokens, watched_share=0.05):
+    strangers = [make_address(generator) for _ in range(200)]
+
+    # Function to pick the two ends of a transfer, a watched one in watched_share of them
+    def ends():
+        if generator.random() < watched_share:
+            whale = generator.choice(watched)
+            stranger = generator.choice(strangers)
+            return (whale, stranger) if generator.random() < 0.5 else (stranger, whale)
+        return generator.choice(strangers), generator.choice(strangers)
+
+    txs = []
+    erc20_transfers = []
+    for index in range(transfers):
+        from_address, to_address = ends()
+        transaction_hash = f"0x{generator.getrandbits(256):064x}"
+        if index % 2:
+            txs.append({
+                "hash": transaction_hash,
+                # Checksummed addresses arrive in mixed case
+                "fromAddress": "0x" + from_address[2:].upper(),
+                "toAddress": to_address,
+                "value": str(generator.randint(1, 10**20)),
+            })
+        else:
+            erc20_transfers.append({
+                "transactionHash": transaction_hash,
+                "logIndex": "0",
+                "tokenAddress": generator.choice(tokens),
+                "tokenDecimals": "18",
+                "fromAddress": from_address,
+                "toAddress": to_address,
+                "value": str(generator.randint(1, 10**22)),
+            })
+    return {"txs": txs, "erc20Transfers": erc20_transfers}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Whale watch evaluation of large webhook payloads")
+    parser.add_argument("--addresses", type=int, default=5000)
+    parser.add_argument("--transfers", type=int, default=5000, help="transfers per payload")
+    parser.add_argument("--payloads", type=int, default=20)
+    args = parser.parse_args()
+
+    generator = random.Random(17)
+    watched = [make_address(generator) for _ in range(args.addresses)]
+    tokens = [make_address(generator) for _ in range(5)]
+    rules = [
+        whale_watch.make_rule(address, weight=generator.choice([0.5, 1.0, 2.0]), direction=generator.choice(whale_watch.DIRECTIONS))
+        for address in watched
+    ]
+    engine = whale_watch.WhaleWatch(
+        rules, token_settings={token: {"threshold": 10000.0} for token in tokens}, default_threshold=500.0
+    )
+    payloads = [make_payload(generator, args.transfers, watched, tokens) for _ in range(args.payloads)]
+
+    timings = []
+    intents = 0
+    for payload in payloads:
+        start = time.perf_counter()
+        intents += len(engine.evaluate(payload))
+        timings.append(time.perf_counter() - start)
+    # Replaying a payload, as Moralis does for confirmations, adds no flow
+    duplicate_intents = len(engine.evaluate(payloads[-1]))
+
+    timings.sort()
+    metrics = engine.metrics()
+    print(f"addresses={args.addresses} transfers/payload={args.transfers} payloads={args.payloads}")
+    print(f"per payload p50={timings[len(timings) // 2] * 1000:.2f}ms max={timings[-1] * 1000:.2f}ms")
+    print(f"matched={metrics['matched']} duplicates={metrics['duplicates']} intents={intents} replay intents={duplicate_intents}")
@@ -0,0 +1,88 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Canned responses for the Spot REST endpoints used by the bot
+STUB_RESPONSES = {
+    ("GET", "/api/v3/time"): lambda params: {"serverTime": int(time.time() * 1000)},
+    ("GET", "/api/v3/account"): lambda params: {"canTrade": True, "balances": []},
+    ("GET", "/api/v3/openOrders"): lambda params: [],
+    ("DELETE", "/api/v3/openOrders"): lambda params: [],
+    ("POST", "/api/v3/order"): lambda params: {
+        "symbol": params.get("symbol"),
+        "orderId": int(time.time() * 1000000),
+        "status": "NEW",
+        "type": params.get("type"),
+        "side": params.get("side"),
+    },
+}
+
+# Class handling requests against the stub Binance server
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Answers Spot REST requests from STUB_RESPONSES over HTTP/1.1 keep-alive connections.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _respond(self, method):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        handler = self.server.responses.get((method, url.path))
+        rejection = self.server.gate(method, url.path, params)
+        if rejection is not None:
+            status, body = rejection
+        elif handler is None:
+            status, body = 404, {"code": -1, "msg": "Unknown endpoint"}
+        else:
+            status, body = 200, handler(params)
+
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for header, value in self.server.extra_headers().items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._respond("GET")
+
+    def do_POST(self):
+        self._respond("POST")
+
+    def do_DELETE(self):
+        self._respond("DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+# Function to start the stub server in a background thread
+def start_stub_server(port=0, responses=None, extra_headers=None, gate=None):
+    """
+    Starts a local stub of the Binance Spot REST API.
+
+    Args:
+        port (int): The port to listen on, 0 picks a free port.
+        responses (dict): Optional (method, path) -> callable(params) overrides.
+        extra_headers (callable): Optional callable returning headers added to every response.
+        gate (callable): Optional callable(method, path, params) returning a (status, body)
+            rejection, or None to answer normally.
+
+    Returns:
+        tuple: The running server and its base URL.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.responses = dict(STUB_RESPONSES)
+    if responses:
+        server.responses.update(responses)
+    server.extra_headers = extra_headers or (lambda: {})
+    server.gate = gate or (lambda method, path, params: None)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import contextlib
+import copy
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+sys.path.insert(0, ROOT)
+
+import binance_connect
+import execute
+import rate_limiter
+import settings
+import strategy
+import symbol_cache
+from stub_server import start_stub_server
+
+# Default relative slowdown of the median latency reported as a regression
+DEFAULT_THRESHOLD = 0.25
+
+# Default file the results are written to
+DEFAULT_OUTPUT = "benchmark_results.json"
+
+# Quote assets of the synthetic exchange info used by query_quote_asset_list
+QUOTE_ASSETS = ("USDT", "BUSD", "BTC", "ETH", "BNB", "SOL")
+
+# Function to load a recorded fixture
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), "r") as file:
+        return json.load(file)
+
+# Function to build an exchange info response from the recorded SOLUSDT entry
+def make_exchange_info(symbol_count):
+    """
+    Replicates the sol_pair.json entry into symbol_count symbols across QUOTE_ASSETS.
+    """
+    with open(os.path.join(ROOT, "sol_pair.json"), "r") as file:
+        template = json.load(file)[0]
+    symbols = [template]
+    for index in range(1, symbol_count):
+        entry = copy.deepcopy(template)
+        quote_asset = QUOTE_ASSETS[index % len(QUOTE_ASSETS)]
+        entry["baseAsset"] = f"TOKEN{index}"
+        entry["quoteAsset"] = quote_asset
+        entry["symbol"] = f"TOKEN{index}{quote_asset}"
+        entry["status"] = "TRADING" if index % 10 else "BREAK"
+        symbols.append(entry)
+    return {"timezone": "UTC", "serverTime": 0, "rateLimits": [], "exchangeFilters": [], "symbols": symbols}
+
+# Function to measure the latency of every call of a benchmark
+def measure(function, iterations, warmup):
+    """
+    Calls function warmup times, then times iterations calls one by one.
+
+    Returns:
+        dict: Iterations, throughput in calls per second, and mean and percentile latencies in microseconds.
+    """
+    for _ in range(warmup):
+        function()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    total = sum(samples)
+
+    # Function to read a percentile of the sorted samples in microseconds
+    def percentile(fraction):
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1e6
+
+    return {
+        "iterations": iterations,
+        "ops_per_second": iterations / total,
+        "mean_us": total / iterations * 1e6,
+        "p50_us": percentile(0.5),
+        "p90_us": percentile(0.9),
+        "p99_us": percentile(0.99),
+    }
+
+# Function to build the benchmarks against a stub exchange and price service
+def build_benchmarks(workdir, symbol_count):
+    """
+    Starts the stub endpoints and returns (name, callable, iteration scale) for every benchmark.
+
+    Args:
+        workdir (str): Directory for the settings and symbol cache files.
+        symbol_count (int): The number of symbols in the stubbed exchange info.
+
+    Returns:
+        tuple: The list of benchmarks and the stub server.
+    """
+    raw_klines = load_fixture("klines_SOLUSDT_1h.json")
+    exchange_info = make_exchange_info(symbol_count)
+    sol_pair_info = exchange_info["symbols"][0]
+    prices = {"sol": 20.0, "usdt": 1.0, "busd": 0.999}
+
+    # Function to answer a klines request with the newest recorded candles
+    def klines(params):
+        return raw_klines[-int(params.get("limit", 500)) :]
+
+    # Function to answer a batched price request of the price service
+    def token_prices(params):
+        return {address: {"usdPrice": prices[address]} for address in params["addresses"].split(",")}
+
+    server, base_url = start_stub_server(responses={
+        ("GET", "/api/v3/klines"): klines,
+        ("GET", "/api/v3/exchangeInfo"): lambda params: exchange_info,
+        ("GET", "/getPrices"): token_prices,
+    })
+    # Lift the client-side limits so the suite measures the code, not the governor
+    rate_limiter.set_governor(base_url, rate_limiter.RateLimitGovernor(weight_limit=10**9, order_limit=10**9))
+
+    project_settings = {
+        "BaseUrl": base_url,
+        "MarketDataBaseUrl": base_url,
+        "BinanceKeys": {"API_KEY": "bench-key", "SECRET_KEY": "bench-secret"},
+        "Tokens": {"SOL": "sol", "USDT": "usdt", "BUSD": "busd"},
+    }
+    settings_path = os.path.join(workdir, "settings.json")
+    with open(settings_path, "w") as file:
+        json.dump(project_settings, file)
+    settings.load(settings_path, env_path=None)
+    strategy.PRICE_SERVICE_URL = base_url
+    symbol_cache._default_cache = symbol_cache.SymbolCache(
+        cache_path=os.path.join(workdir, "exchange_info.json"), fetch=lambda: exchange_info
+    )
+
+    pair = symbol_cache.parse_symbol(sol_pair_info)
+    candles = binance_connect.convert_candlestick_data(raw_klines)
+    get_candles = lambda symbol, timeframe, qty: candles[-qty:]
+
+    benchmarks = [
+        ("convert_candlestick_data (500 candles)", lambda: binance_connect.convert_candlestick_data(raw_klines), 1),
+        ("parse_kline_columns (500 candles)", lambda: binance_connect.parse_kline_columns(raw_klines), 1),
+        ("get_candlestick_data (stub, 500 candles)", lambda: binance_connect.get_candlestick_data("SOLUSDT", "1h", 500), 0.2),
+        ("get_and_transform_data (500 candles)", lambda: strategy.get_and_transform_data("SOLUSDT", "1h", 500, get_candles), 0.5),
+        ("determine_trade_event", lambda: strategy.determine_trade_event("SOLUSDT", "1h", 0.001, "Green", get_candles), 1),
+        ("calculate_buy_params", lambda: strategy.calculate_buy_params("SOLUSDT", pair, "1h", get_candles), 1),
+        ("calculate_sell_params", lambda: strategy.calculate_sell_params("SOLUSDT", pair, "1h", get_candles), 1),
+        (f"query_quote_asset_list (stub, {symbol_count} symbols)", lambda: binance_connect.query_quote_asset_list("USDT"), 0.05),
+        ("execute_analysis_and_trade buy (stub)", lambda: execute.execute_analysis_and_trade("buy"), 0.1),
+        ("execute_analysis_and_trade_async buy (stub)", lambda: asyncio.run(execute.execute_analysis_and_trade_async("buy")), 0.1),
+    ]
+    return benchmarks, server
+
+# Function to compare results with a saved baseline
+def compare(results, baseline, threshold):
+    """
+    Flags the benchmarks whose median latency grew by more than threshold over the baseline.
+
+    Returns:
+        list: (name, baseline p50, current p50, relative change) of every regression.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        change = result["p50_us"] / reference["p50_us"] - 1
+        result["baseline_p50_us"] = reference["p50_us"]
+        result["change"] = change
+        if change > threshold:
+            regressions.append((name, reference["p50_us"], result["p50_us"], change))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark suite of the data, strategy and order paths")
+    parser.add_argument("--iterations", type=int, default=1000, help="calls of the fastest benchmarks")
+    parser.add_argument("--symbols", type=int, default=2000, help="symbols in the stubbed exchange info")
+    parser.add_argument("--only", help="run the benchmarks whose name contains this text")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON file the results are written to")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument("--save-baseline", help="also write the results to this baseline file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="p50 slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        benchmarks, server = build_benchmarks(workdir, args.symbols)
+        results = {}
+        for name, function, scale in benchmarks:
+            if args.only and args.only not in name:
+                continue
+            iterations = max(10, int(args.iterations * scale))
+            # The strategy functions print their decisions; keep the report readable
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                results[name] = measure(function, iterations, warmup=max(1, iterations // 10))
+            result = results[name]
+            print(
+                f"{name:<48} {result['ops_per_second']:>12,.0f} ops/s  p50={result['p50_us']:>10.1f}us  "
+                f"p90={result['p90_us']:>10.1f}us  p99={result['p99_us']:>10.1f}us"
+            )
+        server.shutdown()
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            regressions = compare(results, json.load(file)["results"], args.threshold)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+
+    for name, before, after, change in regressions:
+        print(f"REGRESSION {name}: p50 {before:.1f}us -> {after:.1f}us ({change:+.0%})")
+    if args.baseline and not regressions:
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+    sys.exit(1 if regressions else 0)
@@ -1,5 +1,111 @@
 from binance.spot import Spot
+import threading
+import numpy
 import pandas
+import instrumentation
+import rate_limiter
+import trade_journal
+
+# Base URLs of the Binance Spot REST API
+MAINNET_BASE_URL = "https://api.binance.com"
+TESTNET_BASE_URL = "https://testnet.binance.vision"
+
+# Base URL of the public market data endpoints, see configure
+market_data_base_url = MAINNET_BASE_URL
+
+# Default number of keep-alive connections kept open per client
+DEFAULT_POOL_SIZE = 10
+
+# Keys of the candle dictionaries, in the column order of a raw kline
+KLINE_FIELDS = (
+    "time",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "close_time",
+    "quote_asset_volume",
+    "number_of_trades",
+    "taker_buy_base_asset_volume",
+    "taker_buy_quote_asset_volume",
+)
+INTEGER_FIELDS = ("time", "close_time", "number_of_trades")
+
+# Registry of long-lived clients keyed by (api_key, base_url)
+_client_registry = {}
+_client_registry_lock = threading.Lock()
+
+# Function to get a pooled, keep-alive Spot client for an account/environment
+def get_client(api_key=None, secret_key=None, base_url=None, pool_size=DEFAULT_POOL_SIZE):
+    """
+    Returns a long-lived Spot client for the given account and environment.
+
+    Clients are registered by (api_key, base_url) so every call made for the same
+    account reuses the same HTTP session and its keep-alive connections instead of
+    paying for a new TLS handshake per request. Every request is scheduled by the
+    rate limit governor shared by all clients of the same base URL.
+
+    Args:
+        api_key (str): The Binance API key, or None for public market data endpoints.
+        secret_key (str): The corresponding secret key.
+        base_url (str): The REST API base URL, defaults to the market data base URL.
+        pool_size (int): The maximum number of connections kept open by the client.
+
+    Returns:
+        binance.spot.Spot: The pooled client.
+    """
+    base_url = base_url or market_data_base_url
+    registry_key = (api_key, base_url)
+    client = _client_registry.get(registry_key)
+    if client is not None:
+        return client
+
+    with _client_registry_lock:
+        client = _client_registry.get(registry_key)
+        if client is None:
+            client = Spot(api_key=api_key, api_secret=secret_key, base_url=base_url)
+            adapter = rate_limiter.GovernedHTTPAdapter(
+                rate_limiter.get_governor(base_url), pool_connections=1, pool_maxsize=pool_size
+            )
+            client.session.mount("https://", adapter)
+            client.session.mount("http://", adapter)
+            _client_registry[registry_key] = client
+        return client
+
+# Function to apply the base URLs configured in the project settings
+def configure(project_settings):
+    """
+    Points the market data endpoints at the base URL from the project settings.
+
+    Args:
+        project_settings (dict): Project-specific settings, optionally with 'MarketDataBaseUrl'.
+    """
+    global market_data_base_url
+    market_data_base_url = project_settings.get("MarketDataBaseUrl", MAINNET_BASE_URL)
+
+# Function to get the base URL orders are sent to
+def get_trading_base_url(project_settings):
+    """
+    Returns the base URL of the account and order endpoints.
+
+    Args:
+        project_settings (dict): Project-specific settings, optionally with 'BaseUrl'.
+
+    Returns:
+        str: The configured base URL, the testnet by default.
+    """
+    return project_settings.get("BaseUrl", TESTNET_BASE_URL)
+
+# Function to close and forget every pooled client
+def close_clients():
+    """
+    Closes the HTTP sessions of all pooled clients and empties the registry.
+    """
+    with _client_registry_lock:
+        for client in _client_registry.values():
+            client.session.close()
+        _client_registry.clear()
 
 # Function to query the Binance system status
 def query_binance_status():
@@ -9,36 +115,34 @@ def query_binance_status():
     Returns:
         bool: True if the system is operational, raises ConnectionError otherwise.
     """
-    status = Spot().system_status()
+    status = get_client().system_status()
     if status['status'] == 0:
         return True
     else:
         raise ConnectionError
 
 # Function to query account information
-def query_account(api_key, secret_key):
+@instrumentation.timed()
+def query_account(api_key, secret_key, base_url=TESTNET_BASE_URL):
     """
     Queries the account information associated with the provided API key and secret key.
 
     Args:
         api_key (str): The Binance API key.
         secret_key (str): The corresponding secret key.
+        base_url (str): The REST API base URL, the testnet by default.
 
     Returns:
         dict: Account information.
     """
-    return Spot(
-        api_key=api_key,
-        api_secret=secret_key,
-        base_url='https://testnet.binance.vision'
-    ).account()
+    return get_client(api_key, secret_key, base_url=base_url).account()
 
 # Function to query the Binance testnet server time
 def query_testnet():
     """
     Connects to the Binance testnet and prints the server time.
     """
-    client = Spot(base_url="https://testnet.binance.vision")
+    client = get_client(base_url=TESTNET_BASE_URL)
     print(client.time())
 
 # Function to query historical candlestick data
@@ -54,7 +158,20 @@ def get_candlestick_data(symbol, timeframe, qty):
     Returns:
         list: List of dictionaries containing candlestick data.
     """
-    raw_data = Spot().klines(symbol=symbol, interval=timeframe, limit=qty)
+    raw_data = get_client().klines(symbol=symbol, interval=timeframe, limit=qty)
+    return convert_candlestick_data(raw_data)
+
+# Function to convert raw candlestick data into dictionaries
+def convert_candlestick_data(raw_data):
+    """
+    Converts a raw klines response into one dictionary per candle.
+
+    Args:
+        raw_data (list): The klines response, one list per candle.
+
+    Returns:
+        list: List of dictionaries containing candlestick data.
+    """
     converted_data = []
 
     for candle in raw_data:
@@ -76,7 +193,58 @@ def get_candlestick_data(symbol, timeframe, qty):
 
     return converted_data
 
+# Function to query historical candlestick data as NumPy columns
+def get_candlestick_columns(symbol, timeframe, qty):
+    """
+    Queries historical candlestick data for a trading pair as columns.
+
+    Args:
+        symbol (str): The trading pair symbol.
+        timeframe (str): The candlestick timeframe (e.g., '1h', '1d').
+        qty (int): The number of candlesticks to retrieve.
+
+    Returns:
+        dict: One NumPy array per KLINE_FIELDS key plus the 'is_green' direction column.
+    """
+    raw_data = get_client().klines(symbol=symbol, interval=timeframe, limit=qty)
+    return parse_kline_columns(raw_data)
+
+# Function to parse raw candlestick data directly into NumPy columns
+def parse_kline_columns(raw_data):
+    """
+    Converts a raw klines response into columns in one pass, without per-candle dictionaries.
+
+    Args:
+        raw_data (list): The klines response, one list per candle.
+
+    Returns:
+        dict: One NumPy array per KLINE_FIELDS key plus the boolean 'is_green'
+        column, True where the candle closed above its open.
+    """
+    fields = list(zip(*raw_data)) if raw_data else [()] * len(KLINE_FIELDS)
+    columns = {}
+    for position, field in enumerate(KLINE_FIELDS):
+        dtype = numpy.int64 if field in INTEGER_FIELDS else numpy.float64
+        columns[field] = numpy.array(fields[position], dtype=dtype)
+    columns["is_green"] = columns["open"] < columns["close"]
+    return columns
+
+# Function to query an order book snapshot
+def get_order_book(symbol, limit=1000):
+    """
+    Queries the order book of a trading pair.
+
+    Args:
+        symbol (str): The trading pair symbol.
+        limit (int): The number of price levels per side (up to 5000).
+
+    Returns:
+        dict: The snapshot with 'lastUpdateId', 'bids' and 'asks' as [price, quantity] strings.
+    """
+    return get_client().depth(symbol=symbol, limit=limit)
+
 # Function to query trading pairs with a specific quote asset
+@instrumentation.timed()
 def query_quote_asset_list(quote_asset_symbol):
     """
     Queries trading pairs with the specified quote asset and filters for those in 'TRADING' status.
@@ -87,7 +255,7 @@ def query_quote_asset_list(quote_asset_symbol):
     Returns:
         pandas.DataFrame: DataFrame containing trading pairs with the quote asset.
     """
-    symbol_dictionary = Spot().exchange_info()
+    symbol_dictionary = get_client().exchange_info()
     symbol_dataframe = pandas.DataFrame(symbol_dictionary["symbols"])
     quote_symbol_dataframe = symbol_dataframe.loc[
         (symbol_dataframe["quoteAsset"] == quote_asset_symbol) & (symbol_dataframe["status"] == "TRADING")
@@ -95,6 +263,7 @@ def query_quote_asset_list(quote_asset_symbol):
     return quote_symbol_dataframe
 
 # Function to place a trade with given parameters
+@instrumentation.timed()
 def make_trade_with_params(params, project_settings):
     """
     Places a trade using the provided parameters.
@@ -108,13 +277,9 @@ def make_trade_with_params(params, project_settings):
     """
     api_key = project_settings["BinanceKeys"]["API_KEY"]
     secret_key = project_settings["BinanceKeys"]["SECRET_KEY"]
-    client = Spot(
-        api_key=api_key,
-        api_secret=secret_key,
-        base_url="https://testnet.binance.vision",
-    )
+    client = get_client(api_key, secret_key, base_url=get_trading_base_url(project_settings))
     try:
-        response = client.new_order(**params)
+        response = trade_journal.journal_order(params.get("symbol"), params, lambda: client.new_order(**params))
         return response
     except ConnectionRefusedError as error:
         print(f"Error: {error}")
@@ -130,19 +295,42 @@ def query_open_trades(project_settings):
     Returns:
         dict: Response containing open trade orders.
     """
-    api_key = project_settings["BinanceKeys"]["API_Key"]
-    secret_key = project_settings["BinanceKeys"]["Secret_Key"]
-    client = Spot(
-        api_key=api_key,
-        api_secret=secret_key,
-        base_url="https://testnet.binance.vision",
-    )
+    api_key = project_settings["BinanceKeys"]["API_KEY"]
+    secret_key = project_settings["BinanceKeys"]["SECRET_KEY"]
+    client = get_client(api_key, secret_key, base_url=get_trading_base_url(project_settings))
     try:
         response = client.get_open_orders()
         return response
     except ConnectionRefusedError as error:
         print(f"Error: {error}")
 
+# Function to get the client of the account's user data stream
+def get_account_client(project_settings):
+    api_key = project_settings["BinanceKeys"]["API_KEY"]
+    secret_key = project_settings["BinanceKeys"]["SECRET_KEY"]
+    return get_client(api_key, secret_key, base_url=get_trading_base_url(project_settings))
+
+# Function to create a user data stream listen key
+def new_listen_key(project_settings):
+    """
+    Creates a listen key for the account's user data stream.
+
+    Args:
+        project_settings (dict): Project-specific settings.
+
+    Returns:
+        str: The listen key, valid for 60 minutes unless renewed.
+    """
+    return get_account_client(project_settings).new_listen_key()["listenKey"]
+
+# Function to extend the validity of a listen key
+def renew_listen_key(listen_key, project_settings):
+    get_account_client(project_settings).renew_listen_key(listen_key)
+
+# Function to close a user data stream
+def close_listen_key(listen_key, project_settings):
+    get_account_client(project_settings).close_listen_key(listen_key)
+
 # Function to cancel an open trade by symbol
 def cancel_order_by_symbol(symbol, project_settings):
     """
@@ -156,12 +344,8 @@ def cancel_order_by_symbol(symbol, project_settings):
         dict: Response from the order cancellation.
     """
     api_key = project_settings["BinanceKeys"]["API_KEY"]
-    secret_key = project_settings["BinanceKeys"]["Secret_Key"]
-    client = Spot(
-        api_key=api_key,
-        api_secret=secret_key,
-        base_url="https://testnet.binance.vision",
-    )
+    secret_key = project_settings["BinanceKeys"]["SECRET_KEY"]
+    client = get_client(api_key, secret_key, base_url=get_trading_base_url(project_settings))
     try:
         response = client.cancel_open_orders(symbol=symbol)
         return response
@@ -184,19 +368,11 @@ def place_limit_order(symbol, side, quantity, price, project_settings):
         dict: Response from the order placement.
     """
     api_key = project_settings["BinanceKeys"]["API_KEY"]
-    secret_key = project_settings["BinanceKeys"]["Secret_Key"]
-    client = Spot(
-        key=api_key, secret=secret_key, base_url="https://testnet.binance.vision"
-    )
+    secret_key = project_settings["BinanceKeys"]["SECRET_KEY"]
+    client = get_client(api_key, secret_key, base_url=get_trading_base_url(project_settings))
     try:
-        response = client.new_order(
-            symbol=symbol,
-            side=side,
-            type="LIMIT",
-            timeInForce="GTC",
-            quantity=quantity,
-            price=price,
-        )
+        params = {"symbol": symbol, "side": side, "type": "LIMIT", "timeInForce": "GTC", "quantity": quantity, "price": price}
+        response = trade_journal.journal_order(symbol, params, lambda: client.new_order(**params))
         return response
     except ConnectionRefusedError as error:
         print(f"Error: {error}")
@@ -218,20 +394,19 @@ def place_stop_loss_order(symbol, side, quantity, stop_price, limit_price, proje
         dict: Response from the order placement.
     """
     api_key = project_settings["BinanceKeys"]["API_KEY"]
-    secret_key = project_settings["BinanceKeys"]["Secret_Key"]
-    client = Spot(
-        key=api_key, secret=secret_key, base_url="https://testnet.binance.vision"
-    )
+    secret_key = project_settings["BinanceKeys"]["SECRET_KEY"]
+    client = get_client(api_key, secret_key, base_url=get_trading_base_url(project_settings))
     try:
-        response = client.new_order(
-            symbol=symbol,
-            side=side,
-            type="STOP_LOSS_LIMIT",
-            timeInForce="GTC",
-            quantity=quantity,
-            stopPrice=stop_price,
-            price=limit_price,
-        )
+        params = {
+            "symbol": symbol,
+            "side": side,
+            "type": "STOP_LOSS_LIMIT",
+            "timeInForce": "GTC",
+            "quantity": quantity,
+            "stopPrice": stop_price,
+            "price": limit_price,
+        }
+        response = trade_journal.journal_order(symbol, params, lambda: client.new_order(**params))
         return response
     except ConnectionRefusedError as error:
         print(f"Error: {error}")
@@ -253,20 +428,110 @@ def place_take_profit_order(symbol, side, quantity, stop_price, limit_price, pro
         dict: Response from the order placement.
     """
     api_key = project_settings["BinanceKeys"]["API_KEY"]
-    secret_key = project_settings["BinanceKeys"]["Secret_Key"]
-    client = Spot(
-        key=api_key, secret=secret_key, base_url="https://testnet.binance.vision"
-    )
+    secret_key = project_settings["BinanceKeys"]["SECRET_KEY"]
+    client = get_client(api_key, secret_key, base_url=get_trading_base_url(project_settings))
     try:
-        response = client.new_order(
-            symbol=symbol,
-            side=side,
-            type="TAKE_PROFIT_LIMIT",
-            timeInForce="GTC",
-            quantity=quantity,
-            stopPrice=stop_price,
-            price=limit_price,
-        )
+        params = {
+            "symbol": symbol,
+            "side": side,
+            "type": "TAKE_PROFIT_LIMIT",
+            "timeInForce": "GTC",
+            "quantity": quantity,
+            "stopPrice": stop_price,
+            "price": limit_price,
+        }
+        response = trade_journal.journal_order(symbol, params, lambda: client.new_order(**params))
         return response
     except ConnectionRefusedError as error:
         print(f"Error: {error}")
+
+# Function to place an OCO pair of protective orders for a symbol
+def place_oco_order(symbol, side, quantity, take_profit_price, stop_price, stop_limit_price, project_settings, **kwargs):
+    """
+    Places a take profit and a stop loss as one OCO order list; when one fills the other expires.
+
+    The take profit is a LIMIT_MAKER leg and the stop loss a STOP_LOSS_LIMIT leg, above
+    and below the market for a SELL pair and the other way round for a BUY pair.
+
+    Args:
+        symbol (str): The trading pair symbol.
+        side (str): The side of both legs ('SELL' to protect a long position).
+        quantity (float): The quantity of both legs.
+        take_profit_price (float): The limit price of the take profit leg.
+        stop_price (float): The trigger price of the stop loss leg.
+        stop_limit_price (float): The limit price of the stop loss leg.
+        project_settings (dict): Project-specific settings.
+        **kwargs: Extra order list parameters, e.g. aboveClientOrderId.
+
+    Returns:
+        dict: The order list response, with the "orderListId" and "orderReports".
+    """
+    take_profit_leg = {"Type": "LIMIT_MAKER", "Price": take_profit_price}
+    stop_loss_leg = {"Type": "STOP_LOSS_LIMIT", "Price": stop_limit_price, "StopPrice": stop_price, "TimeInForce": "GTC"}
+    above, below = (take_profit_leg, stop_loss_leg) if side == "SELL" else (stop_loss_leg, take_profit_leg)
+    params = {f"above{key}": value for key, value in above.items()}
+    params.update({f"below{key}": value for key, value in below.items()})
+    params.update(kwargs)
+    client = get_account_client(project_settings)
+    journaled = dict(params, symbol=symbol, side=side, quantity=quantity, orderList="OCO")
+    return trade_journal.journal_order(symbol, journaled, lambda: client.new_oco_order(
+        symbol, side, quantity, params.pop("aboveType"), params.pop("belowType"), **params
+    ))
+
+# Function to place an entry order with its protective OCO pair in one request
+def place_otoco_order(
+    symbol, side, quantity, entry_price, take_profit_price, stop_price, stop_limit_price, project_settings, **kwargs
+):
+    """
+    Places a LIMIT entry whose fill places a take profit and stop loss OCO pair, as one OTOCO order list.
+
+    The exchange places the protective pair as soon as the entry fills, so the
+    position is never open without its stop and no further request is needed.
+
+    Args:
+        symbol (str): The trading pair symbol.
+        side (str): The entry side ('BUY' or 'SELL'); the protective pair takes the other side.
+        quantity (float): The quantity of the entry and of the protective legs.
+        entry_price (float): The limit price of the entry.
+        take_profit_price (float): The limit price of the take profit leg.
+        stop_price (float): The trigger price of the stop loss leg.
+        stop_limit_price (float): The limit price of the stop loss leg.
+        project_settings (dict): Project-specific settings.
+        **kwargs: Extra order list parameters, e.g. workingClientOrderId.
+
+    Returns:
+        dict: The order list response, with the entry first in "orderReports".
+    """
+    exit_side = "SELL" if side == "BUY" else "BUY"
+    take_profit_leg = {"Type": "LIMIT_MAKER", "Price": take_profit_price}
+    stop_loss_leg = {"Type": "STOP_LOSS_LIMIT", "Price": stop_limit_price, "StopPrice": stop_price, "TimeInForce": "GTC"}
+    above, below = (take_profit_leg, stop_loss_leg) if exit_side == "SELL" else (stop_loss_leg, take_profit_leg)
+    params = {f"pendingAbove{key}": value for key, value in above.items()}
+    params.update({f"pendingBelow{key}": value for key, value in below.items()})
+    params.update(kwargs)
+    client = get_account_client(project_settings)
+    journaled = dict(params, symbol=symbol, side=side, quantity=quantity, workingPrice=entry_price, orderList="OTOCO")
+    return trade_journal.journal_order(symbol, journaled, lambda: client.new_otoco_order(
+        symbol,
+        "LIMIT",
+        side,
+        entry_price,
+        quantity,
+        exit_side,
+        quantity,
+        params.pop("pendingAboveType"),
+        workingTimeInForce="GTC",
+        **params,
+    ))
+
+# Function to cancel every order of an order list
+def cancel_order_list(symbol, order_list_id, project_settings):
+    client = get_account_client(project_settings)
+    params = {"symbol": symbol, "cancel": "orderList", "orderListId": order_list_id}
+    return trade_journal.journal_order(symbol, params, lambda: client.cancel_oco_order(symbol, orderListId=order_list_id))
+
+# Function to cancel one order by id
+def cancel_order(symbol, order_id, project_settings):
+    client = get_account_client(project_settings)
+    params = {"symbol": symbol, "cancel": "order", "orderId": order_id}
+    return trade_journal.journal_order(symbol, params, lambda: client.cancel_order(symbol, orderId=order_id))
@@ -0,0 +1,438 @@
+import collections
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import binance_connect
+import instrumentation
+
+# Bracket modes: one OTOCO order list, or the entry followed by an OCO pair once it fills
+ORDER_LIST = "otoco"
+SEQUENTIAL = "oco"
+
+# Default number of brackets and orders submitted concurrently
+DEFAULT_WORKERS = 8
+
+# Bracket statuses
+PENDING = "PENDING"
+PROTECTING = "PROTECTING"
+PROTECTED = "PROTECTED"
+CLOSED = "CLOSED"
+CANCELED = "CANCELED"
+FAILED = "FAILED"
+
+# Order statuses ending an entry without a fill
+ENTRY_ENDED = ("CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH")
+
+# Client order ids are prefixed per process so they stay unique across restarts
+_CLIENT_PREFIX = f"bk{os.urandom(3).hex()}"
+
+# Class holding the orders of one entry and its protective pair
+class Bracket:
+    """
+    One entry order with its take profit and stop loss, tracked as a unit.
+
+    PENDING until the entry fills, then PROTECTED while the take profit and stop
+    loss rest on the book, and CLOSED once either of them fills. A bracket whose
+    protective pair could not be placed is FAILED, with the error.
+    """
+
+    def __init__(self, group_id, mode, symbol, side, quantity, entry_price, take_profit_price, stop_price, stop_limit_price):
+        self.group_id = group_id
+        self.mode = mode
+        self.symbol = symbol
+        self.side = side
+        self.exit_side = "SELL" if side == "BUY" else "BUY"
+        self.quantity = quantity
+        self.entry_price = entry_price
+        self.take_profit_price = take_profit_price
+        self.stop_price = stop_price
+        self.stop_limit_price = stop_limit_price
+        self.status = PENDING
+        self.version = 0
+        self.entry_order_id = None
+        self.order_list_id = None
+        self.client_order_ids = {}
+        self.exit = None
+        self.error = None
+        self.sending = False
+        self.fill_seen = False
+        self.submitted_at = None
+        self.protected_at = None
+
+    def time_to_protected(self):
+        """
+        Returns the seconds from submission until the stop loss was resting, None if it never was.
+        """
+        if self.protected_at is None:
+            return None
+        return self.protected_at - self.submitted_at
+
+    def to_dict(self):
+        return {
+            "group_id": self.group_id,
+            "mode": self.mode,
+            "symbol": self.symbol,
+            "side": self.side,
+            "quantity": self.quantity,
+            "entry_price": self.entry_price,
+            "take_profit_price": self.take_profit_price,
+            "stop_price": self.stop_price,
+            "stop_limit_price": self.stop_limit_price,
+            "status": self.status,
+            "entry_order_id": self.entry_order_id,
+            "order_list_id": self.order_list_id,
+            "exit": self.exit,
+            "error": self.error,
+            "time_to_protected": self.time_to_protected(),
+        }
+
+# Class placing and tracking brackets
+class BracketManager:
+    """
+    Places entry + take profit + stop loss brackets and manages each as one unit.
+
+    In ORDER_LIST mode the three orders go out as one OTOCO order list: the
+    exchange places the OCO pair the moment the entry fills, so the position is
+    never unprotected and a bracket costs one request. In SEQUENTIAL mode, for
+    venues without OTOCO, the entry is placed alone and the OCO pair follows as
+    soon as the entry is known to be filled, from the order response or the user
+    data stream. Independent brackets and orders are pipelined over a shared
+    executor, and every order carries a client order id naming its bracket and
+    leg, so updates are matched in O(1) even before the placement response
+    returns.
+
+    Args:
+        project_settings (dict): Project-specific settings.
+        mode (str): ORDER_LIST or SEQUENTIAL.
+        workers (int): The number of brackets and orders submitted concurrently.
+        api (object): Has the binance_connect order functions, replaceable for a fake exchange.
+    """
+
+    def __init__(self, project_settings, mode=ORDER_LIST, workers=DEFAULT_WORKERS, api=binance_connect):
+        if mode not in (ORDER_LIST, SEQUENTIAL):
+            raise ValueError(f"Unknown bracket mode {mode!r}")
+        self.project_settings = project_settings
+        self.mode = mode
+        self.api = api
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bracket")
+        self.brackets = {}
+        self.counters = collections.Counter()
+        self._by_client_order_id = {}
+        self._group_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, state):
+        """
+        Follows the order updates of an account_state.AccountState, needed for entries that rest.
+        """
+        state.add_listener(self.on_order_update)
+
+    def _register(self, bracket):
+        bracket.version += 1
+        prefix = f"{_CLIENT_PREFIX}-{bracket.group_id}-{bracket.version}"
+        with self._lock:
+            for client_order_id in bracket.client_order_ids.values():
+                self._by_client_order_id.pop(client_order_id, None)
+            bracket.client_order_ids = {
+                "entry": f"{prefix}e" if bracket.status == PENDING else bracket.client_order_ids.get("entry"),
+                "take_profit": f"{prefix}t",
+                "stop_loss": f"{prefix}s",
+            }
+            for role, client_order_id in bracket.client_order_ids.items():
+                self._by_client_order_id[client_order_id] = (bracket, role)
+
+    def _protective_ids(self, bracket, above_prefix, below_prefix):
+        # The take profit is the above leg when protecting a long position, the below leg otherwise
+        above, below = ("take_profit", "stop_loss") if bracket.exit_side == "SELL" else ("stop_loss", "take_profit")
+        return {
+            f"{above_prefix}ClientOrderId": bracket.client_order_ids[above],
+            f"{below_prefix}ClientOrderId": bracket.client_order_ids[below],
+        }
+
+    def _send_order_list(self, bracket):
+        response = self.api.place_otoco_order(
+            bracket.symbol,
+            bracket.side,
+            bracket.quantity,
+            bracket.entry_price,
+            bracket.take_profit_price,
+            bracket.stop_price,
+            bracket.stop_limit_price,
+            self.project_settings,
+            workingClientOrderId=bracket.client_order_ids["entry"],
+            **self._protective_ids(bracket, "pendingAbove", "pendingBelow"),
+        )
+        bracket.order_list_id = response["orderListId"]
+        entry = response["orderReports"][0]
+        bracket.entry_order_id = entry["orderId"]
+        return entry["status"]
+
+    def _send_entry(self, bracket):
+        response = self.api.make_trade_with_params(
+            {
+                "symbol": bracket.symbol,
+                "side": bracket.side,
+                "type": "LIMIT",
+                "timeInForce": "GTC",
+                "quantity": bracket.quantity,
+                "price": bracket.entry_price,
+                "newClientOrderId": bracket.client_order_ids["entry"],
+            },
+            self.project_settings,
+        )
+        bracket.entry_order_id = response["orderId"]
+        return response["status"]
+
+    def _send_protection(self, bracket):
+        response = self.api.place_oco_order(
+            bracket.symbol,
+            bracket.exit_side,
+            bracket.quantity,
+            bracket.take_profit_price,
+            bracket.stop_price,
+            bracket.stop_limit_price,
+            self.project_settings,
+            **self._protective_ids(bracket, "above", "below"),
+        )
+        bracket.order_list_id = response["orderListId"]
+
+    def _fail(self, bracket, error):
+        with self._lock:
+            bracket.status = FAILED
+            bracket.error = repr(error)
+            self.counters["failed"] += 1
+        print(f"Bracket {bracket.group_id} on {bracket.symbol} failed: {error}")
+
+    def _protect(self, bracket):
+        try:
+            with instrumentation.span("bracket.protect"):
+                self._send_protection(bracket)
+            with self._lock:
+                self._mark_protected(bracket)
+        except Exception as error:
+            # The entry is filled but unprotected; surface it rather than retry blindly
+            self._fail(bracket, error)
+
+    def _mark_protected(self, bracket):
+        # Called with _lock held
+        bracket.status = PROTECTED
+        bracket.protected_at = time.perf_counter()
+        self.counters["protected"] += 1
+
+    def _entry_filled(self, bracket):
+        """
+        Moves a PENDING bracket on once its entry filled; returns whether the OCO pair must be sent.
+        """
+        with self._lock:
+            if bracket.status != PENDING:
+                return False
+            if bracket.mode == ORDER_LIST:
+                # The exchange placed the pending pair when the entry filled
+                self._mark_protected(bracket)
+                return False
+            bracket.status = PROTECTING
+            return True
+
+    @instrumentation.timed()
+    def place(self, symbol, side, quantity, entry_price, take_profit_price, stop_price, stop_limit_price=None):
+        """
+        Places a bracket and waits for the placement responses.
+
+        Args:
+            symbol (str): The trading pair symbol.
+            side (str): The entry side ('BUY' or 'SELL').
+            quantity (float): The quantity of the entry and of each protective leg.
+            entry_price (float): The limit price of the entry.
+            take_profit_price (float): The limit price of the take profit.
+            stop_price (float): The trigger price of the stop loss.
+            stop_limit_price (float): The limit price of the stop loss, stop_price by default.
+
+        Returns:
+            Bracket: The bracket, PROTECTED when the entry filled at once, PENDING while it rests.
+        """
+        bracket = Bracket(
+            next(self._group_ids),
+            self.mode,
+            symbol,
+            side,
+            quantity,
+            entry_price,
+            take_profit_price,
+            stop_price,
+            stop_price if stop_limit_price is None else stop_limit_price,
+        )
+        self.brackets[bracket.group_id] = bracket
+        self._register(bracket)
+        bracket.submitted_at = time.perf_counter()
+        bracket.sending = True
+        with self._lock:
+            self.counters["placed"] += 1
+        try:
+            send = self._send_order_list if self.mode == ORDER_LIST else self._send_entry
+            status = send(bracket)
+        except Exception as error:
+            self._fail(bracket, error)
+            return bracket
+        finally:
+            with self._lock:
+                bracket.sending = False
+                # A fill streamed before the response is handled here, in the placing thread
+                filled = bracket.fill_seen
+        if (status == "FILLED" or filled) and self._entry_filled(bracket):
+            self._protect(bracket)
+        return bracket
+
+    def place_many(self, specs):
+        """
+        Places independent brackets concurrently.
+
+        Args:
+            specs (list): Dictionaries of place() arguments.
+
+        Returns:
+            list: The brackets, in the order of specs.
+        """
+        return list(self.executor.map(lambda spec: self.place(**spec), specs))
+
+    def place_orders(self, orders):
+        """
+        Places independent orders concurrently over the pooled client.
+
+        Args:
+            orders (list): Order parameters, as taken by binance_connect.make_trade_with_params.
+
+        Returns:
+            list: The order response, or the exception raised, of each order in input order.
+        """
+        futures = [
+            self.executor.submit(self.api.make_trade_with_params, params, self.project_settings) for params in orders
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as error:
+                results.append(error)
+        return results
+
+    def on_order_update(self, order):
+        """
+        Advances the bracket of an order update, e.g. from the user data stream.
+
+        Args:
+            order (dict): The order in the REST order format.
+        """
+        found = self._by_client_order_id.get(order["clientOrderId"])
+        if found is None:
+            return
+        bracket, role = found
+        status = order["status"]
+        if role == "entry":
+            if status == "FILLED":
+                with self._lock:
+                    if bracket.sending:
+                        bracket.fill_seen = True
+                        return
+            if status == "FILLED" and self._entry_filled(bracket):
+                # Never send requests from the stream thread
+                self.executor.submit(self._protect, bracket)
+            elif status in ENTRY_ENDED:
+                with self._lock:
+                    if bracket.status == PENDING:
+                        bracket.status = CANCELED
+            return
+        if status == "FILLED":
+            with self._lock:
+                if bracket.status == PROTECTED:
+                    bracket.status = CLOSED
+                    bracket.exit = role
+                    self.counters["closed"] += 1
+
+    def _cancel_orders(self, bracket):
+        if bracket.order_list_id is not None:
+            self.api.cancel_order_list(bracket.symbol, bracket.order_list_id, self.project_settings)
+        elif bracket.entry_order_id is not None:
+            self.api.cancel_order(bracket.symbol, bracket.entry_order_id, self.project_settings)
+
+    def cancel(self, group_id):
+        """
+        Cancels the open orders of a bracket: its order list, or its entry before the OCO pair was sent.
+
+        Returns:
+            Bracket: The bracket, CANCELED.
+        """
+        bracket = self.brackets[group_id]
+        if bracket.status not in (PENDING, PROTECTED):
+            raise ValueError(f"Bracket {group_id} is {bracket.status} and has no open orders")
+        self._cancel_orders(bracket)
+        with self._lock:
+            bracket.status = CANCELED
+            self.counters["canceled"] += 1
+        return bracket
+
+    def replace(self, group_id, take_profit_price=None, stop_price=None, stop_limit_price=None):
+        """
+        Moves the take profit and stop loss of a bracket.
+
+        Order lists cannot be amended, so the protective pair (or, while the
+        entry rests, the whole OTOCO list) is canceled and sent again; between the
+        two requests the position has no resting stop.
+
+        Returns:
+            Bracket: The bracket with its new order list id.
+        """
+        bracket = self.brackets[group_id]
+        if bracket.status not in (PENDING, PROTECTED):
+            raise ValueError(f"Bracket {group_id} is {bracket.status} and cannot be replaced")
+        if take_profit_price is not None:
+            bracket.take_profit_price = take_profit_price
+        if stop_price is not None:
+            bracket.stop_price = stop_price
+            bracket.stop_limit_price = stop_price if stop_limit_price is None else stop_limit_price
+        elif stop_limit_price is not None:
+            bracket.stop_limit_price = stop_limit_price
+        if bracket.status == PENDING and bracket.mode == SEQUENTIAL:
+            # The pair is only sent once the entry fills, with the new prices
+            return bracket
+        with instrumentation.span("bracket.replace"):
+            self._cancel_orders(bracket)
+            # New client order ids, so updates of the canceled orders are ignored
+            self._register(bracket)
+            try:
+                if bracket.status == PENDING:
+                    status = self._send_order_list(bracket)
+                    if status == "FILLED":
+                        self._entry_filled(bracket)
+                else:
+                    self._send_protection(bracket)
+            except Exception as error:
+                self._fail(bracket, error)
+                return bracket
+        with self._lock:
+            self.counters["replaced"] += 1
+        return bracket
+
+    def get(self, group_id):
+        return self.brackets.get(group_id)
+
+    def metrics(self):
+        """
+        Returns the counters, the brackets per status and the time-to-protected percentiles in seconds.
+        """
+        statuses = collections.Counter(bracket.status for bracket in list(self.brackets.values()))
+        latencies = sorted(
+            latency for latency in (bracket.time_to_protected() for bracket in list(self.brackets.values()))
+            if latency is not None
+        )
+        with self._lock:
+            result = dict(self.counters)
+        result["statuses"] = dict(statuses)
+        if latencies:
+            result["protected_p50"] = latencies[len(latencies) // 2]
+            result["protected_p99"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        return result
+
+    def stop(self):
+        self.executor.shutdown(wait=True)
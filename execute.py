@@ -1,88 +1,239 @@
-import json
-import os
-import binance
+import asyncio
+from binance.error import ClientError
+import account_state
+import async_connect
+import binance_connect
+import instrumentation
+import market_stream
+import order_filters
+import settings
+import symbol_cache
 import strategy
+import trade_journal
 
-# Specify the path to the JSON settings file
-import_path = "settings.json"
-
-# Function to load project settings from a JSON file
-def get_settings(import_path):
-    # Check if the JSON settings file exists
-    if os.path.exists(import_path):
-        # Open and read the settings file
-        file = open(import_path, "r")
-        # Parse the JSON content into a Python dictionary
-        project_settings = json.load(file)
-        file.close()
-        # Return the loaded project settings
-        return project_settings
+# Point the market data endpoints at the configured base URL on every settings load
+settings.add_listener(binance_connect.configure)
+
+# Function to place a trade, refreshing the symbol cache on filter rejections
+@instrumentation.timed()
+def place_trade(params, project_settings):
+    try:
+        # Send prices and quantities as exact decimal strings on the symbol's tick and step grid
+        params = order_filters.format_params(params)
+        return binance_connect.make_trade_with_params(params, project_settings)
+    except ClientError as error:
+        # Stale tick/step sizes show up as filter failures, so reload them for the next trade
+        symbol_cache.get_cache().handle_order_error(error)
+        raise
+
+# Strategy traded by execute_analysis_and_trade: SOLUSDT on 1h candles, gated by the SOL/USDT and BUSD/USDT ratios
+DEFAULT_STRATEGY = {
+    "Symbol": "SOLUSDT",
+    "Timeframe": "1h",
+    "PercentageChange": 0.000001,
+    "NumberOfCandles": 3,
+    "QuoteSize": 0.1,
+    "ReferencePair": ["SOL", "USDT"],
+    "CurrentPair": ["BUSD", "USDT"],
+    "Chain": "bsc",
+}
+
+# Function to fill in the defaults of a strategy configuration
+def parse_strategy(entry):
+    """
+    Completes a strategy entry of the "Strategies" settings list with the DEFAULT_STRATEGY values.
+
+    Args:
+        entry (dict): The strategy configuration, at least its "Symbol".
+
+    Returns:
+        dict: The complete strategy configuration.
+    """
+    strategy_config = dict(DEFAULT_STRATEGY)
+    strategy_config.update(entry)
+    strategy_config["Symbol"] = strategy_config["Symbol"].upper()
+    return strategy_config
+
+# Function to run the ratio check and candle analysis of a strategy once its inputs are fetched
+def decide_trade(strategy_config, buy_or_sell, project_settings, account, prices, get_candles):
+    """
+    Checks the account, the token price ratios and the candles of a strategy and journals the decision.
+
+    Shared by execute_strategy and execute_strategy_async, which differ only in how
+    they fetch the account, the prices and the candles.
+
+    Args:
+        strategy_config (dict): The strategy configuration, see DEFAULT_STRATEGY.
+        buy_or_sell (str): 'buy' or 'sell'.
+        project_settings (dict): Project-specific settings.
+        account (dict): Account information.
+        prices (dict): USD prices keyed by token address, covering both pairs of the strategy.
+        get_candles (callable): Candle source, called as get_candles(symbol, timeframe, qty).
+
+    Returns:
+        callable: strategy.calculate_buy_params or calculate_sell_params when the trade
+        should be placed, None otherwise.
+    """
+    symbol = strategy_config["Symbol"]
+    timeframe = strategy_config["Timeframe"]
+    tokens = project_settings["Tokens"]
+
+    if not account["canTrade"]:
+        return None
+    print("Your account is ready to trade")
+
+    # Calculate the reference and current ratios using the trading strategy
+    reference_ratio, current_ratio = [
+        prices[tokens[name1]] / prices[tokens[name2]]
+        for name1, name2 in (strategy_config["ReferencePair"], strategy_config["CurrentPair"])
+    ]
+    print(f"Reference ratio: {reference_ratio}")
+    print(f"Current ratio: {current_ratio}")
+    check = strategy.check_ratio_relation(current_ratio, reference_ratio)
+
+    decision = {
+        "action": buy_or_sell,
+        "timeframe": timeframe,
+        "reference_ratio": reference_ratio,
+        "current_ratio": current_ratio,
+        "ratio_check": check,
+    }
+    if buy_or_sell == "buy" and not check:
+        trade_journal.record(trade_journal.DECISION, symbol, decision)
+        return None
+    if buy_or_sell == "buy":
+        print("Buying Time")
+        candle_color = "Green"
+        calculate_params = strategy.calculate_buy_params
+    elif buy_or_sell == "sell":
+        print("Selling Time")
+        candle_color = "Red"
+        calculate_params = strategy.calculate_sell_params
     else:
-        # If the file doesn't exist, return an ImportError
-        return ImportError
+        return None
+
+    # Analyze the candles of the symbol for consecutive moves, keeping them for the journal
+    candles = []
+    def journaled_candles(symbol, timeframe, qty):
+        candles[:] = get_candles(symbol, timeframe, qty)
+        return candles
+
+    analysis = strategy.determine_trade_event(
+        symbol,
+        timeframe,
+        strategy_config["PercentageChange"],
+        candle_color,
+        get_candles=journaled_candles,
+        number_of_candles=strategy_config["NumberOfCandles"],
+    )
+    decision.update(analysis=analysis, candles=candles)
+    trade_journal.record(trade_journal.DECISION, symbol, decision)
+    verb = "Buying" if buy_or_sell == "buy" else "Selling"
+    if not analysis:
+        print(f"Not {verb} {symbol}")
+        print(f"Reason: The analysis is {analysis}")
+        return None
+    print(f"{verb} {symbol}")
+    return calculate_params
+
+# Function to list the token addresses whose prices a strategy compares
+def strategy_addresses(strategy_config, project_settings):
+    tokens = project_settings["Tokens"]
+    names = list(strategy_config["ReferencePair"]) + list(strategy_config["CurrentPair"])
+    return list(dict.fromkeys(tokens[name] for name in names))
+
+# Function to run the analysis of one strategy and trade on it
+@instrumentation.timed()
+def execute_strategy(strategy_config, buy_or_sell, project_settings, account=None):
+    """
+    Runs the ratio check and the candle analysis of a strategy, then places its trade.
+
+    Args:
+        strategy_config (dict): The strategy configuration, see DEFAULT_STRATEGY.
+        buy_or_sell (str): 'buy' or 'sell'.
+        project_settings (dict): Project-specific settings.
+        account (dict): Account information, read from account_state when None.
+
+    Returns:
+        dict: The order response, or None when no trade was placed.
+    """
+    symbol = strategy_config["Symbol"]
+    if account is None:
+        # Served from memory when the user data stream runs, over REST otherwise
+        account = account_state.get_account(project_settings)
+    if not account["canTrade"]:
+        return None
+    prices = strategy.get_token_prices(strategy_addresses(strategy_config, project_settings), strategy_config["Chain"])
+
+    calculate_params = decide_trade(
+        strategy_config, buy_or_sell, project_settings, account, prices, market_stream.get_candles
+    )
+    if calculate_params is None:
+        return None
+    # Calculate the trade parameters and execute the trade
+    pair = symbol_cache.get_symbol(symbol)
+    params = calculate_params(symbol, pair, strategy_config["Timeframe"], quote_size=strategy_config["QuoteSize"])
+    response = place_trade(params, project_settings)
+    print(response)
+    return response
+
+# Function to run the analysis of one strategy and trade on it, issuing independent requests concurrently
+@instrumentation.timed()
+async def execute_strategy_async(strategy_config, buy_or_sell, project_settings, account=None):
+    """
+    Async execute_strategy: the account, token prices, symbol metadata and candles are requested at the same time.
+
+    The candles are fetched even when the ratio check then rejects a buy, trading
+    one candle lookup (served from memory while the stream runs) for one round-trip
+    less on every decision.
+
+    Args:
+        strategy_config (dict): The strategy configuration, see DEFAULT_STRATEGY.
+        buy_or_sell (str): 'buy' or 'sell'.
+        project_settings (dict): Project-specific settings.
+        account (dict): Account information, requested with the prices when None.
+
+    Returns:
+        dict: The order response, or None when no trade was placed.
+    """
+    symbol = strategy_config["Symbol"]
+    timeframe = strategy_config["Timeframe"]
+    requests = [
+        async_connect.get_token_prices(strategy_addresses(strategy_config, project_settings), strategy_config["Chain"]),
+        async_connect.get_symbol(symbol),
+        async_connect.run_blocking(market_stream.get_candles, symbol, timeframe, strategy_config["NumberOfCandles"]),
+    ]
+    if account is None:
+        requests.append(async_connect.get_account(project_settings))
+    prices, pair, fetched_candles, *fetched_account = await asyncio.gather(*requests)
+    if fetched_account:
+        account = fetched_account[0]
+
+    # Analyze the already fetched candles instead of requesting them again
+    get_candles = lambda symbol, timeframe, qty: fetched_candles[-qty:]
+    calculate_params = decide_trade(strategy_config, buy_or_sell, project_settings, account, prices, get_candles)
+    if calculate_params is None:
+        return None
+    # Order book and filter lookups are in memory, the price comes from the open candle of the stream
+    params = await async_connect.run_blocking(
+        calculate_params, symbol, pair, timeframe, quote_size=strategy_config["QuoteSize"]
+    )
+    response = await async_connect.run_blocking(place_trade, params, project_settings)
+    print(response)
+    return response
 
 # Function to execute the trading analysis and trade based on a specified action
+@instrumentation.timed()
 def execute_analysis_and_trade(buy_or_sell):
-    # Load project settings from the JSON file
-    project_settings = get_settings(import_path)
-
-    # Extract API key and secret key from project settings
-    api_key = project_settings["BinanceKeys"]["API_KEY"]
-    secret_key = project_settings["BinanceKeys"]["SECRET_KEY"]
-
-    # Define specific tokens from the project settings
-    SOL = project_settings["Tokens"]["SOL"]
-    USDT = project_settings["Tokens"]["USDT"]
-    BUSD = project_settings["Tokens"]["BUSD"]
-
-    # Query the Binance account using API credentials
-    account = binance_connect.query_account(api_key, secret_key)
-    if account["canTrade"]:
-        print("Your account is ready to trade")
-
-        # Calculate the reference and current ratios using the trading strategy
-        reference_ratio = strategy.check_pair_relation(SOL, USDT, "bsc")
-        current_ratio = strategy.check_pair_relation(BUSD, USDT, "bsc")
-
-        # Print the reference and current ratios
-        print(f"Reference ratio: {reference_ratio}")
-        print(f"Current ratio: {current_ratio}")
-
-        # Calculate the difference between the ratios
-        check = strategy.check_ratio_relation(current_ratio, reference_ratio)
-
-        # Query a list of quote assets related to "USDT"
-        asset_list = binance_connect.query_quote_asset_list("USDT")
-        # Identify a specific trading pair (e.g., SOL/USDT)
-        sol_pair = asset_list.loc[asset_list["symbol"] == "SOLUSDT"]
-        symbol = sol_pair["symbol"].values[0]
-
-        if check and buy_or_sell == "buy":
-            print("Buying Time")
-            # Analyze trading symbols for potential buying opportunities
-            analysis = strategy.analyze_symbols(sol_pair, "1h", 0.000001, "buy")
-            if analysis:
-                print("Buying SOL")
-                # Calculate buy trade parameters
-                params = strategy.calculate_buy_params(symbol, sol_pair, "1h")
-                # Execute the buy trade
-                response = binance_connect.make_trade_with_params(params, project_settings)
-                print(response)
-            else:
-                print("Not Buying SOL")
-                print(f"Reason: The analysis is {analysis}")
-        elif buy_or_sell == "sell":
-            print("Selling Time")
-            # Analyze trading symbols for potential selling opportunities
-            analysis = strategy.analyze_symbols(sol_pair, "1h", 0.000001, "sell")
-            if analysis:
-                print("Selling SOL")
-                # Calculate sell trade parameters
-                params = strategy.calculate_sell_params(symbol, sol_pair, "1h")
-                # Execute the sell trade
-                response = binance_connect.make_trade_with_params(params, project_settings)
-                print(response)
-            else:
-                print("Not Selling SOL")
-                print(f"Reason: The analysis is {analysis}")
+    # Take one settings snapshot for the whole trade, a reload mid-trade does not change it
+    project_settings = settings.current()
+
+    return execute_strategy(DEFAULT_STRATEGY, buy_or_sell, project_settings)
+
+# Function to execute the trading analysis and trade, issuing independent requests concurrently
+@instrumentation.timed()
+async def execute_analysis_and_trade_async(buy_or_sell):
+    # Take one settings snapshot for the whole trade, a reload mid-trade does not change it
+    project_settings = settings.current()
 
+    return await execute_strategy_async(DEFAULT_STRATEGY, buy_or_sell, project_settings)
@@ -0,0 +1,475 @@
+import math
+import numpy
+
+# Class computing an exponential moving average one value at a time
+class EMA:
+    """
+    Exponential moving average seeded with the simple average of the first period values.
+
+    Args:
+        period (int): The number of values the average spans.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.count = 0
+        self.total = 0.0
+        self.value = math.nan
+
+    def update(self, value):
+        """
+        Adds one value and returns the current average, NaN until period values were seen.
+        """
+        self.count += 1
+        if self.count < self.period:
+            self.total += value
+        elif self.count == self.period:
+            self.total += value
+            self.value = self.total / self.period
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+    def update_candle(self, candle):
+        return self.update(candle["close"])
+
+    def batch(self, columns):
+        return ema(columns["close"], self.period)
+
+# Class computing a simple moving average one value at a time
+class SMA:
+    """
+    Simple moving average over the last period values, kept as a running sum.
+
+    Args:
+        period (int): The number of values averaged.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.window = [0.0] * period
+        self.count = 0
+        self.total = 0.0
+        self.value = math.nan
+
+    def update(self, value):
+        """
+        Adds one value and returns the current average, NaN until period values were seen.
+        """
+        position = self.count % self.period
+        self.total += value - self.window[position]
+        self.window[position] = value
+        self.count += 1
+        if self.count >= self.period:
+            self.value = self.total / self.period
+        return self.value
+
+    def update_candle(self, candle):
+        return self.update(candle["close"])
+
+    def batch(self, columns):
+        return sma(columns["close"], self.period)
+
+# Class computing Wilder's relative strength index one close at a time
+class RSI:
+    """
+    Relative strength index with Wilder smoothing of the average gain and loss.
+
+    Args:
+        period (int): The smoothing period.
+    """
+
+    def __init__(self, period=14):
+        self.period = period
+        self.count = 0
+        self.previous = math.nan
+        self.average_gain = 0.0
+        self.average_loss = 0.0
+        self.value = math.nan
+
+    def update(self, close):
+        """
+        Adds one close and returns the current RSI, NaN until period changes were seen.
+        """
+        self.count += 1
+        change = close - self.previous
+        self.previous = close
+        if self.count == 1:
+            return self.value
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        self.average_gain, self.average_loss = wilder_step(
+            self.average_gain, self.average_loss, gain, loss, self.count - 1, self.period
+        )
+        if self.count > self.period:
+            self.value = rsi_value(self.average_gain, self.average_loss)
+        return self.value
+
+    def update_candle(self, candle):
+        return self.update(candle["close"])
+
+    def batch(self, columns):
+        return rsi(columns["close"], self.period)
+
+# Class computing Wilder's average true range one candle at a time
+class ATR:
+    """
+    Average true range with Wilder smoothing.
+
+    Args:
+        period (int): The smoothing period.
+    """
+
+    def __init__(self, period=14):
+        self.period = period
+        self.count = 0
+        self.previous_close = math.nan
+        self.average = 0.0
+        self.value = math.nan
+
+    def update(self, high, low, close):
+        """
+        Adds one candle and returns the current ATR, NaN until period candles were seen.
+        """
+        self.count += 1
+        if self.count == 1:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.previous_close), abs(low - self.previous_close))
+        self.previous_close = close
+        self.average, _ = wilder_step(self.average, 0.0, true_range, 0.0, self.count, self.period)
+        if self.count >= self.period:
+            self.value = self.average
+        return self.value
+
+    def update_candle(self, candle):
+        return self.update(candle["high"], candle["low"], candle["close"])
+
+    def batch(self, columns):
+        return atr(columns["high"], columns["low"], columns["close"], self.period)
+
+# Class computing the volume weighted average price one candle at a time
+class VWAP:
+    """
+    Volume weighted average of the typical price (high + low + close) / 3.
+
+    Args:
+        period (int): The number of candles in a rolling window, None for a cumulative VWAP.
+    """
+
+    def __init__(self, period=None):
+        self.period = period
+        self.prices = SMA(period) if period else None
+        self.volumes = SMA(period) if period else None
+        self.price_volume = 0.0
+        self.volume = 0.0
+        self.value = math.nan
+
+    def update(self, high, low, close, volume):
+        """
+        Adds one candle and returns the current VWAP, NaN while no volume was traded.
+        """
+        price_volume = (high + low + close) / 3.0 * volume
+        if self.period:
+            self.prices.update(price_volume)
+            self.volumes.update(volume)
+            self.price_volume = self.prices.total
+            self.volume = self.volumes.total
+        else:
+            self.price_volume += price_volume
+            self.volume += volume
+        self.value = self.price_volume / self.volume if self.volume > 0 else math.nan
+        return self.value
+
+    def update_candle(self, candle):
+        return self.update(candle["high"], candle["low"], candle["close"], candle["volume"])
+
+    def batch(self, columns):
+        return vwap(columns["high"], columns["low"], columns["close"], columns["volume"], self.period)
+
+# Class counting the consecutive candles of one color that moved at least a percentage
+class ConsecutiveCounter:
+    """
+    Length of the current run of qualifying candles, the rule of determine_trade_event.
+
+    A green candle qualifies when it closes above its open by at least
+    percentage_change; a red candle when it closes at or below its open and
+    dropped by at least percentage_change.
+
+    Args:
+        percentage_change (float): The minimum change of a qualifying candle.
+        candle_color (str): 'Green' or 'Red'.
+    """
+
+    def __init__(self, percentage_change, candle_color):
+        self.percentage_change = percentage_change
+        self.candle_color = candle_color
+        self.value = 0
+
+    def update(self, open_price, close_price):
+        """
+        Adds one candle and returns the number of consecutive qualifying candles ending with it.
+        """
+        if candle_qualifies(open_price, close_price, self.percentage_change, self.candle_color):
+            self.value += 1
+        else:
+            self.value = 0
+        return self.value
+
+    def update_candle(self, candle):
+        return self.update(candle["open"], candle["close"])
+
+    def batch(self, columns):
+        return consecutive_counts(columns["open"], columns["close"], self.percentage_change, self.candle_color)
+
+# Function to check a candle against the consecutive-direction rule
+def candle_qualifies(open_price, close_price, percentage_change, candle_color):
+    change = (close_price - open_price) / open_price
+    if candle_color == "Green":
+        return open_price < close_price and change >= percentage_change
+    return open_price >= close_price and -change >= percentage_change
+
+# Function to advance Wilder's smoothing by one value
+def wilder_step(first, second, first_value, second_value, count, period):
+    """
+    Averages the first period values, then smooths as (average * (period - 1) + value) / period.
+
+    Both the incremental classes and the batch functions call this, so both
+    modes produce bit-identical values.
+    """
+    if count < period:
+        return first + first_value, second + second_value
+    if count == period:
+        return (first + first_value) / period, (second + second_value) / period
+    return (first * (period - 1) + first_value) / period, (second * (period - 1) + second_value) / period
+
+# Function to compute the RSI from the average gain and loss
+def rsi_value(average_gain, average_loss):
+    if average_loss == 0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + average_gain / average_loss)
+
+# Function to compute the exponential moving average of a series
+def ema(values, period):
+    """
+    Batch counterpart of EMA, producing the same value at every position.
+
+    Each average depends on the previous one, so this is a Python loop over the
+    values, kept so the results are bit-identical to EMA; it is not vectorized.
+
+    Args:
+        values (numpy.ndarray): The input series.
+        period (int): The number of values the average spans.
+
+    Returns:
+        numpy.ndarray: The average after each value, NaN during the warm-up.
+    """
+    values = numpy.asarray(values, dtype=numpy.float64)
+    result = numpy.full(len(values), numpy.nan)
+    if len(values) < period:
+        return result
+    # The seed is summed left to right like the incremental running total
+    total = 0.0
+    for value in values[:period].tolist():
+        total += value
+    average = total / period
+    alpha = 2.0 / (period + 1)
+    averages = [average]
+    for value in values[period:].tolist():
+        average += alpha * (value - average)
+        averages.append(average)
+    result[period - 1 :] = averages
+    return result
+
+# Function to compute the simple moving average of a series
+def sma(values, period):
+    """
+    Batch counterpart of SMA, producing the same value at every position.
+
+    Vectorized: the window sums are the running sums of the incremental class, a
+    numpy.cumsum of the added values minus the values leaving the window.
+
+    Args:
+        values (numpy.ndarray): The input series.
+        period (int): The number of values averaged.
+
+    Returns:
+        numpy.ndarray: The average ending at each value, NaN during the warm-up.
+    """
+    values = numpy.asarray(values, dtype=numpy.float64)
+    result = numpy.full(len(values), numpy.nan)
+    if len(values) < period:
+        return result
+    result[period - 1 :] = running_sums(values, period)[period - 1 :] / period
+    return result
+
+# Function to compute Wilder's RSI of a close series
+def rsi(closes, period=14):
+    """
+    Batch counterpart of RSI, producing the same value at every position.
+
+    The gains and losses are computed with numpy, but Wilder smoothing is recursive,
+    so the averages are a Python loop kept for bit-identical results with RSI.
+
+    Args:
+        closes (numpy.ndarray): Close prices.
+        period (int): The smoothing period.
+
+    Returns:
+        numpy.ndarray: The RSI at each close, NaN during the warm-up.
+    """
+    closes = numpy.asarray(closes, dtype=numpy.float64)
+    result = numpy.full(len(closes), numpy.nan)
+    changes = numpy.diff(closes)
+    gains = numpy.where(changes > 0, changes, 0.0).tolist()
+    losses = numpy.where(changes < 0, -changes, 0.0).tolist()
+    average_gain = average_loss = 0.0
+    for index in range(len(gains)):
+        average_gain, average_loss = wilder_step(average_gain, average_loss, gains[index], losses[index], index + 1, period)
+        if index + 1 >= period:
+            result[index + 1] = rsi_value(average_gain, average_loss)
+    return result
+
+# Function to compute Wilder's ATR of a candle series
+def atr(highs, lows, closes, period=14):
+    """
+    Batch counterpart of ATR, producing the same value at every position.
+
+    The true ranges are computed with numpy, but Wilder smoothing is recursive,
+    so the averages are a Python loop kept for bit-identical results with ATR.
+
+    Args:
+        highs (numpy.ndarray): High prices.
+        lows (numpy.ndarray): Low prices.
+        closes (numpy.ndarray): Close prices.
+        period (int): The smoothing period.
+
+    Returns:
+        numpy.ndarray: The ATR at each candle, NaN during the warm-up.
+    """
+    highs = numpy.asarray(highs, dtype=numpy.float64)
+    lows = numpy.asarray(lows, dtype=numpy.float64)
+    closes = numpy.asarray(closes, dtype=numpy.float64)
+    result = numpy.full(len(closes), numpy.nan)
+    if len(closes) == 0:
+        return result
+    true_ranges = highs - lows
+    previous_closes = closes[:-1]
+    true_ranges[1:] = numpy.maximum(
+        true_ranges[1:], numpy.maximum(numpy.abs(highs[1:] - previous_closes), numpy.abs(lows[1:] - previous_closes))
+    )
+    average = 0.0
+    for index, true_range in enumerate(true_ranges.tolist()):
+        average, _ = wilder_step(average, 0.0, true_range, 0.0, index + 1, period)
+        if index + 1 >= period:
+            result[index] = average
+    return result
+
+# Function to compute the VWAP of a candle series
+def vwap(highs, lows, closes, volumes, period=None):
+    """
+    Batch counterpart of VWAP, producing the same value at every position.
+
+    Vectorized with numpy.cumsum, see cumulative_sums and running_sums.
+
+    Args:
+        highs (numpy.ndarray): High prices.
+        lows (numpy.ndarray): Low prices.
+        closes (numpy.ndarray): Close prices.
+        volumes (numpy.ndarray): Base asset volumes.
+        period (int): The number of candles in a rolling window, None for a cumulative VWAP.
+
+    Returns:
+        numpy.ndarray: The VWAP at each candle, NaN while no volume was traded.
+    """
+    volumes = numpy.asarray(volumes, dtype=numpy.float64)
+    price_volumes = (numpy.asarray(highs) + numpy.asarray(lows) + numpy.asarray(closes)) / 3.0 * volumes
+    if period:
+        price_volume_totals = running_sums(price_volumes, period)
+        volume_totals = running_sums(volumes, period)
+    else:
+        price_volume_totals = cumulative_sums(price_volumes)
+        volume_totals = cumulative_sums(volumes)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        return numpy.where(volume_totals > 0, price_volume_totals / volume_totals, numpy.nan)
+
+# Function to sum a series left to right, keeping every partial sum
+def cumulative_sums(values):
+    # numpy.cumsum adds strictly left to right, the order of the incremental running total
+    return numpy.cumsum(values)
+
+# Function to compute the running window sums kept by SMA
+def running_sums(values, period):
+    # The incremental total adds each value minus the one leaving the window; a windowed
+    # numpy.convolve would be exact per window but no longer bit-identical to SMA
+    leaving = numpy.zeros(len(values))
+    leaving[period:] = values[:-period]
+    return numpy.cumsum(values - leaving)
+
+# Function to count the consecutive qualifying candles ending at each candle
+def consecutive_counts(opens, closes, percentage_change, candle_color):
+    """
+    Batch counterpart of ConsecutiveCounter.
+
+    Args:
+        opens (numpy.ndarray): Open prices.
+        closes (numpy.ndarray): Close prices.
+        percentage_change (float): The minimum change of a qualifying candle.
+        candle_color (str): 'Green' or 'Red'.
+
+    Returns:
+        numpy.ndarray: The length of the run of qualifying candles ending at each candle.
+    """
+    opens = numpy.asarray(opens, dtype=numpy.float64)
+    closes = numpy.asarray(closes, dtype=numpy.float64)
+    changes = (closes - opens) / opens
+    if candle_color == "Green":
+        qualifies = (opens < closes) & (changes >= percentage_change)
+    else:
+        qualifies = (opens >= closes) & (-changes >= percentage_change)
+
+    # Each count is the distance to the last candle that broke the run
+    positions = numpy.arange(1, len(qualifies) + 1)
+    last_break = numpy.maximum.accumulate(numpy.where(qualifies, 0, positions))
+    return positions - last_break
+
+# Class updating several indicators from the same candles
+class IndicatorSet:
+    """
+    Named indicators fed one closed candle at a time, or computed over history in batch.
+
+    Args:
+        indicators (dict): Indicator objects keyed by name, e.g. {"ema_20": EMA(20)}.
+    """
+
+    def __init__(self, indicators):
+        self.indicators = indicators
+        self.last_open_time = None
+
+    def update(self, candle):
+        """
+        Feeds one closed candle, in the get_candlestick_data format, to every indicator.
+
+        Candles that are not newer than the last one are ignored, so the set can
+        be fed again from a backfill.
+
+        Returns:
+            dict: The current value of every indicator.
+        """
+        if self.last_open_time is not None and candle["time"] <= self.last_open_time:
+            return self.values()
+        self.last_open_time = candle["time"]
+        return {name: indicator.update_candle(candle) for name, indicator in self.indicators.items()}
+
+    def values(self):
+        return {name: indicator.value for name, indicator in self.indicators.items()}
+
+    def batch(self, columns):
+        """
+        Computes every indicator over candle columns, e.g. from backtest.load_klines.
+
+        Returns:
+            dict: One array per indicator name, equal to the values update would produce.
+        """
+        return {name: indicator.batch(columns) for name, indicator in self.indicators.items()}
@@ -0,0 +1,314 @@
+import collections
+import contextvars
+import functools
+import inspect
+import itertools
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Whether spans are recorded; INSTRUMENTATION=0 also leaves decorated functions unwrapped
+ENABLED = os.getenv("INSTRUMENTATION", "1") != "0"
+
+# Upper bounds in seconds of the duration histogram buckets
+BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# Number of finished spans kept for inspection
+RECENT_SPANS = 2000
+
+# Prefix of the Prometheus metric names
+METRIC_PREFIX = "bot"
+
+# (trace id, span id) of the span running in the current context
+_current = contextvars.ContextVar("instrumentation_span", default=None)
+
+# Span and trace ids are counters; the random prefix keeps trace ids unique across processes
+_span_ids = itertools.count(1)
+_trace_ids = itertools.count(1)
+_TRACE_PREFIX = os.urandom(4).hex()
+
+# Class counting durations in fixed buckets
+class Histogram:
+    """
+    Duration histogram with the BUCKETS bounds, plus a count of failed calls.
+    """
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, error=False):
+        index = bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            self.count += 1
+            if error:
+                self.errors += 1
+
+    def quantile(self, fraction):
+        """
+        Returns the upper bound of the bucket holding the given fraction of the observations.
+        """
+        with self._lock:
+            target = fraction * self.count
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= target and count:
+                    return self.bounds[index] if index < len(self.bounds) else float("inf")
+        return None
+
+# Histograms keyed by stage name, and gauges read when the metrics are rendered
+_histograms = {}
+_gauges = {}
+_registry_lock = threading.Lock()
+_recent = collections.deque(maxlen=RECENT_SPANS)
+
+# Function to get the histogram of a stage
+def histogram(name):
+    found = _histograms.get(name)
+    if found is None:
+        with _registry_lock:
+            found = _histograms.setdefault(name, Histogram())
+    return found
+
+# Function to record a duration measured elsewhere
+def observe(name, seconds, error=False):
+    if ENABLED:
+        histogram(name).observe(seconds, error)
+
+# Class timing one stage and linking it to its trace
+class Span:
+    """
+    Context manager timing a stage with time.perf_counter.
+
+    The span becomes the parent of the spans opened inside it, so every stage
+    run for one webhook shares the webhook's trace id.
+
+    Args:
+        name (str): The stage name, used as the histogram label.
+        new_trace (bool): Starts a new trace instead of joining the current one.
+    """
+
+    __slots__ = ("name", "new_trace", "trace_id", "span_id", "parent_id", "start", "token")
+
+    def __init__(self, name, new_trace=False):
+        self.name = name
+        self.new_trace = new_trace
+
+    def __enter__(self):
+        parent = _current.get()
+        if parent is None or self.new_trace:
+            self.trace_id = f"{_TRACE_PREFIX}{next(_trace_ids):08x}"
+            self.parent_id = None
+        else:
+            self.trace_id, self.parent_id = parent
+        self.span_id = next(_span_ids)
+        self.token = _current.set((self.trace_id, self.span_id))
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        duration = time.perf_counter() - self.start
+        _current.reset(self.token)
+        histogram(self.name).observe(duration, exc_type is not None)
+        _recent.append((self.trace_id, self.span_id, self.parent_id, self.name, self.start, duration, exc_type is not None))
+        return False
+
+# Class standing in for spans while instrumentation is disabled
+class _NoopSpan:
+    __slots__ = ()
+    trace_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+# Function to open a span joining the current trace
+def span(name):
+    """
+    Returns a context manager timing the stage name, a shared no-op when disabled.
+    """
+    return Span(name) if ENABLED else _NOOP_SPAN
+
+# Function to open a span starting a new trace
+def trace(name):
+    """
+    Returns a context manager timing the stage name as the root of a new trace.
+    """
+    return Span(name, new_trace=True) if ENABLED else _NOOP_SPAN
+
+# Function to time every call of a function
+def timed(name=None):
+    """
+    Decorator recording each call of the function as a span.
+
+    When instrumentation is disabled at import time the function is returned
+    unwrapped and costs nothing.
+
+    Args:
+        name (str): The stage name, the function's module and name by default.
+    """
+
+    def decorator(function):
+        if not ENABLED:
+            return function
+        stage = name or f"{function.__module__}.{function.__name__}"
+
+        # Coroutine functions are timed until they finish, not until they return a coroutine
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                if not ENABLED:
+                    return await function(*args, **kwargs)
+                with Span(stage):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+            with Span(stage):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+# Function to capture the current span, e.g. before handing work to another thread
+def current_context():
+    return _current.get()
+
+# Class making a captured span the parent of the spans of another thread
+class AttachedContext:
+    """
+    Context manager restoring a context returned by current_context.
+    """
+
+    __slots__ = ("context", "token")
+
+    def __init__(self, context):
+        self.context = context
+
+    def __enter__(self):
+        self.token = _current.set(self.context)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        _current.reset(self.token)
+        return False
+
+# Function to continue a captured trace in the current thread
+def attach(context):
+    return AttachedContext(context)
+
+# Function to turn recording on or off at runtime
+def set_enabled(enabled):
+    """
+    Enables or disables recording; functions left unwrapped at import stay unwrapped.
+    """
+    global ENABLED
+    ENABLED = enabled
+
+# Function to register a value exported as a gauge
+def register_gauge(name, read):
+    """
+    Exports read() as the gauge METRIC_PREFIX_name each time the metrics are rendered.
+    """
+    with _registry_lock:
+        _gauges[name] = read
+
+# Function to list the recently finished spans
+def recent_spans(trace_id=None):
+    """
+    Returns the recently finished spans, oldest first, optionally of one trace.
+
+    Returns:
+        list: Dictionaries with the trace, span and parent ids, the stage name,
+        the perf_counter start, the duration in seconds and whether it failed.
+    """
+    return [
+        {"trace_id": span_trace_id, "span_id": span_id, "parent_id": parent_id, "name": name, "start": start, "duration": duration, "error": error}
+        for span_trace_id, span_id, parent_id, name, start, duration, error in list(_recent)
+        if trace_id is None or span_trace_id == trace_id
+    ]
+
+# Function to summarize every stage
+def snapshot():
+    """
+    Returns the count, total and bucketed p50/p99 duration and error count of every stage.
+    """
+    with _registry_lock:
+        stages = sorted(_histograms.items())
+    result = {}
+    for name, stage in stages:
+        result[name] = {
+            "count": stage.count,
+            "sum": stage.sum,
+            "p50": stage.quantile(0.5),
+            "p99": stage.quantile(0.99),
+            "errors": stage.errors,
+        }
+    return result
+
+# Function to escape a Prometheus label value
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# Function to render every metric in the Prometheus text format
+def render_prometheus():
+    """
+    Renders the stage histograms, error counters and gauges in the Prometheus text exposition format.
+    """
+    duration_name = f"{METRIC_PREFIX}_stage_duration_seconds"
+    errors_name = f"{METRIC_PREFIX}_stage_errors_total"
+    lines = [
+        f"# HELP {duration_name} Duration of the instrumented stages.",
+        f"# TYPE {duration_name} histogram",
+    ]
+    with _registry_lock:
+        stages = sorted(_histograms.items())
+        gauges = sorted(_gauges.items())
+    for name, stage in stages:
+        label = _label(name)
+        with stage._lock:
+            counts = list(stage.counts)
+            total = stage.sum
+            count = stage.count
+        cumulative = 0
+        for bound, bucket_count in zip(stage.bounds, counts):
+            cumulative += bucket_count
+            lines.append(f'{duration_name}_bucket{{stage="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'{duration_name}_bucket{{stage="{label}",le="+Inf"}} {count}')
+        lines.append(f'{duration_name}_sum{{stage="{label}"}} {total}')
+        lines.append(f'{duration_name}_count{{stage="{label}"}} {count}')
+    lines.append(f"# HELP {errors_name} Instrumented stages that raised.")
+    lines.append(f"# TYPE {errors_name} counter")
+    for name, stage in stages:
+        lines.append(f'{errors_name}{{stage="{_label(name)}"}} {stage.errors}')
+    for name, read in gauges:
+        lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+        lines.append(f"{METRIC_PREFIX}_{name} {read()}")
+    return "\n".join(lines) + "\n"
+
+# Function to drop every recorded metric
+def reset():
+    with _registry_lock:
+        _histograms.clear()
+    _recent.clear()
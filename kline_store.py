@@ -0,0 +1,158 @@
+import argparse
+import os
+import time
+import numpy
+import pandas
+import binance_connect
+import market_stream
+
+# Default root directory of the kline store
+DEFAULT_ROOT = "klines"
+
+# Maximum number of candles returned by one klines request
+KLINES_LIMIT = 1000
+
+# On-disk type of each kline column
+FIELD_DTYPES = {
+    field: numpy.dtype(numpy.int64) if field in market_stream.INTEGER_FIELDS else numpy.dtype(numpy.float64)
+    for field in market_stream.KLINE_FIELDS
+}
+
+# Function to get the path of a column file
+def column_path(directory, field):
+    return os.path.join(directory, f"{field}.bin")
+
+# Function to count the complete rows of a dataset directory
+def stored_rows(directory):
+    """
+    Returns the number of rows present in every column file.
+
+    An interrupted append can leave some columns one write ahead; those extra
+    rows are ignored by readers and truncated by the next append.
+    """
+    rows = None
+    for field, dtype in FIELD_DTYPES.items():
+        path = column_path(directory, field)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        field_rows = size // dtype.itemsize
+        rows = field_rows if rows is None else min(rows, field_rows)
+    return rows
+
+# Function to open a dataset directory as memory-mapped columns
+def read_directory(directory):
+    """
+    Opens every column of a dataset read-only without copying it.
+
+    Args:
+        directory (str): The dataset directory.
+
+    Returns:
+        dict: One NumPy array per KLINE_FIELDS key, oldest candle first.
+    """
+    rows = stored_rows(directory)
+    columns = {}
+    for field, dtype in FIELD_DTYPES.items():
+        if rows == 0:
+            columns[field] = numpy.empty(0, dtype=dtype)
+        else:
+            columns[field] = numpy.memmap(column_path(directory, field), dtype=dtype, mode="r", shape=(rows,))
+    return columns
+
+# Function to append rows to a dataset directory
+def append_directory(directory, columns):
+    """
+    Appends kline columns to a dataset directory.
+
+    Args:
+        directory (str): The dataset directory.
+        columns (dict): One array per KLINE_FIELDS key, all of the same length.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rows = stored_rows(directory)
+    for field, dtype in FIELD_DTYPES.items():
+        with open(column_path(directory, field), "ab") as file:
+            # Drop rows left over by an interrupted append before writing new ones
+            file.truncate(rows * dtype.itemsize)
+            file.write(numpy.ascontiguousarray(columns[field], dtype=dtype).tobytes())
+
+# Class storing candles per symbol and timeframe in append-only column files
+class KlineStore:
+    """
+    On-disk columnar candle store.
+
+    Each (symbol, timeframe) is a directory holding one raw binary file per kline
+    field, so datasets can be appended to and memory-mapped by readers.
+
+    Args:
+        root (str): The root directory of the store.
+        fetch (callable): Fetches raw klines, called as fetch(symbol, interval, startTime, limit).
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, fetch=None):
+        self.root = root
+        self.fetch = fetch or (
+            lambda symbol, interval, startTime, limit: binance_connect.get_client().klines(
+                symbol=symbol, interval=interval, startTime=startTime, limit=limit
+            )
+        )
+
+    def directory(self, symbol, timeframe):
+        return os.path.join(self.root, symbol.upper(), timeframe)
+
+    def read(self, symbol, timeframe):
+        """
+        Returns the stored candles of a pair as memory-mapped columns.
+        """
+        return read_directory(self.directory(symbol, timeframe))
+
+    def last_close_time(self, symbol, timeframe):
+        directory = self.directory(symbol, timeframe)
+        if not os.path.isdir(directory) or stored_rows(directory) == 0:
+            return None
+        return int(self.read(symbol, timeframe)["close_time"][-1])
+
+    def sync(self, symbol, timeframe, since_ms=0):
+        """
+        Appends the closed candles newer than the last stored one.
+
+        Args:
+            symbol (str): The trading symbol (e.g., 'SOLUSDT').
+            timeframe (str): The candlestick timeframe (e.g., '1m').
+            since_ms (int): Start time in milliseconds used when the pair is not stored yet.
+
+        Returns:
+            int: The number of candles appended.
+        """
+        directory = self.directory(symbol, timeframe)
+        last_close_time = self.last_close_time(symbol, timeframe)
+        start_time = since_ms if last_close_time is None else last_close_time + 1
+        appended = 0
+
+        while True:
+            raw_data = self.fetch(symbol.upper(), timeframe, start_time, KLINES_LIMIT)
+            if not raw_data:
+                break
+            columns = binance_connect.parse_kline_columns(raw_data)
+            # The newest candle is still open until its close time has passed
+            closed = columns["close_time"] < int(time.time() * 1000)
+            columns = {field: values[closed] for field, values in columns.items()}
+            if len(columns["time"]):
+                append_directory(directory, columns)
+                appended += len(columns["time"])
+            if len(raw_data) < KLINES_LIMIT or not closed.all():
+                break
+            start_time = int(columns["close_time"][-1]) + 1
+
+        return appended
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync klines into the local columnar store")
+    parser.add_argument("symbol")
+    parser.add_argument("timeframe")
+    parser.add_argument("--since", default="2017-01-01", help="start date used when the pair is not stored yet")
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    args = parser.parse_args()
+
+    since_ms = int(pandas.Timestamp(args.since, tz="UTC").timestamp() * 1000)
+    appended = KlineStore(args.root).sync(args.symbol, args.timeframe, since_ms)
+    print(f"Appended {appended} candles to {KlineStore(args.root).directory(args.symbol, args.timeframe)}")
@@ -0,0 +1,420 @@
+import json
+import threading
+import time
+import numpy
+from binance.websocket.spot.websocket_stream import SpotWebsocketStreamClient
+import binance_connect
+
+# Default Binance Spot market data websocket endpoint
+DEFAULT_STREAM_URL = "wss://stream.binance.com:9443"
+
+# Default number of closed candles kept per (symbol, timeframe)
+DEFAULT_CAPACITY = 500
+
+# Seconds a streamed open candle is trusted for the last price; Binance pushes one every 2 seconds
+DEFAULT_LIVE_MAX_AGE = 10.0
+
+# Column order of the ring buffer, matching the keys of get_candlestick_data
+KLINE_FIELDS = binance_connect.KLINE_FIELDS
+INTEGER_FIELDS = binance_connect.INTEGER_FIELDS
+TIME_COLUMN = KLINE_FIELDS.index("time")
+CLOSE_TIME_COLUMN = KLINE_FIELDS.index("close_time")
+
+# Length of each timeframe in milliseconds, used to detect missing candles
+TIMEFRAME_MS = {
+    "1s": 1000,
+    "1m": 60000,
+    "3m": 180000,
+    "5m": 300000,
+    "15m": 900000,
+    "30m": 1800000,
+    "1h": 3600000,
+    "2h": 7200000,
+    "4h": 14400000,
+    "6h": 21600000,
+    "8h": 28800000,
+    "12h": 43200000,
+    "1d": 86400000,
+    "3d": 259200000,
+    "1w": 604800000,
+}
+
+# Function to convert a row of the ring buffer back into a candle dictionary
+def row_to_candle(row):
+    candle = dict(zip(KLINE_FIELDS, row.tolist()))
+    for field in INTEGER_FIELDS:
+        candle[field] = int(candle[field])
+    return candle
+
+# Function to split ring buffer rows into candle columns
+def array_to_columns(rows):
+    columns = {}
+    for position, field in enumerate(KLINE_FIELDS):
+        columns[field] = rows[:, position].astype(numpy.int64) if field in INTEGER_FIELDS else rows[:, position]
+    columns["is_green"] = columns["open"] < columns["close"]
+    return columns
+
+# Class storing the last N closed candles of one symbol and timeframe
+class CandleRingBuffer:
+    """
+    Fixed-size NumPy ring buffer of closed candles.
+
+    Rows are stored in the column order of KLINE_FIELDS. Appending never
+    allocates; reading the latest candles returns them oldest first.
+
+    Args:
+        capacity (int): The maximum number of candles kept.
+        interval_ms (int): The candle length in milliseconds, None disables gap detection.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, interval_ms=None):
+        self.capacity = capacity
+        self.interval_ms = interval_ms
+        self.data = numpy.zeros((capacity, len(KLINE_FIELDS)), dtype=numpy.float64)
+        self.count = 0
+        self.next_index = 0
+        self.has_gap = False
+        self._lock = threading.Lock()
+
+    def last_open_time(self):
+        if self.count == 0:
+            return None
+        return int(self.data[(self.next_index - 1) % self.capacity, TIME_COLUMN])
+
+    def append(self, row):
+        """
+        Appends one closed candle, ignoring candles that are not newer than the last one.
+
+        Args:
+            row (sequence): Candle values in KLINE_FIELDS order.
+
+        Returns:
+            bool: True if the candle was stored.
+        """
+        with self._lock:
+            last_open_time = self.last_open_time()
+            open_time = int(row[TIME_COLUMN])
+            if last_open_time is not None:
+                if open_time <= last_open_time:
+                    return False
+                if self.interval_ms and open_time - last_open_time != self.interval_ms:
+                    self.has_gap = True
+            self.data[self.next_index] = row
+            self.next_index = (self.next_index + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+            return True
+
+    def replace(self, rows):
+        """
+        Replaces the buffer contents with the given candles, oldest first.
+
+        Args:
+            rows (numpy.ndarray): Candle rows in KLINE_FIELDS order.
+        """
+        rows = rows[-self.capacity:]
+        with self._lock:
+            self.data[: len(rows)] = rows
+            self.count = len(rows)
+            self.next_index = len(rows) % self.capacity
+            self.has_gap = False
+
+    def latest(self, qty):
+        """
+        Returns the last qty candles, oldest first.
+
+        Args:
+            qty (int): The number of candles.
+
+        Returns:
+            numpy.ndarray: A (qty, len(KLINE_FIELDS)) array.
+        """
+        with self._lock:
+            qty = min(qty, self.count)
+            start = (self.next_index - qty) % self.capacity
+            if start + qty <= self.capacity:
+                return self.data[start : start + qty].copy()
+            return numpy.concatenate((self.data[start:], self.data[: self.next_index]))
+
+    def is_current(self, qty, now_ms):
+        """
+        Checks whether the buffer holds qty contiguous candles up to the last closed one.
+        """
+        if self.count < qty or self.has_gap:
+            return False
+        if self.interval_ms is None:
+            return True
+        newest_close_time = int(self.data[(self.next_index - 1) % self.capacity, CLOSE_TIME_COLUMN])
+        return now_ms - newest_close_time <= self.interval_ms
+
+# Function to convert a kline stream event into a ring buffer row
+def kline_event_to_row(kline):
+    return (
+        kline["t"],
+        float(kline["o"]),
+        float(kline["h"]),
+        float(kline["l"]),
+        float(kline["c"]),
+        float(kline["v"]),
+        kline["T"],
+        float(kline["q"]),
+        kline["n"],
+        float(kline["V"]),
+        float(kline["Q"]),
+    )
+
+# Class maintaining ring buffers from the Binance kline websocket streams
+class MarketDataStream:
+    """
+    Subscribes to kline streams and keeps the last closed candles in memory.
+
+    Reads are served from the ring buffers with no network calls; a REST
+    backfill is only issued when a buffer is short or has a gap.
+
+    Args:
+        subscriptions (list): (symbol, timeframe) pairs to stream.
+        capacity (int): The number of closed candles kept per pair.
+        stream_url (str): The websocket base URL, override to use a local fake server
+            such as simulator.start_kline_stream.
+        rest_fetch (callable): Fetches candles over REST, same signature as get_candlestick_data.
+        live_max_age (float): Seconds the last streamed candle is used by get_live_candle.
+    """
+
+    def __init__(
+        self,
+        subscriptions,
+        capacity=DEFAULT_CAPACITY,
+        stream_url=DEFAULT_STREAM_URL,
+        rest_fetch=binance_connect.get_candlestick_data,
+        live_max_age=DEFAULT_LIVE_MAX_AGE,
+    ):
+        self.subscriptions = [(symbol.upper(), timeframe) for symbol, timeframe in subscriptions]
+        self.capacity = capacity
+        self.stream_url = stream_url
+        self.rest_fetch = rest_fetch
+        self.live_max_age = live_max_age
+        self.buffers = {
+            (symbol, timeframe): CandleRingBuffer(capacity, TIMEFRAME_MS.get(timeframe))
+            for symbol, timeframe in self.subscriptions
+        }
+        # Last kline event of each pair, open or closed, with the monotonic time it arrived
+        self.live = {}
+        self.listeners = {}
+        self.client = None
+
+    def start(self):
+        """
+        Connects to the websocket and subscribes to every configured kline stream.
+        """
+        self.client = SpotWebsocketStreamClient(
+            stream_url=self.stream_url, on_message=self._on_message, is_combined=True
+        )
+        for index, (symbol, timeframe) in enumerate(self.subscriptions):
+            self.client.kline(symbol=symbol, interval=timeframe, id=index + 1)
+
+    def stop(self):
+        if self.client is not None:
+            self.client.stop()
+            self.client = None
+
+    def _on_message(self, _, message):
+        event = json.loads(message)
+        # Combined streams wrap the event in {"stream": ..., "data": ...}
+        event = event.get("data", event)
+        if event.get("e") != "kline":
+            return
+        kline = event["k"]
+        key = (event["s"], kline["i"])
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            return
+        row = kline_event_to_row(kline)
+        self.live[key] = (row, time.monotonic())
+        # Only closed candles are stored; the open candle changes every update
+        if not kline["x"]:
+            return
+        if buffer.append(row):
+            for listener in self.listeners.get(key, ()):
+                listener(dict(zip(KLINE_FIELDS, row)))
+
+    def add_listener(self, symbol, timeframe, listener):
+        """
+        Registers a callback receiving every new closed candle of a pair.
+
+        The callback gets the candle in the get_candlestick_data format, once per
+        candle and oldest first, including the candles loaded by a backfill. An
+        indicators.IndicatorSet's update method can be passed directly.
+
+        Args:
+            symbol (str): The trading symbol (e.g., 'SOLUSDT').
+            timeframe (str): The candlestick timeframe (e.g., '1h').
+            listener (callable): Called as listener(candle).
+        """
+        self.listeners.setdefault((symbol.upper(), timeframe), []).append(listener)
+
+    def backfill(self, symbol, timeframe):
+        """
+        Reloads the buffer of a pair from REST, keeping only closed candles.
+        """
+        buffer = self.buffers[(symbol, timeframe)]
+        candles = self.rest_fetch(symbol, timeframe, self.capacity + 1)
+        now_ms = int(time.time() * 1000)
+        rows = numpy.array(
+            [[candle[field] for field in KLINE_FIELDS] for candle in candles if candle["close_time"] < now_ms],
+            dtype=numpy.float64,
+        ).reshape(-1, len(KLINE_FIELDS))
+        last_open_time = buffer.last_open_time()
+        buffer.replace(rows)
+        # Listeners only receive the candles they have not seen yet
+        for row in rows:
+            if last_open_time is None or row[TIME_COLUMN] > last_open_time:
+                for listener in self.listeners.get((symbol, timeframe), ()):
+                    listener(row_to_candle(row))
+
+    def get_array(self, symbol, timeframe, qty):
+        """
+        Returns the last qty closed candles of a pair as an array, oldest first.
+
+        Args:
+            symbol (str): The trading symbol (e.g., 'SOLUSDT').
+            timeframe (str): The candlestick timeframe (e.g., '1h').
+            qty (int): The number of candles.
+
+        Returns:
+            numpy.ndarray: A (qty, len(KLINE_FIELDS)) array in KLINE_FIELDS column order.
+        """
+        buffer = self.buffers[(symbol, timeframe)]
+        if not buffer.is_current(qty, int(time.time() * 1000)):
+            self.backfill(symbol, timeframe)
+        return buffer.latest(qty)
+
+    def get_live_candle(self, symbol, timeframe):
+        """
+        Returns the candle of the last kline event of a pair, usually the open one.
+
+        Returns:
+            dict: The candle in the get_candlestick_data format, or None when no event
+            arrived in the last live_max_age seconds or the candle has since closed.
+        """
+        live = self.live.get((symbol, timeframe))
+        if live is None:
+            return None
+        row, received = live
+        if time.monotonic() - received > self.live_max_age or row[CLOSE_TIME_COLUMN] < time.time() * 1000:
+            return None
+        return dict(zip(KLINE_FIELDS, row))
+
+    def get_candles(self, symbol, timeframe, qty):
+        """
+        Returns the last qty closed candles of a pair in the get_candlestick_data format.
+        """
+        return [row_to_candle(row) for row in self.get_array(symbol, timeframe, qty)]
+
+    def get_columns(self, symbol, timeframe, qty):
+        """
+        Returns the last qty closed candles of a pair in the get_candlestick_columns format.
+        """
+        return array_to_columns(self.get_array(symbol, timeframe, qty))
+
+    def is_subscribed(self, symbol, timeframe):
+        return (symbol, timeframe) in self.buffers
+
+# Stream shared by the strategy module, None until start_stream is called
+_active_stream = None
+
+# Function to start the shared market data stream
+def start_stream(subscriptions, **kwargs):
+    """
+    Starts the shared market data stream used by get_candles.
+
+    Args:
+        subscriptions (list): (symbol, timeframe) pairs to stream.
+        **kwargs: Extra MarketDataStream arguments.
+
+    Returns:
+        MarketDataStream: The running stream.
+    """
+    global _active_stream
+    stream = MarketDataStream(subscriptions, **kwargs)
+    stream.start()
+    _active_stream = stream
+    return stream
+
+# Function to stop the shared market data stream
+def stop_stream():
+    global _active_stream
+    if _active_stream is not None:
+        _active_stream.stop()
+        _active_stream = None
+
+# Function to get candles from the shared stream, or over REST if not streamed
+def get_candles(symbol, timeframe, qty):
+    """
+    Returns the last qty closed candles, served from memory when the pair is streamed.
+
+    Over REST the open candle is dropped too, so a decision sees the same candles
+    whether or not its pair is streamed; see get_live_candle for the open one.
+
+    Args:
+        symbol (str): The trading symbol (e.g., 'SOLUSDT').
+        timeframe (str): The candlestick timeframe (e.g., '1h').
+        qty (int): The number of candles.
+
+    Returns:
+        list: List of dictionaries containing candlestick data.
+    """
+    stream = _active_stream
+    if stream is not None and stream.is_subscribed(symbol, timeframe):
+        return stream.get_candles(symbol, timeframe, qty)
+    # One kline more, since the last one is usually the open candle
+    candles = binance_connect.get_candlestick_data(symbol, timeframe, qty + 1)
+    if candles and candles[-1]["close_time"] >= time.time() * 1000:
+        candles = candles[:-1]
+    return candles[-qty:]
+
+# Function to get the current, still open candle of a pair
+def get_live_candle(symbol, timeframe):
+    """
+    Returns the open candle, whose close is the last traded price, from memory when the pair is streamed.
+
+    The closed candles of get_candles can be up to a whole timeframe old, so orders
+    are priced from this candle instead. Falls back to REST, whose last kline is the
+    open candle, when the pair is not streamed or no recent event arrived.
+
+    Args:
+        symbol (str): The trading symbol (e.g., 'SOLUSDT').
+        timeframe (str): The candlestick timeframe (e.g., '1h').
+
+    Returns:
+        dict: The candle in the get_candlestick_data format.
+    """
+    stream = _active_stream
+    if stream is not None and stream.is_subscribed(symbol, timeframe):
+        candle = stream.get_live_candle(symbol, timeframe)
+        if candle is not None:
+            return candle
+    return binance_connect.get_candlestick_data(symbol, timeframe, 1)[-1]
+
+# Function to get candle columns from the shared stream, or over REST if not streamed
+def get_candle_columns(symbol, timeframe, qty):
+    """
+    Returns the last qty closed candles as columns, served from memory when the pair is streamed.
+
+    Over REST the open candle is dropped too, as in get_candles.
+
+    Args:
+        symbol (str): The trading symbol (e.g., 'SOLUSDT').
+        timeframe (str): The candlestick timeframe (e.g., '1h').
+        qty (int): The number of candles.
+
+    Returns:
+        dict: One NumPy array per KLINE_FIELDS key plus the 'is_green' direction column.
+    """
+    stream = _active_stream
+    if stream is not None and stream.is_subscribed(symbol, timeframe):
+        return stream.get_columns(symbol, timeframe, qty)
+    # One kline more, since the last one is usually the open candle
+    columns = binance_connect.get_candlestick_columns(symbol, timeframe, qty + 1)
+    end = len(columns["close_time"])
+    if end and columns["close_time"][-1] >= time.time() * 1000:
+        end -= 1
+    return {field: column[max(0, end - qty):end] for field, column in columns.items()}
@@ -1,11 +1,22 @@
-from flask import Flask, request
+from flask import Flask, Response, request
 from moralis import evm_api
 from dotenv import load_dotenv
-import execute
-import datetime
+import account_state
+import instrumentation
+import market_stream
+import order_book
+import price_service
+import runner
+import settings
+import strategy
+import trade_journal
+import trade_queue
+import whale_watch
 import locale
 import os
 import json
+import threading
+import time
 
 # Load environment variables from a .env file
 load_dotenv()
@@ -13,19 +24,60 @@ load_dotenv()
 # Retrieve the Moralis API key from environment variables
 api_key = os.getenv("MORALIS_API_KEY")
 
-# Set the locale to en_US.UTF-8
-locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
+# Set the locale to en_US.UTF-8, when the host provides it (slim server images often do not)
+try:
+    locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
+except locale.Error:
+    print("Locale en_US.UTF-8 is not available, keeping the default locale")
 
 # Create a Flask web application instance
 app = Flask(__name__)
 
-# Define a route for the "/getPrice" endpoint with the HTTP method "GET"
-@app.route("/getPrice", methods=["GET"])
-def prices():
-    # Extract the "address" and "chain" parameters from the query string
-    address = request.args.get("address")
-    chain = request.args.get("chain")
+# Address of the "whale" wallet watched when no watchlist file is configured
+WHALE_ADDRESS = "0xcA3B6f18Ebc4E7C66885eaAde4C2FF3Edcf48d02"
+
+# Watched wallets, from the WHALE_WATCHLIST file or the single default whale
+watchlist_path = os.getenv("WHALE_WATCHLIST")
+if watchlist_path:
+    whale_watcher = whale_watch.load_watchlist(watchlist_path)
+else:
+    whale_watcher = whale_watch.WhaleWatch(
+        [whale_watch.make_rule(WHALE_ADDRESS)],
+        window=float(os.getenv("WHALE_FLOW_WINDOW", whale_watch.DEFAULT_WINDOW)),
+        default_threshold=float(os.getenv("WHALE_FLOW_THRESHOLD", whale_watch.DEFAULT_THRESHOLD)),
+    )
+
+# Intents apply to every configured strategy, so they are coalesced under one key
+ALL_STRATEGIES = "*"
+
+# Strategies run on per-symbol workers, configured by the "Strategies" settings list
+# Settings are validated once here, so a missing key stops the app before it takes webhooks
+project_settings = settings.load(os.getenv("SETTINGS_FILE", settings.DEFAULT_PATH))
+strategy_runner = runner.from_settings(
+    project_settings, workers=int(os.getenv("STRATEGY_WORKERS", runner.DEFAULT_WORKERS))
+)
+# Reloaded settings apply to the next decisions, decisions already running keep their snapshot
+settings.add_listener(strategy_runner.update_settings)
+
+# Background queue handing the trade intents produced by the webhook to the strategy workers
+intent_queue = trade_queue.TradeQueue(
+    lambda action, symbol: strategy_runner.dispatch(action, None if symbol == ALL_STRATEGIES else symbol),
+    workers=int(os.getenv("TRADE_WORKERS", trade_queue.DEFAULT_WORKERS)),
+    coalesce_window=float(os.getenv("TRADE_COALESCE_WINDOW", trade_queue.DEFAULT_COALESCE_WINDOW)),
+)
+
+# Default number of seconds shutdown waits for the queued intents and strategy actions
+DEFAULT_DRAIN_TIMEOUT = 30.0
+
+# Set once shutdown starts; webhooks are then refused with 503 so Moralis delivers them again later
+draining = threading.Event()
 
+# Whether start_services has run in this process
+_services_started = False
+
+# Function to fetch a token price from the Moralis API
+@instrumentation.timed("moralis.get_token_price")
+def fetch_token_price(address, chain):
     # Construct a dictionary of parameters
     params = {
         "chain": chain,
@@ -34,46 +86,221 @@ def prices():
     }
 
     # Call the Moralis API to get token price information
-    result = evm_api.token.get_token_price(api_key=api_key, params=params)
+    return evm_api.token.get_token_price(api_key=api_key, params=params)
 
-    # Return the result as the response
-    return result
+# Cached, single-flight token price lookups shared by the price endpoints
+prices_cache = price_service.PriceService(
+    fetch_token_price,
+    ttl=float(os.getenv("PRICE_CACHE_TTL", price_service.DEFAULT_TTL)),
+    chain_ttls=price_service.parse_chain_ttls(os.getenv("PRICE_CACHE_CHAIN_TTLS")),
+    workers=int(os.getenv("PRICE_WORKERS", price_service.DEFAULT_WORKERS)),
+)
+# Decisions read the same cache in-process, so they keep working while draining, after the listener stopped
+strategy.set_price_source(prices_cache.get_prices)
+
+# Define a route for the "/getPrice" endpoint with the HTTP method "GET"
+@app.route("/getPrice", methods=["GET"])
+def prices():
+    # Extract the "address" and "chain" parameters from the query string
+    address = request.args.get("address")
+    chain = request.args.get("chain")
+
+    # Return the token price information as the response
+    return prices_cache.get_price(address, chain)
+
+# Define a route for the "/getPrices" endpoint returning several prices at once
+@app.route("/getPrices", methods=["GET"])
+def batch_prices():
+    # Extract the comma-separated "addresses" and the "chain" from the query string
+    addresses = [address for address in request.args.get("addresses", "").split(",") if address]
+    chain = request.args.get("chain")
+
+    # Return the price information of every address, keyed by address
+    return prices_cache.get_prices(addresses, chain)
+
+# Function to queue the trade intents of one Moralis stream payload
+def handle_webhook(body):
+    """
+    Evaluates a webhook payload against the watchlist and queues the intents it triggers.
+
+    Shared by the Flask route and the ASGI handler. It does no network or disk I/O:
+    intents go to the trade queue and the journal writer thread.
+
+    Args:
+        body (bytes): The raw JSON payload of the Moralis stream.
+
+    Returns:
+        str: The trace id of the webhook, empty when instrumentation is off.
+    """
+    # Every stage run for this webhook, including the queued trades, shares its trace id
+    with instrumentation.trace("webhook") as webhook_span:
+        # Parse the JSON payload of the Moralis stream
+        json_object = json.loads(body)
+
+        # Aggregate the flows of the watched wallets and queue the intents whose threshold was crossed
+        with instrumentation.span("whale_watch.evaluate"):
+            intents = whale_watcher.evaluate(json_object)
+        for action, symbol, token, net_flow in intents:
+            print(f"{action}: net flow of {net_flow} {token}")
+            queued = intent_queue.submit(action, symbol or ALL_STRATEGIES)
+            trade_journal.record(trade_journal.INTENT, symbol, {
+                "action": action,
+                "token": token,
+                "net_flow": net_flow,
+                "queued": queued,
+            })
+    return webhook_span.trace_id or ""
 
 # Define a route for the "webhook" endpoint with the HTTP method "POST"
 @app.route("/webhook", methods=["POST"])
 def webhook():
-    # Receive the webhook data as a UTF-8 encoded string
-    webhook = request.data.decode("utf-8")
-
-    # Parse the JSON data into a Python dictionary
-    json_object = json.loads(webhook)
-
-    # Access the list of transactions from the JSON payload
-    txs = json_object["txs"]
-
-    for tx in txs:
-        from_address = tx["fromAddress"]
-        to_address = tx["toAddress"]
-
-        # Define a specific "whale" address for comparison
-        whale = "0xcA3B6f18Ebc4E7C66885eaAde4C2FF3Edcf48d02"
-        whale = whale.lower()
-
-        if from_address == whale:
-            # If the "from_address" matches the "whale" address, execute a "sell" action
-            print("sell")
-            execute.execute_analysis_and_trade("sell")
-        elif to_address == whale:
-            # If the "to_address" matches the "whale" address, execute a "buy" action
-            print("buy")
-            execute.execute_analysis_and_trade("buy")
-        else:
-            # If neither condition is met, print "no whale"
-            print("no whale")
-
-    # Return "ok" as the response
-    return "ok"
-
-# Start the Flask web application
+    if draining.is_set():
+        return "draining", 503
+    trace_id = handle_webhook(request.data)
+    # Return "ok" as the response, with the trace id to look the spans up
+    return "ok", 200, {"X-Trace-Id": trace_id}
+
+# Define a route exposing the whale watch counters and net flows
+@app.route("/whales", methods=["GET"])
+def whale_metrics():
+    return whale_watcher.metrics()
+
+# Define a route exposing the trade queue metrics
+@app.route("/queue", methods=["GET"])
+def queue_metrics():
+    return intent_queue.metrics()
+
+# Define a route exposing the decision metrics of every strategy worker
+@app.route("/strategies", methods=["GET"])
+def strategy_metrics():
+    return strategy_runner.metrics()
+
+# Define a route exposing the state of the account store fed by the user data stream
+@app.route("/account", methods=["GET"])
+def account_metrics():
+    state = account_state.get_state()
+    return state.metrics() if state is not None else {"synced": False}
+
+# Define a route listing journal entries by symbol, kind and time range
+@app.route("/journal", methods=["GET"])
+def journal_entries():
+    journal = trade_journal.get_journal()
+    if journal is None:
+        return {"entries": [], "enabled": False}
+    start = request.args.get("start", type=int)
+    end = request.args.get("end", type=int)
+    kinds = request.args.getlist("kind") or None
+    limit = request.args.get("limit", default=100, type=int)
+    entries = journal.query(request.args.get("symbol"), kinds, start, end, limit)
+    return {"entries": list(entries), "enabled": True}
+
+# Define a route exposing the loaded settings version and the reload counters
+@app.route("/settings", methods=["GET"])
+def settings_metrics():
+    watcher = settings.get_watcher()
+    snapshot = settings.current()
+    result = {"version": snapshot.version, "loaded_at": snapshot.loaded_at, "watching": watcher is not None}
+    if watcher is not None:
+        result.update(watcher.metrics())
+    return result
+
+# Define a route exposing the stage latencies in the Prometheus text format
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(instrumentation.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+# Define a route listing the recorded spans of one trace
+@app.route("/traces/<trace_id>", methods=["GET"])
+def trace_spans(trace_id):
+    return {"spans": instrumentation.recent_spans(trace_id)}
+
+# Export the queue depths with the stage latencies
+instrumentation.register_gauge("trade_queue_depth", intent_queue.queue.qsize)
+instrumentation.register_gauge(
+    "strategy_actions_queued", lambda: sum(len(worker.actions) for worker in strategy_runner.workers.values())
+)
+instrumentation.register_gauge("settings_version", lambda: settings.current().version)
+
+# Function to start the background services of the app
+def start_services(streams=True):
+    """
+    Starts the intent workers, the exchange streams, the journal and the settings watcher.
+
+    Called once per serving process: by __main__ for the development server, on
+    import of wsgi.py in each gunicorn worker, and on ASGI lifespan startup.
+
+    Args:
+        streams (bool): Whether to open the candle, order book and user data streams.
+    """
+    global _services_started
+    if _services_started:
+        return
+    _services_started = True
+    draining.clear()
+    intent_queue.start()
+    state = None
+    if streams:
+        # Stream the candles used by the strategy so decisions need no REST round-trips
+        strategy_runner.start_stream()
+        # Keep local order books so order prices account for the available liquidity
+        order_book.start_books(sorted({symbol for symbol, _ in strategy_runner.subscriptions()}))
+        # Keep balances and open orders current from the user data stream so decisions skip the account query
+        state = account_state.start_account_state(
+            project_settings,
+            reconcile_interval=float(os.getenv("ACCOUNT_RECONCILE_INTERVAL", account_state.DEFAULT_RECONCILE_INTERVAL)),
+        )
+    # Journal intents, decisions, orders and order updates so they survive a restart
+    journal_path = os.getenv("TRADE_JOURNAL", trade_journal.DEFAULT_PATH)
+    if journal_path:
+        journal = trade_journal.open_journal(journal_path)
+        if state is not None:
+            journal.subscribe(state)
+        instrumentation.register_gauge("trade_journal_queued", journal.queue.qsize)
+    # Reload settings.json and .env when they change, without restarting the app
+    interval = float(os.getenv("SETTINGS_POLL_INTERVAL", settings.DEFAULT_POLL_INTERVAL))
+    if interval > 0:
+        settings.start_watching(interval)
+
+# Function to stop the app after finishing the work already accepted
+def shutdown(timeout=None):
+    """
+    Drains the app: refuses new webhooks, runs the queued intents and strategy actions,
+    then stops the streams and writes the remaining journal entries.
+
+    Args:
+        timeout (float): Seconds to wait for the queued work in total, SHUTDOWN_TIMEOUT by default.
+
+    Returns:
+        dict: The trade queue metrics once drained.
+    """
+    global _services_started
+    if not _services_started:
+        return intent_queue.metrics()
+    if timeout is None:
+        timeout = float(os.getenv("SHUTDOWN_TIMEOUT", DEFAULT_DRAIN_TIMEOUT))
+    # One deadline for the whole drain, so it ends within gunicorn's graceful_timeout
+    deadline = time.monotonic() + timeout
+    draining.set()
+    # Stopping the queue lets its workers finish every intent queued before the stop
+    intent_queue.stop(timeout)
+    strategy_runner.stop(max(0.0, deadline - time.monotonic()))
+    settings.stop_watching()
+    market_stream.stop_stream()
+    order_book.stop_books()
+    account_state.stop_account_state()
+    prices_cache.close()
+    # Last, so the orders sent while draining are journaled
+    trade_journal.close_journal()
+    _services_started = False
+    metrics = intent_queue.metrics()
+    print(f"Drained: {metrics}")
+    return metrics
+
+# Start the Flask development server; see wsgi.py and asgi.py for production serving
 if __name__ == "__main__":
-    app.run(port=5002, debug=True)
+    start_services()
+    try:
+        # The reloader would run this block again in a child process with a second set of services
+        app.run(port=5002, debug=True, use_reloader=False)
+    finally:
+        shutdown()
@@ -0,0 +1,165 @@
+import asyncio
+import io
+import json
+import os
+import sys
+from urllib.parse import parse_qs
+
+# Make the bot modules in the repository root and the app modules in moralis/ importable
+MORALIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(MORALIS_DIR))
+sys.path.insert(0, MORALIS_DIR)
+
+import app as moralis_app
+
+# Function to send a complete HTTP response
+async def respond(send, status, body, content_type=b"application/json", headers=()):
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())] + list(headers),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+# Function to read the whole request body
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+# Function to read the query string parameters, first value of each
+def query_params(scope):
+    return {key: values[0] for key, values in parse_qs(scope["query_string"].decode("latin-1")).items()}
+
+# Async handler of GET /getPrice
+async def get_price(scope, body):
+    params = query_params(scope)
+    # Awaits the cached or in-flight lookup without holding a thread
+    price = await moralis_app.prices_cache.get_price_async(params.get("address", ""), params.get("chain"))
+    return 200, price, ()
+
+# Async handler of GET /getPrices
+async def get_prices(scope, body):
+    params = query_params(scope)
+    addresses = [address for address in params.get("addresses", "").split(",") if address]
+    prices = await moralis_app.prices_cache.get_prices_async(addresses, params.get("chain"))
+    return 200, prices, ()
+
+# Async handler of POST /webhook
+async def webhook(scope, body):
+    if moralis_app.draining.is_set():
+        return 503, "draining", ()
+    # Parsing, the watchlist evaluation and queueing are CPU work only, the trades run on the intent workers
+    trace_id = moralis_app.handle_webhook(body)
+    return 200, "ok", ((b"x-trace-id", trace_id.encode()),)
+
+# Async handlers by method and path; every other route is served by the Flask app
+ROUTES = {
+    ("GET", "/getPrice"): get_price,
+    ("GET", "/getPrices"): get_prices,
+    ("POST", "/webhook"): webhook,
+}
+
+# Function to serve a request with the Flask app on a thread
+async def call_flask(scope, body):
+    """
+    Runs the WSGI Flask app on the default executor for the routes without an async handler.
+
+    Returns:
+        tuple: (status, headers as (bytes, bytes) pairs, body bytes).
+    """
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        key = name.decode("latin-1").upper().replace("-", "_")
+        if key == "CONTENT_TYPE":
+            environ[key] = value.decode("latin-1")
+        elif key != "CONTENT_LENGTH":
+            environ[f"HTTP_{key}"] = value.decode("latin-1")
+
+    def run():
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+        chunks = moralis_app.app.wsgi_app(environ, start_response)
+        try:
+            payload = b"".join(chunks)
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+        return response["status"], response["headers"], payload
+
+    return await asyncio.get_running_loop().run_in_executor(None, run)
+
+# Function to run the ASGI lifespan protocol
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            moralis_app.start_services()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            # The server stopped taking requests; drain the queued intents off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, moralis_app.shutdown)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+# ASGI application: uvicorn asgi:application --app-dir moralis --port 5002
+async def application(scope, receive, send):
+    """
+    Serves /getPrice, /getPrices and /webhook from async handlers and the other routes from the Flask app.
+
+    Args:
+        scope (dict): The ASGI connection scope.
+        receive (callable): Awaits the next ASGI event.
+        send (callable): Sends an ASGI event.
+    """
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    body = await read_body(receive)
+    if body is None:
+        return
+    handler = ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        status, headers, payload = await call_flask(scope, body)
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": payload})
+        return
+    try:
+        status, payload, headers = await handler(scope, body)
+    except Exception as error:
+        print(f"Error in {scope['path']}: {error}")
+        status, payload, headers = 500, {"error": str(error)}, ()
+    if isinstance(payload, (dict, list)):
+        await respond(send, status, json.dumps(payload, default=str), b"application/json", headers)
+    else:
+        await respond(send, status, payload, b"text/plain; charset=utf-8", headers)
@@ -0,0 +1,31 @@
+import os
+
+# Run from the repository root: gunicorn -c moralis/gunicorn.conf.py wsgi:application
+# or, with uvicorn installed, WEB_WORKER_CLASS=uvicorn.workers.UvicornWorker and asgi:application
+MORALIS_DIR = os.path.dirname(os.path.abspath(__file__))
+pythonpath = f"{MORALIS_DIR},{os.path.dirname(MORALIS_DIR)}"
+
+# Address the server listens on
+bind = os.getenv("WEB_BIND", "0.0.0.0:5002")
+
+# Worker processes. Each one runs its own intent queue, whale flow windows and
+# exchange streams, so one worker per account keeps the net flows whole; add threads instead
+workers = int(os.getenv("WEB_WORKERS", "1"))
+
+# Threads per worker serving requests concurrently, the price lookups wait on the upstream
+worker_class = os.getenv("WEB_WORKER_CLASS", "gthread")
+threads = int(os.getenv("WEB_THREADS", "16"))
+
+# Import the app in the workers, after the fork, so their threads and sockets are their own
+preload_app = False
+
+# Seconds a stopping worker gets to finish its requests and drain its queued intents
+# before the master kills it; app.shutdown waits SHUTDOWN_TIMEOUT of them for the queues
+graceful_timeout = float(os.getenv("SHUTDOWN_TIMEOUT", "30")) + 10
+timeout = 60
+keepalive = 5
+
+# Function to drain the worker's queued intents once it stopped taking requests
+def worker_exit(server, worker):
+    import app
+    app.shutdown()
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Default number of seconds a token price stays cached
+DEFAULT_TTL = 10.0
+
+# Default number of concurrent upstream price requests
+DEFAULT_WORKERS = 8
+
+# Class caching token prices per chain with single-flight upstream fetches
+class PriceService:
+    """
+    TTL cache in front of a token price source.
+
+    Concurrent requests for the same (chain, address) share one upstream call,
+    and a batch of addresses is fetched concurrently on a thread pool.
+
+    Args:
+        fetch_price (callable): Fetches one price, called as fetch_price(address, chain).
+        ttl (float): The default number of seconds a price stays cached.
+        chain_ttls (dict): Per-chain overrides of ttl.
+        workers (int): The number of concurrent upstream requests.
+    """
+
+    def __init__(self, fetch_price, ttl=DEFAULT_TTL, chain_ttls=None, workers=DEFAULT_WORKERS):
+        self.fetch_price = fetch_price
+        self.ttl = ttl
+        self.chain_ttls = chain_ttls or {}
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="price")
+        self._cache = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, key, future):
+        address, chain = key
+        try:
+            result = self.fetch_price(address, chain)
+        except Exception as error:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(error)
+            return
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.chain_ttls.get(chain, self.ttl), result)
+            del self._in_flight[key]
+        future.set_result(result)
+
+    def _request(self, address, chain):
+        key = (address.lower(), chain)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                future = Future()
+                future.set_result(cached[1])
+                return future
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+            future = Future()
+            self._in_flight[key] = future
+        self.executor.submit(self._fetch, key, future)
+        return future
+
+    def get_price(self, address, chain):
+        """
+        Returns the price of one token, from the cache when fresh.
+        """
+        return self._request(address, chain).result()
+
+    def get_prices(self, addresses, chain):
+        """
+        Returns the prices of several tokens, fetching the missing ones concurrently.
+
+        Args:
+            addresses (list): The token addresses.
+            chain (str): The blockchain chain (e.g., 'bsc').
+
+        Returns:
+            dict: The price result of each address.
+        """
+        futures = {address: self._request(address, chain) for address in addresses}
+        return {address: future.result() for address, future in futures.items()}
+
+    async def get_price_async(self, address, chain):
+        """
+        Awaitable get_price: the event loop is not blocked while the upstream call runs.
+        """
+        return await asyncio.wrap_future(self._request(address, chain))
+
+    async def get_prices_async(self, addresses, chain):
+        """
+        Awaitable get_prices, the missing prices are still fetched concurrently on the thread pool.
+        """
+        futures = {address: asyncio.wrap_future(self._request(address, chain)) for address in addresses}
+        return {address: await future for address, future in futures.items()}
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+# Function to read per-chain TTL overrides from an environment string
+def parse_chain_ttls(value):
+    """
+    Parses 'chain:seconds' pairs separated by commas, e.g. 'bsc:5,eth:30'.
+    """
+    chain_ttls = {}
+    for item in filter(None, (value or "").split(",")):
+        chain, seconds = item.split(":")
+        chain_ttls[chain.strip()] = float(seconds)
+    return chain_ttls
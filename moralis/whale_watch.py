@@ -0,0 +1,213 @@
+import collections
+import json
+import threading
+import time
+
+# Token key of native coin transfers (the "txs" of a Moralis stream payload)
+NATIVE_TOKEN = "native"
+
+# Decimals of native coin values, which Moralis sends in wei
+NATIVE_DECIMALS = 18
+
+# Default number of seconds net flows are aggregated over
+DEFAULT_WINDOW = 300.0
+
+# Default absolute net flow, in token units, that emits an intent
+DEFAULT_THRESHOLD = 0.0
+
+# Default number of transfer ids remembered to drop webhook retries
+DEFAULT_SEEN_TRANSFERS = 100000
+
+# Directions of a watched address that count towards the net flow
+DIRECTIONS = ("in", "out", "both")
+
+# Function to build the rule of one watched address
+def make_rule(address, weight=1.0, direction="both", tokens=None):
+    """
+    Builds the rule applied to the transfers of a watched address.
+
+    Args:
+        address (str): The wallet address.
+        weight (float): Multiplier of the address's flows.
+        direction (str): 'in' counts received transfers, 'out' sent ones, 'both' both.
+        tokens (list): Token addresses (or 'native') the rule applies to, None for every token.
+
+    Returns:
+        dict: The rule, with the address and tokens lowercased.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unknown direction {direction!r} for {address}")
+    return {
+        "address": address.lower(),
+        "weight": float(weight),
+        "counts_in": direction in ("in", "both"),
+        "counts_out": direction in ("out", "both"),
+        "tokens": None if tokens is None else frozenset(token.lower() for token in tokens),
+    }
+
+# Function to load a watchlist file
+def load_watchlist(path):
+    """
+    Loads watched addresses and token settings from a JSON file.
+
+    The file holds {"window": seconds, "default_threshold": amount,
+    "tokens": {token: {"threshold": amount, "symbol": "SOLUSDT"}},
+    "addresses": [{"address": ..., "weight": 1, "direction": "both", "tokens": [...]}]};
+    every key but "addresses" is optional.
+
+    Args:
+        path (str): The watchlist file.
+
+    Returns:
+        WhaleWatch: The engine configured from the file.
+    """
+    with open(path, "r") as file:
+        watchlist = json.load(file)
+    rules = [
+        make_rule(entry["address"], entry.get("weight", 1.0), entry.get("direction", "both"), entry.get("tokens"))
+        for entry in watchlist["addresses"]
+    ]
+    return WhaleWatch(
+        rules,
+        token_settings=watchlist.get("tokens"),
+        window=watchlist.get("window", DEFAULT_WINDOW),
+        default_threshold=watchlist.get("default_threshold", DEFAULT_THRESHOLD),
+    )
+
+# Function to read the token amount of a Moralis transfer
+def transfer_amount(transfer, decimals):
+    value_with_decimals = transfer.get("valueWithDecimals")
+    if value_with_decimals is not None:
+        return float(value_with_decimals)
+    return int(transfer.get("value") or 0) / 10 ** decimals
+
+# Class aggregating the flows of watched wallets into trade intents
+class WhaleWatch:
+    """
+    Evaluates Moralis stream payloads against a set of watched addresses.
+
+    The rules are indexed by lowercased address, so each transfer costs two
+    dictionary lookups whatever the number of watched addresses. Flows into a
+    watched address count as positive, flows out as negative, scaled by the
+    address's weight. The net flow of each token is summed over a sliding time
+    window; when its absolute value reaches the token's threshold a single
+    intent ('buy' for a net inflow, 'sell' for a net outflow) is emitted and the
+    token's window starts over.
+
+    Args:
+        rules (list): Address rules built by make_rule.
+        token_settings (dict): Per-token {"threshold": amount, "symbol": trading symbol}.
+        window (float): The seconds net flows are aggregated over.
+        default_threshold (float): The threshold of tokens without settings.
+        seen_transfers (int): The number of transfer ids remembered to drop retries.
+        clock (callable): Returns the current time in seconds, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        rules,
+        token_settings=None,
+        window=DEFAULT_WINDOW,
+        default_threshold=DEFAULT_THRESHOLD,
+        seen_transfers=DEFAULT_SEEN_TRANSFERS,
+        clock=time.monotonic,
+    ):
+        self.rules = {rule["address"]: rule for rule in rules}
+        self.token_settings = {token.lower(): settings for token, settings in (token_settings or {}).items()}
+        self.window = window
+        self.default_threshold = default_threshold
+        self.seen_transfers = seen_transfers
+        self.clock = clock
+        self.flows = collections.defaultdict(collections.deque)
+        self.net_flows = collections.defaultdict(float)
+        self.counters = collections.Counter()
+        self.last_batch_seconds = 0.0
+        self._seen = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _is_new(self, transfer_id):
+        if transfer_id in self._seen:
+            return False
+        self._seen[transfer_id] = True
+        if len(self._seen) > self.seen_transfers:
+            self._seen.popitem(last=False)
+        return True
+
+    def _add_flows(self, transfers, token_key, decimals_key, batch_flows):
+        rules = self.rules
+        for transfer in transfers:
+            from_rule = rules.get((transfer.get("fromAddress") or "").lower())
+            to_rule = rules.get((transfer.get("toAddress") or "").lower())
+            if from_rule is None and to_rule is None:
+                continue
+            # Moralis sends every transfer unconfirmed and again confirmed; count it once
+            transfer_id = (transfer.get("transactionHash") or transfer.get("hash"), transfer.get("logIndex"))
+            if transfer_id[0] is not None and not self._is_new(transfer_id):
+                self.counters["duplicates"] += 1
+                continue
+            token = transfer[token_key].lower() if token_key else NATIVE_TOKEN
+            decimals = int(transfer.get(decimals_key) or 0) if decimals_key else NATIVE_DECIMALS
+            amount = transfer_amount(transfer, decimals)
+            flow = 0.0
+            if to_rule is not None and to_rule["counts_in"] and (to_rule["tokens"] is None or token in to_rule["tokens"]):
+                flow += to_rule["weight"] * amount
+            if from_rule is not None and from_rule["counts_out"] and (from_rule["tokens"] is None or token in from_rule["tokens"]):
+                flow -= from_rule["weight"] * amount
+            self.counters["matched"] += 1
+            batch_flows[token] += flow
+
+    def _expire(self, token, now):
+        entries = self.flows[token]
+        while entries and entries[0][0] <= now - self.window:
+            _, flow = entries.popleft()
+            self.net_flows[token] -= flow
+        if not entries:
+            # Start again from an exact zero instead of the rounding left by the subtractions
+            self.net_flows[token] = 0.0
+
+    def evaluate(self, payload):
+        """
+        Adds the watched flows of one webhook payload and returns the intents it triggers.
+
+        Args:
+            payload (dict): The Moralis stream payload, with "txs" and optionally "erc20Transfers".
+
+        Returns:
+            list: (action, symbol, token, net_flow) tuples, symbol None when the token has none.
+        """
+        start = time.perf_counter()
+        batch_flows = collections.defaultdict(float)
+        intents = []
+        with self._lock:
+            self._add_flows(payload.get("txs", ()), None, None, batch_flows)
+            self._add_flows(payload.get("erc20Transfers", ()), "tokenAddress", "tokenDecimals", batch_flows)
+            now = self.clock()
+            for token, flow in batch_flows.items():
+                self._expire(token, now)
+                if flow == 0:
+                    continue
+                self.flows[token].append((now, flow))
+                self.net_flows[token] += flow
+                net_flow = self.net_flows[token]
+                settings = self.token_settings.get(token, {})
+                if abs(net_flow) >= settings.get("threshold", self.default_threshold):
+                    intents.append(("buy" if net_flow > 0 else "sell", settings.get("symbol"), token, net_flow))
+                    self.flows[token].clear()
+                    self.net_flows[token] = 0.0
+            self.counters["transfers"] += len(payload.get("txs", ())) + len(payload.get("erc20Transfers", ()))
+            self.counters["intents"] += len(intents)
+            self.last_batch_seconds = time.perf_counter() - start
+        return intents
+
+    def metrics(self):
+        """
+        Returns the counters, the current net flow of every token and the last batch duration.
+        """
+        with self._lock:
+            now = self.clock()
+            for token in list(self.flows):
+                self._expire(token, now)
+            result = {"addresses": len(self.rules), "last_batch_seconds": self.last_batch_seconds}
+            result.update(self.counters)
+            result["net_flows"] = {token: flow for token, flow in self.net_flows.items() if flow}
+            return result
@@ -0,0 +1,15 @@
+import os
+import sys
+
+# Make the bot modules in the repository root and the app modules in moralis/ importable
+MORALIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(MORALIS_DIR))
+sys.path.insert(0, MORALIS_DIR)
+
+import app as moralis_app
+
+# WSGI callable for gunicorn: gunicorn -c moralis/gunicorn.conf.py wsgi:application
+application = moralis_app.app
+
+# Each gunicorn worker imports this module after the fork, so the services run in the worker
+moralis_app.start_services()
@@ -0,0 +1,143 @@
+import argparse
+import functools
+import itertools
+import os
+import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import pandas
+import backtest
+import kline_store
+import strategy
+import symbol_cache
+
+# Parameter grid swept by default. The sell stop multiplier is left out: the sell is
+# priced at the last close and closes the whole position, so it changes no result
+DEFAULT_GRID = {
+    "number_of_candles": [2, 3, 4, 5],
+    "percentage_change": [0.000001, 0.0005, 0.001, 0.002],
+    "buy_stop_multiplier": [1.001, 1.005, 1.01],
+    "quote_size": [0.1],
+}
+
+# Memory-mapped kline columns opened by this process, keyed by dataset directory
+_open_datasets = {}
+
+# Function to open a shared dataset read-only without copying it
+def open_dataset(directory):
+    columns = _open_datasets.get(directory)
+    if columns is None:
+        columns = kline_store.read_directory(directory)
+        _open_datasets[directory] = columns
+    return columns
+
+# Function to run one backtest of the sweep inside a worker process
+def run_trial(task):
+    """
+    Backtests one parameter set on one dataset.
+
+    Args:
+        task (dict): The dataset directory, symbol, timeframe, symbol metadata and parameters.
+
+    Returns:
+        dict: The parameters merged with the backtest summary.
+    """
+    params = task["params"]
+    buy_params = functools.partial(
+        strategy.calculate_buy_params,
+        stop_multiplier=params["buy_stop_multiplier"],
+        quote_size=params["quote_size"],
+    )
+    sell_params = functools.partial(strategy.calculate_sell_params, quote_size=params["quote_size"])
+    summary, _ = backtest.run_backtest(
+        open_dataset(task["directory"]),
+        task["symbol"],
+        task["pair"],
+        task["timeframe"],
+        percentage_change=params["percentage_change"],
+        number_of_candles=params["number_of_candles"],
+        buy_params=buy_params,
+        sell_params=sell_params,
+    )
+    result = dict(params)
+    result.update(summary)
+    result["timeframe"] = task["timeframe"]
+    return result
+
+# Function to list the parameter sets of a grid or random search
+def parameter_sets(grid, samples=None, seed=None):
+    """
+    Expands a parameter grid.
+
+    Args:
+        grid (dict): Candidate values per parameter.
+        samples (int): Number of random combinations to draw, None for the full grid.
+        seed (int): Seed of the random search.
+
+    Returns:
+        list: Parameter dictionaries.
+    """
+    names = list(grid)
+    combinations = list(itertools.product(*(grid[name] for name in names)))
+    if samples is not None and samples < len(combinations):
+        combinations = random.Random(seed).sample(combinations, samples)
+    return [dict(zip(names, values)) for values in combinations]
+
+# Function to sweep strategy parameters over several datasets on a process pool
+def sweep(datasets, grid=DEFAULT_GRID, samples=None, metric="pnl", workers=None, seed=None):
+    """
+    Backtests every parameter set on every dataset and ranks the results.
+
+    Candle arrays are written once in the kline_store format and memory-mapped by
+    the workers, so each task only carries the dataset path and its parameters.
+
+    Args:
+        datasets (list): (symbol, timeframe, columns, pair) tuples.
+        grid (dict): Candidate values per parameter.
+        samples (int): Number of random combinations to draw, None for the full grid.
+        metric (str): The summary column the results are ranked by, highest first.
+        workers (int): The number of worker processes, defaults to the CPU count.
+        seed (int): Seed of the random search.
+
+    Returns:
+        pandas.DataFrame: One row per trial, best first.
+    """
+    with tempfile.TemporaryDirectory(prefix="sweep-") as shared_directory:
+        tasks = []
+        for symbol, timeframe, columns, pair in datasets:
+            directory = os.path.join(shared_directory, f"{symbol}_{timeframe}")
+            kline_store.append_directory(directory, columns)
+            for params in parameter_sets(grid, samples, seed):
+                tasks.append(
+                    {"directory": directory, "symbol": symbol, "timeframe": timeframe, "pair": pair, "params": params}
+                )
+
+        # Large chunks keep each worker on one dataset and amortise task dispatch
+        chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_trial, tasks, chunksize=chunksize))
+
+    return pandas.DataFrame(results).sort_values(metric, ascending=False, ignore_index=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep strategy parameters over stored klines")
+    parser.add_argument("datasets", nargs="+", help="SYMBOL:TIMEFRAME:path to a CSV or Parquet kline file or kline store directory")
+    parser.add_argument("--symbols-file", default="sol_pair.json", help="exchange_info snapshot with the symbol filters")
+    parser.add_argument("--samples", type=int, help="random search with this many combinations instead of the full grid")
+    parser.add_argument("--metric", default="pnl")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", default="sweep_results.csv")
+    args = parser.parse_args()
+
+    datasets = []
+    for spec in args.datasets:
+        symbol, timeframe, path = spec.split(":", 2)
+        pair = symbol_cache.read_symbol(args.symbols_file, symbol)
+        if pair is None:
+            parser.error(f"{symbol} is not listed in {args.symbols_file}, pass a snapshot that has it with --symbols-file")
+        datasets.append((symbol, timeframe, backtest.load_klines(path), pair))
+
+    results = sweep(datasets, samples=args.samples, metric=args.metric, workers=args.workers, seed=args.seed)
+    results.to_csv(args.output, index=False)
+    print(results.head(20).to_string())
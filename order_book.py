@@ -0,0 +1,405 @@
+import json
+import threading
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy
+from binance.websocket.spot.websocket_stream import SpotWebsocketStreamClient
+import binance_connect
+
+# Default Binance Spot market data websocket endpoint
+DEFAULT_STREAM_URL = "wss://stream.binance.com:9443"
+
+# Default number of price levels kept per side of a book
+DEFAULT_MAX_LEVELS = 1000
+
+# Default number of levels requested in a REST snapshot
+DEFAULT_SNAPSHOT_LIMIT = 1000
+
+# Number of diff events buffered while a snapshot is loading
+DEFAULT_PENDING_EVENTS = 1000
+
+# Default number of snapshots loaded concurrently
+DEFAULT_SNAPSHOT_WORKERS = 4
+
+# Class storing the price levels of one side of an order book
+class BookSide:
+    """
+    Price levels kept sorted from best to worst in parallel lists.
+
+    Levels are located by binary search; bids are keyed by their negated price
+    so both sides sort ascending from the best level. Only the best max_levels
+    levels are kept, so memory stays bounded however far the book reaches.
+
+    Args:
+        is_bid (bool): Whether the side holds bids.
+        max_levels (int): The maximum number of levels kept.
+    """
+
+    def __init__(self, is_bid, max_levels=DEFAULT_MAX_LEVELS):
+        self.is_bid = is_bid
+        self.max_levels = max_levels
+        self.keys = []
+        self.quantities = []
+
+    def clear(self):
+        self.keys = []
+        self.quantities = []
+
+    def set(self, price, quantity):
+        """
+        Sets the quantity of a price level, removing the level when the quantity is zero.
+        """
+        key = -price if self.is_bid else price
+        index = bisect_left(self.keys, key)
+        found = index < len(self.keys) and self.keys[index] == key
+        if quantity == 0:
+            if found:
+                del self.keys[index]
+                del self.quantities[index]
+        elif found:
+            self.quantities[index] = quantity
+        elif index < self.max_levels:
+            self.keys.insert(index, key)
+            self.quantities.insert(index, quantity)
+            if len(self.keys) > self.max_levels:
+                self.keys.pop()
+                self.quantities.pop()
+
+    def best(self):
+        if not self.keys:
+            return None
+        return -self.keys[0] if self.is_bid else self.keys[0]
+
+    def levels(self, depth=None):
+        """
+        Returns the best levels as (prices, quantities) arrays, best first.
+        """
+        keys = numpy.array(self.keys[:depth], dtype=numpy.float64)
+        return (-keys if self.is_bid else keys), numpy.array(self.quantities[:depth], dtype=numpy.float64)
+
+    def walk(self, quantity):
+        """
+        Takes quantity from the best levels.
+
+        Returns:
+            tuple: (filled quantity, total cost, price of the last level touched).
+        """
+        filled = 0.0
+        cost = 0.0
+        worst_key = None
+        for key, level_quantity in zip(self.keys, self.quantities):
+            taken = min(level_quantity, quantity - filled)
+            filled += taken
+            cost += taken * key
+            worst_key = key
+            if filled >= quantity:
+                break
+        if self.is_bid:
+            return filled, -cost, (None if worst_key is None else -worst_key)
+        return filled, cost, worst_key
+
+# Class maintaining a local order book from a snapshot and depth diff events
+class LocalOrderBook:
+    """
+    Order book of one symbol kept in sync with the Binance diff depth stream.
+
+    Diff events received before the snapshot are buffered and replayed. Events
+    already contained in the snapshot are dropped, the first applied event must
+    straddle the snapshot's lastUpdateId, and every later event must start right
+    after the previous one. Any gap resets the book until a new snapshot is applied.
+
+    Args:
+        symbol (str): The trading symbol (e.g., 'SOLUSDT').
+        max_levels (int): The maximum number of levels kept per side.
+        pending_events (int): The maximum number of buffered diff events.
+    """
+
+    def __init__(self, symbol, max_levels=DEFAULT_MAX_LEVELS, pending_events=DEFAULT_PENDING_EVENTS):
+        self.symbol = symbol
+        self.bids = BookSide(True, max_levels)
+        self.asks = BookSide(False, max_levels)
+        self.last_update_id = None
+        self.synced = False
+        self.gaps = 0
+        self.pending = deque(maxlen=pending_events)
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+        self.synced = False
+
+    def apply_snapshot(self, snapshot):
+        """
+        Loads a REST snapshot and replays the buffered diff events on top of it.
+
+        Args:
+            snapshot (dict): The get_order_book response.
+
+        Returns:
+            bool: False if the buffered events do not connect to the snapshot and a new one is needed.
+        """
+        with self._lock:
+            self._reset()
+            for price, quantity in snapshot["bids"]:
+                self.bids.set(float(price), float(quantity))
+            for price, quantity in snapshot["asks"]:
+                self.asks.set(float(price), float(quantity))
+            self.last_update_id = snapshot["lastUpdateId"]
+            pending = list(self.pending)
+            self.pending.clear()
+            for event in pending:
+                if not self._apply(event):
+                    return False
+            return True
+
+    def apply_diff(self, event):
+        """
+        Applies one depthUpdate event, or buffers it while no snapshot is loaded.
+
+        Args:
+            event (dict): The depthUpdate event.
+
+        Returns:
+            bool: False if a sequence gap was found and a new snapshot is needed.
+        """
+        with self._lock:
+            if self.last_update_id is None:
+                self.pending.append(event)
+                return True
+            return self._apply(event)
+
+    def _apply(self, event):
+        first_update_id = event["U"]
+        final_update_id = event["u"]
+        # The snapshot or an earlier event already contains this update
+        if final_update_id <= self.last_update_id:
+            return True
+        if first_update_id > self.last_update_id + 1 or (self.synced and first_update_id != self.last_update_id + 1):
+            self.gaps += 1
+            self._reset()
+            self.pending.append(event)
+            return False
+        for price, quantity in event["b"]:
+            self.bids.set(float(price), float(quantity))
+        for price, quantity in event["a"]:
+            self.asks.set(float(price), float(quantity))
+        self.last_update_id = final_update_id
+        self.synced = True
+        return True
+
+    def best_bid(self):
+        with self._lock:
+            return self.bids.best()
+
+    def best_ask(self):
+        with self._lock:
+            return self.asks.best()
+
+    def mid_price(self):
+        with self._lock:
+            bid = self.bids.best()
+            ask = self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def levels(self, depth=None):
+        """
+        Returns the best levels of both sides as arrays.
+
+        Returns:
+            dict: 'bid_prices', 'bid_quantities', 'ask_prices' and 'ask_quantities', best first.
+        """
+        with self._lock:
+            bid_prices, bid_quantities = self.bids.levels(depth)
+            ask_prices, ask_quantities = self.asks.levels(depth)
+        return {
+            "bid_prices": bid_prices,
+            "bid_quantities": bid_quantities,
+            "ask_prices": ask_prices,
+            "ask_quantities": ask_quantities,
+        }
+
+    def estimate_fill(self, side, quantity):
+        """
+        Estimates the fill of a market order of quantity against the book.
+
+        Args:
+            side (str): 'BUY' walks the asks, 'SELL' walks the bids.
+            quantity (float): The base asset quantity.
+
+        Returns:
+            dict: 'average_price', 'worst_price', 'best_price', 'filled_quantity',
+            'complete' (whether the kept levels hold the whole quantity) and
+            'slippage' (the average price's relative distance from the best
+            price, positive when worse); None if the book is empty.
+        """
+        book_side = self.asks if side == "BUY" else self.bids
+        with self._lock:
+            best_price = book_side.best()
+            if best_price is None or quantity <= 0:
+                return None
+            filled, cost, worst_price = book_side.walk(quantity)
+        average_price = cost / filled
+        if side == "BUY":
+            slippage = (average_price - best_price) / best_price
+        else:
+            slippage = (best_price - average_price) / best_price
+        return {
+            "average_price": average_price,
+            "worst_price": worst_price,
+            "best_price": best_price,
+            "filled_quantity": filled,
+            "complete": filled >= quantity,
+            "slippage": slippage,
+        }
+
+# Class maintaining local order books from the Binance diff depth streams
+class OrderBookManager:
+    """
+    Subscribes to the diff depth streams of several symbols and keeps their books in sync.
+
+    Snapshots are loaded on a small thread pool, both at start and whenever a
+    book reports a sequence gap, so a resync never blocks the websocket thread.
+
+    Args:
+        symbols (list): The symbols to maintain books for.
+        max_levels (int): The maximum number of levels kept per side.
+        snapshot_limit (int): The number of levels requested per snapshot.
+        stream_url (str): The websocket base URL, override to use a local fake server.
+        fetch_snapshot (callable): Fetches a snapshot, same signature as binance_connect.get_order_book.
+        speed (int): The diff stream update speed in milliseconds (100 or 1000).
+        workers (int): The number of snapshots loaded concurrently.
+    """
+
+    def __init__(
+        self,
+        symbols,
+        max_levels=DEFAULT_MAX_LEVELS,
+        snapshot_limit=DEFAULT_SNAPSHOT_LIMIT,
+        stream_url=DEFAULT_STREAM_URL,
+        fetch_snapshot=binance_connect.get_order_book,
+        speed=100,
+        workers=DEFAULT_SNAPSHOT_WORKERS,
+    ):
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.snapshot_limit = snapshot_limit
+        self.stream_url = stream_url
+        self.fetch_snapshot = fetch_snapshot
+        self.speed = speed
+        self.books = {symbol: LocalOrderBook(symbol, max_levels) for symbol in self.symbols}
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="order-book")
+        self.client = None
+        self._loading = set()
+        self._loading_lock = threading.Lock()
+
+    def start(self):
+        """
+        Subscribes to every diff depth stream, then loads the snapshots.
+
+        Subscribing first means the events following each snapshot are already buffered.
+        """
+        self.client = SpotWebsocketStreamClient(
+            stream_url=self.stream_url, on_message=self._on_message, is_combined=True
+        )
+        for index, symbol in enumerate(self.symbols):
+            self.client.diff_book_depth(symbol=symbol, speed=self.speed, id=index + 1)
+        for symbol in self.symbols:
+            self.resync(symbol)
+
+    def stop(self):
+        if self.client is not None:
+            self.client.stop()
+            self.client = None
+        self.executor.shutdown(wait=False)
+
+    def _on_message(self, _, message):
+        event = json.loads(message)
+        # Combined streams wrap the event in {"stream": ..., "data": ...}
+        event = event.get("data", event)
+        if event.get("e") != "depthUpdate":
+            return
+        self.apply_event(event)
+
+    def apply_event(self, event):
+        """
+        Applies one depthUpdate event to its book, scheduling a resync on a gap.
+        """
+        book = self.books.get(event["s"])
+        if book is None:
+            return
+        if not book.apply_diff(event) or book.last_update_id is None:
+            self.resync(event["s"])
+
+    def resync(self, symbol):
+        """
+        Schedules a snapshot load for a symbol unless one is already running.
+        """
+        with self._loading_lock:
+            if symbol in self._loading:
+                return
+            self._loading.add(symbol)
+        self.executor.submit(self._load_snapshot, symbol)
+
+    def _load_snapshot(self, symbol):
+        book = self.books[symbol]
+        try:
+            # A snapshot older than the buffered events is retried until they connect
+            while not book.apply_snapshot(self.fetch_snapshot(symbol, self.snapshot_limit)):
+                print(f"Order book of {symbol} out of sequence, reloading snapshot")
+        except Exception as error:
+            # The next diff event schedules another attempt
+            print(f"Order book snapshot of {symbol} failed: {error}")
+        finally:
+            with self._loading_lock:
+                self._loading.discard(symbol)
+
+    def get_book(self, symbol):
+        """
+        Returns the book of a symbol, or None if it is not maintained or not in sync.
+        """
+        book = self.books.get(symbol)
+        if book is None or not book.synced:
+            return None
+        return book
+
+# Order books shared by the strategy module, None until start_books is called
+_active_books = None
+
+# Function to start the shared order books
+def start_books(symbols, **kwargs):
+    """
+    Starts maintaining the shared order books used by get_book.
+
+    Args:
+        symbols (list): The symbols to maintain books for.
+        **kwargs: Extra OrderBookManager arguments.
+
+    Returns:
+        OrderBookManager: The running manager.
+    """
+    global _active_books
+    manager = OrderBookManager(symbols, **kwargs)
+    manager.start()
+    _active_books = manager
+    return manager
+
+# Function to stop the shared order books
+def stop_books():
+    global _active_books
+    if _active_books is not None:
+        _active_books.stop()
+        _active_books = None
+
+# Function to get the shared book of a symbol
+def get_book(symbol):
+    """
+    Returns the in-sync local book of a symbol, or None when it is not maintained.
+    """
+    manager = _active_books
+    if manager is None:
+        return None
+    return manager.get_book(symbol)
@@ -0,0 +1,281 @@
+import math
+from decimal import Decimal
+import numpy
+import symbol_cache
+
+# Rounding modes of prices and quantities
+DOWN = "down"
+UP = "up"
+NEAREST = "nearest"
+
+# Fraction of the smallest unit ignored when flooring or ceiling, absorbs float artifacts like 2.9999999999999996
+GUARD = 1e-6
+
+# Number of decimals used when a symbol has no tick or step size
+DEFAULT_DECIMALS = 8
+
+# Order parameters holding a price or a quantity
+PRICE_KEYS = ("price", "stopPrice")
+QUANTITY_KEYS = ("quantity",)
+
+# Function to find the number of decimals of an exchange filter value
+def count_decimals(value):
+    """
+    Counts the decimals needed to write a filter value exactly, e.g. 2 for "0.01000000".
+
+    Args:
+        value (str): The filter value as sent by the exchange.
+
+    Returns:
+        int: The number of significant decimals.
+    """
+    exponent = Decimal(value).normalize().as_tuple().exponent
+    return max(0, -exponent)
+
+# Class holding the integer scales of one symbol's price and lot filters
+class SymbolRules:
+    """
+    Normalizes prices and quantities of one symbol to its PRICE_FILTER, LOT_SIZE and NOTIONAL filters.
+
+    The filter strings are turned into integers once: a price is held as a count of
+    1 / price_scale units and is always a multiple of the tick, a quantity likewise
+    with the step. Rounding, bounds and the minimum notional are then checked in
+    integer arithmetic, and values are formatted back to exact decimal strings.
+
+    Args:
+        pair (dict): Symbol metadata from symbol_cache.get_symbol or symbol_cache.parse_symbol.
+    """
+    def __init__(self, pair):
+        filters = pair.get("filters", {})
+        price_filter = filters.get("PRICE_FILTER", {})
+        lot_size = filters.get("LOT_SIZE", {})
+        notional = filters.get("NOTIONAL", filters.get("MIN_NOTIONAL", {}))
+
+        self.symbol = pair["symbol"]
+        tick_size = price_filter.get("tickSize", "0")
+        step_size = lot_size.get("stepSize", "0")
+        self.price_decimals = count_decimals(tick_size) if Decimal(tick_size) else DEFAULT_DECIMALS
+        self.quantity_decimals = count_decimals(step_size) if Decimal(step_size) else DEFAULT_DECIMALS
+        self.price_scale = 10 ** self.price_decimals
+        self.quantity_scale = 10 ** self.quantity_decimals
+
+        self.tick = self._to_units(tick_size, self.price_scale) or 1
+        self.step = self._to_units(step_size, self.quantity_scale) or 1
+        # Ticks and steps per whole price or quantity, so rounding is one multiplication
+        self.ticks_per_unit = self.price_scale / self.tick
+        self.steps_per_unit = self.quantity_scale / self.step
+        self.min_price = self._to_units(price_filter.get("minPrice", "0"), self.price_scale)
+        self.max_price = self._to_units(price_filter.get("maxPrice", "0"), self.price_scale)
+        self.min_qty = self._to_units(lot_size.get("minQty", "0"), self.quantity_scale)
+        self.max_qty = self._to_units(lot_size.get("maxQty", "0"), self.quantity_scale)
+        # Notional in units of 1 / (price_scale * quantity_scale), so price units * quantity units compare directly
+        min_notional = Decimal(notional.get("minNotional", "0")) * self.price_scale * self.quantity_scale
+        self.min_notional = int(min_notional.to_integral_value(rounding="ROUND_CEILING"))
+
+    # Function to convert a filter string to integer units
+    @staticmethod
+    def _to_units(value, scale):
+        return int(Decimal(value) * scale)
+
+    # Function to round a value to a whole number of grid steps, given the steps per whole unit
+    @staticmethod
+    def _round_steps(value, steps_per_unit, rounding):
+        if rounding == DOWN:
+            return math.floor(value * steps_per_unit + GUARD)
+        if rounding == UP:
+            return math.ceil(value * steps_per_unit - GUARD)
+        return math.floor(value * steps_per_unit + 0.5)
+
+    # Function to round an array of values to whole numbers of grid steps, given the steps per whole unit
+    @staticmethod
+    def _round_array(values, steps_per_unit, rounding):
+        scaled = values * steps_per_unit
+        if rounding == DOWN:
+            return numpy.floor(scaled + GUARD).astype(numpy.int64)
+        if rounding == UP:
+            return numpy.ceil(scaled - GUARD).astype(numpy.int64)
+        return numpy.floor(scaled + 0.5).astype(numpy.int64)
+
+    # Function to round a price to the tick size
+    def price_units(self, price, rounding=NEAREST):
+        """
+        Rounds a price to the tick size and clamps it to the price filter bounds.
+
+        Args:
+            price (float): The raw price.
+            rounding (str): DOWN, UP or NEAREST.
+
+        Returns:
+            int: The price in units of 1 / price_scale, a multiple of the tick.
+        """
+        units = max(self._round_steps(price, self.ticks_per_unit, rounding) * self.tick, self.min_price, self.tick)
+        return min(units, self.max_price) if self.max_price else units
+
+    # Function to round a quantity to the step size
+    def quantity_units(self, quantity, rounding=DOWN, price_units=None):
+        """
+        Rounds a quantity to the step size, clamps it to the lot size bounds and raises it to the minimum notional.
+
+        A quantity below minQty, or worth less than the minimum notional at price_units,
+        is raised instead of rejected, so the order can spend more than the quote size it
+        was sized from, or sell more than the quantity asked for. Callers that must not
+        exceed a budget or a holding compare the result with their own limit.
+
+        Args:
+            quantity (float): The raw quantity.
+            rounding (str): DOWN, UP or NEAREST.
+            price_units (int): The order price from price_units, enables the minimum notional check.
+
+        Returns:
+            int: The quantity in units of 1 / quantity_scale, a multiple of the step.
+        """
+        units = max(self._round_steps(quantity, self.steps_per_unit, rounding) * self.step, self.min_qty)
+        if price_units and units * price_units < self.min_notional:
+            needed = -(-self.min_notional // price_units)
+            units = -(-needed // self.step) * self.step
+        return min(units, self.max_qty) if self.max_qty else units
+
+    # Function to round arrays of prices and quantities at once
+    def normalize_batch(self, prices, quantities, price_rounding=NEAREST, quantity_rounding=DOWN):
+        """
+        Vectorized price_units and quantity_units over many orders of the symbol.
+
+        Like quantity_units, raises the quantities to minQty and to the minimum notional.
+
+        Args:
+            prices (array-like): Raw prices.
+            quantities (array-like): Raw quantities.
+            price_rounding (str): DOWN, UP or NEAREST for the prices.
+            quantity_rounding (str): DOWN, UP or NEAREST for the quantities.
+
+        Returns:
+            tuple: (price units, quantity units) as numpy int64 arrays.
+        """
+        prices = numpy.asarray(prices, dtype=numpy.float64)
+        quantities = numpy.asarray(quantities, dtype=numpy.float64)
+
+        price_units = self._round_array(prices, self.ticks_per_unit, price_rounding) * self.tick
+        price_units = numpy.maximum(price_units, max(self.min_price, self.tick))
+        if self.max_price:
+            price_units = numpy.minimum(price_units, self.max_price)
+        quantity_units = self._round_array(quantities, self.steps_per_unit, quantity_rounding) * self.step
+        quantity_units = numpy.maximum(quantity_units, self.min_qty)
+        if self.min_notional:
+            needed = -(-self.min_notional // price_units)
+            needed = -(-needed // self.step) * self.step
+            quantity_units = numpy.maximum(quantity_units, needed)
+        if self.max_qty:
+            quantity_units = numpy.minimum(quantity_units, self.max_qty)
+        return price_units, quantity_units
+
+    # Function to write integer units as an exact decimal string
+    @staticmethod
+    def _format(units, decimals):
+        if not decimals:
+            return str(units)
+        whole, fraction = divmod(int(units), 10 ** decimals)
+        return f"{whole}.{fraction:0{decimals}d}"
+
+    # Function to format a price as an exact decimal string
+    def format_price(self, units):
+        return self._format(units, self.price_decimals)
+
+    # Function to format a quantity as an exact decimal string
+    def format_quantity(self, units):
+        return self._format(units, self.quantity_decimals)
+
+    # Function to format arrays of prices and quantities as exact decimal strings
+    def format_batch(self, price_units, quantity_units):
+        """
+        Formats the output of normalize_batch to exact decimal strings.
+
+        Args:
+            price_units (numpy.ndarray): Price units from normalize_batch.
+            quantity_units (numpy.ndarray): Quantity units from normalize_batch.
+
+        Returns:
+            tuple: (prices, quantities) as lists of strings.
+        """
+        price_decimals = self.price_decimals
+        quantity_decimals = self.quantity_decimals
+        prices = [self._format(units, price_decimals) for units in price_units.tolist()]
+        quantities = [self._format(units, quantity_decimals) for units in quantity_units.tolist()]
+        return prices, quantities
+
+    # Function to round a price to the tick size as a float
+    def round_price(self, price, rounding=NEAREST):
+        """
+        Rounds a price to the tick size.
+
+        Args:
+            price (float): The raw price.
+            rounding (str): DOWN, UP or NEAREST.
+
+        Returns:
+            float: The nearest float to the exact tick multiple, prints without artifacts.
+        """
+        return self.price_units(price, rounding) / self.price_scale
+
+    # Function to round a quantity to the step size as a float
+    def round_quantity(self, quantity, price=None, rounding=DOWN):
+        """
+        Rounds a quantity to the step size, raised to minQty, and to the minimum notional when a price is given.
+
+        Args:
+            quantity (float): The raw quantity.
+            price (float): The order price, enables the minimum notional check.
+            rounding (str): DOWN, UP or NEAREST.
+
+        Returns:
+            float: The nearest float to the exact step multiple, prints without artifacts.
+        """
+        price_units = self.price_units(price) if price is not None else None
+        return self.quantity_units(quantity, rounding, price_units) / self.quantity_scale
+
+# Rules built so far, keyed by symbol with the metadata they were built from
+_rules = {}
+
+# Function to get the rules of a symbol, rebuilt when its cached metadata is refreshed
+def get_rules(symbol, pair=None):
+    """
+    Returns the SymbolRules of a symbol, built once per symbol metadata entry.
+
+    Args:
+        symbol (str): The trading symbol (e.g., 'SOLUSDT').
+        pair (dict): Symbol metadata, looked up in symbol_cache if None.
+
+    Returns:
+        SymbolRules: The rules of the symbol.
+    """
+    if pair is None:
+        pair = symbol_cache.get_symbol(symbol)
+    cached = _rules.get(symbol)
+    if cached is not None and cached[0] is pair:
+        return cached[1]
+    rules = SymbolRules(pair)
+    _rules[symbol] = (pair, rules)
+    return rules
+
+# Function to format the prices and quantity of order parameters as exact decimal strings
+def format_params(params, pair=None):
+    """
+    Copies order parameters with their price, stop price and quantity snapped to the symbol filters as strings.
+
+    A quantity under minQty is raised to it rather than rejected, see SymbolRules.quantity_units.
+
+    Args:
+        params (dict): Order parameters with a 'symbol'.
+        pair (dict): Symbol metadata, looked up in symbol_cache if None.
+
+    Returns:
+        dict: The parameters to send to the exchange.
+    """
+    rules = get_rules(params["symbol"], pair)
+    formatted = dict(params)
+    for key in PRICE_KEYS:
+        if formatted.get(key) is not None:
+            formatted[key] = rules.format_price(rules.price_units(float(formatted[key])))
+    for key in QUANTITY_KEYS:
+        if formatted.get(key) is not None:
+            formatted[key] = rules.format_quantity(rules.quantity_units(float(formatted[key])))
+    return formatted
@@ -0,0 +1,314 @@
+import threading
+import time
+from urllib.parse import urlsplit, parse_qs
+from requests.adapters import HTTPAdapter
+import instrumentation
+
+# Default Binance Spot request weight limit per minute and per IP
+DEFAULT_WEIGHT_LIMIT = 6000
+WEIGHT_PERIOD = 60
+
+# Default Binance Spot order limit per 10 seconds and per account
+DEFAULT_ORDER_LIMIT = 100
+ORDER_PERIOD = 10
+
+# Fraction of the limits the governor allows itself, leaving headroom for clock skew
+DEFAULT_SAFETY_MARGIN = 0.9
+
+# Seconds to pause when a 429/418 response carries no Retry-After header
+DEFAULT_BACKOFF = 60
+
+# Request weight of the endpoints used by the bot, keyed by (method, path)
+ENDPOINT_WEIGHTS = {
+    ("GET", "/api/v3/klines"): 2,
+    ("GET", "/api/v3/exchangeInfo"): 20,
+    ("GET", "/api/v3/account"): 20,
+    ("POST", "/api/v3/order"): 1,
+    ("POST", "/api/v3/order/oco"): 1,
+    ("POST", "/api/v3/orderList/oco"): 1,
+    ("POST", "/api/v3/orderList/oto"): 1,
+    ("POST", "/api/v3/orderList/otoco"): 1,
+    ("DELETE", "/api/v3/openOrders"): 1,
+    ("DELETE", "/api/v3/orderList"): 1,
+    ("GET", "/api/v3/time"): 1,
+    ("POST", "/api/v3/userDataStream"): 2,
+    ("PUT", "/api/v3/userDataStream"): 2,
+    ("DELETE", "/api/v3/userDataStream"): 2,
+}
+
+# Weight of GET depth by the largest limit of each tier
+DEPTH_WEIGHTS = ((100, 5), (500, 25), (1000, 50), (5000, 250))
+
+# Weight of GET openOrders with and without a symbol filter
+OPEN_ORDERS_WEIGHT = 6
+OPEN_ORDERS_ALL_SYMBOLS_WEIGHT = 80
+
+# Paths that count against the order rate limit, with the number of orders each request places
+ORDER_COUNTS = {
+    "/api/v3/order": 1,
+    "/api/v3/order/oco": 2,
+    "/api/v3/orderList/oco": 2,
+    "/api/v3/orderList/oto": 2,
+    "/api/v3/orderList/otoco": 3,
+}
+ORDER_PATHS = tuple(ORDER_COUNTS)
+
+# Function to look up the weight of a request
+def request_weight(method, path, query):
+    """
+    Returns the request weight Binance charges for an endpoint.
+
+    Args:
+        method (str): The HTTP method.
+        path (str): The URL path.
+        query (dict): The parsed query string.
+
+    Returns:
+        int: The request weight, 1 for unknown endpoints.
+    """
+    if method == "GET" and path == "/api/v3/openOrders":
+        return OPEN_ORDERS_WEIGHT if "symbol" in query else OPEN_ORDERS_ALL_SYMBOLS_WEIGHT
+    if method == "GET" and path == "/api/v3/depth":
+        limit = int(query.get("limit", ["100"])[0])
+        for largest_limit, weight in DEPTH_WEIGHTS:
+            if limit <= largest_limit:
+                return weight
+        return DEPTH_WEIGHTS[-1][1]
+    return ENDPOINT_WEIGHTS.get((method, path), 1)
+
+# Class refilling a budget continuously over a period
+class TokenBucket:
+    """
+    Token bucket holding up to capacity tokens, refilled at capacity per period.
+
+    Args:
+        capacity (float): The maximum number of tokens.
+        period (float): The number of seconds to refill an empty bucket.
+    """
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        self.tokens -= amount
+
+    def sync_used(self, used, limit):
+        """
+        Lowers the available tokens to what the server says is left of its limit.
+        """
+        self.tokens = min(self.tokens, self.capacity - used * self.capacity / limit)
+
+# Class counting usage in fixed windows aligned to the wall clock
+class FixedWindow:
+    """
+    Usage counter over fixed windows, the way Binance counts its limits.
+
+    Binance resets its counters on wall-clock boundaries (e.g. every minute), so a
+    token bucket alone can spend up to twice the limit across one boundary; this
+    counter caps the spend of each window.
+
+    Args:
+        limit (float): The usage allowed per window.
+        period (float): The window length in seconds.
+    """
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+        self.window = None
+        self.used = 0
+
+    def roll(self, wall_time):
+        window = int(wall_time // self.period)
+        if window != self.window:
+            self.window = window
+            self.used = 0
+
+    def wait_time(self, amount, wall_time):
+        if self.used + amount <= self.limit:
+            return 0.0
+        return (self.window + 1) * self.period - wall_time
+
+    def take(self, amount):
+        self.used += amount
+
+    def sync_used(self, used, limit):
+        """
+        Raises the local count to the usage reported by the server.
+        """
+        self.used = max(self.used, used * self.limit / limit)
+
+# Class scheduling requests under the Binance weight and order limits
+class RateLimitGovernor:
+    """
+    Client-side governor for one Binance host.
+
+    Each request waits for its weight in a shared token bucket, which spreads
+    bursts over the period, and in a fixed-window counter matching the server's
+    own; orders also wait in per-account order buckets. The counters are corrected from the
+    X-MBX-USED-WEIGHT-1M and X-MBX-ORDER-COUNT-10S response headers, and 429/418
+    responses pause every request until their Retry-After has passed.
+
+    Args:
+        weight_limit (int): The request weight allowed per minute.
+        order_limit (int): The orders allowed per 10 seconds per account.
+        safety_margin (float): Fraction of the limits used by the governor.
+        weight_period (float): The seconds the weight limit applies to.
+        order_period (float): The seconds the order limit applies to.
+        sleep (callable): Sleep function, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        weight_limit=DEFAULT_WEIGHT_LIMIT,
+        order_limit=DEFAULT_ORDER_LIMIT,
+        safety_margin=DEFAULT_SAFETY_MARGIN,
+        weight_period=WEIGHT_PERIOD,
+        order_period=ORDER_PERIOD,
+        sleep=time.sleep,
+    ):
+        self.weight_limit = weight_limit
+        self.order_limit = order_limit
+        self.safety_margin = safety_margin
+        self.order_period = order_period
+        self.sleep = sleep
+        self.weight_bucket = TokenBucket(weight_limit * safety_margin, weight_period)
+        self.weight_window = FixedWindow(weight_limit * safety_margin, weight_period)
+        self.order_buckets = {}
+        self.blocked_until = 0.0
+        self.throttled_seconds = 0.0
+        self.rejections = 0
+        self._lock = threading.Lock()
+
+    def _order_bucket(self, api_key):
+        bucket = self.order_buckets.get(api_key)
+        if bucket is None:
+            bucket = TokenBucket(self.order_limit * self.safety_margin, self.order_period)
+            self.order_buckets[api_key] = bucket
+        return bucket
+
+    def acquire(self, weight, is_order=False, api_key=None, orders=1):
+        """
+        Blocks until the request can be sent within the limits, then spends its budget.
+
+        Args:
+            weight (int): The request weight.
+            is_order (bool): Whether the request places an order.
+            api_key (str): The account the order is placed for.
+            orders (int): The number of orders the request places, e.g. 3 for an OTOCO.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wall_time = time.time()
+                self.weight_bucket.refill(now)
+                self.weight_window.roll(wall_time)
+                wait = max(
+                    self.blocked_until - now,
+                    self.weight_bucket.wait_time(weight),
+                    self.weight_window.wait_time(weight, wall_time),
+                )
+                if is_order:
+                    order_bucket = self._order_bucket(api_key)
+                    order_bucket.refill(now)
+                    wait = max(wait, order_bucket.wait_time(orders))
+                if wait <= 0:
+                    self.weight_bucket.take(weight)
+                    self.weight_window.take(weight)
+                    if is_order:
+                        order_bucket.take(orders)
+                    return
+                self.throttled_seconds += wait
+            self.sleep(wait)
+
+    def observe(self, response, api_key=None):
+        """
+        Updates the buckets from the rate limit headers of a response.
+
+        Args:
+            response (requests.Response): The exchange response.
+            api_key (str): The account the request was sent for.
+        """
+        headers = response.headers
+        with self._lock:
+            used_weight = headers.get("X-MBX-USED-WEIGHT-1M")
+            if used_weight is not None:
+                self.weight_bucket.sync_used(int(used_weight), self.weight_limit)
+                self.weight_window.sync_used(int(used_weight), self.weight_limit)
+            order_count = headers.get("X-MBX-ORDER-COUNT-10S")
+            if order_count is not None:
+                self._order_bucket(api_key).sync_used(int(order_count), self.order_limit)
+            if response.status_code in (418, 429):
+                self.rejections += 1
+                retry_after = float(headers.get("Retry-After", DEFAULT_BACKOFF))
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "available_weight": self.weight_bucket.tokens,
+                "throttled_seconds": self.throttled_seconds,
+                "rejections": self.rejections,
+                "blocked": self.blocked_until > time.monotonic(),
+            }
+
+# Class sending requests of a pooled session through a governor
+class GovernedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that waits for the governor before each request and reports each response to it.
+
+    Args:
+        governor (RateLimitGovernor): The governor of the host the session talks to.
+        **kwargs: HTTPAdapter arguments, e.g. pool_maxsize.
+    """
+
+    def __init__(self, governor, **kwargs):
+        self.governor = governor
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        query = parse_qs(url.query)
+        api_key = request.headers.get("X-MBX-APIKEY")
+        is_order = request.method == "POST" and url.path in ORDER_PATHS
+        with instrumentation.span("binance rate limit wait"):
+            self.governor.acquire(
+                request_weight(request.method, url.path, query), is_order, api_key, ORDER_COUNTS.get(url.path, 1)
+            )
+        with instrumentation.span(f"binance {request.method} {url.path}"):
+            response = super().send(request, **kwargs)
+        self.governor.observe(response, api_key)
+        return response
+
+# Governors shared by every client, keyed by base URL since limits apply per host
+_governors = {}
+_governors_lock = threading.Lock()
+
+# Function to get the shared governor of a host
+def get_governor(base_url):
+    """
+    Returns the governor shared by every client talking to base_url.
+    """
+    with _governors_lock:
+        governor = _governors.get(base_url)
+        if governor is None:
+            governor = RateLimitGovernor()
+            _governors[base_url] = governor
+        return governor
+
+# Function to install a governor with custom limits for a host
+def set_governor(base_url, governor):
+    with _governors_lock:
+        _governors[base_url] = governor
@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import collections
+import inspect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import account_state
+import binance_connect
+import execute
+import instrumentation
+import market_stream
+import settings
+
+# Default number of threads shared by every symbol worker
+DEFAULT_WORKERS = 8
+
+# Default number of seconds the account information is shared between decisions
+DEFAULT_ACCOUNT_TTL = 5.0
+
+# Number of latency samples kept per worker
+LATENCY_SAMPLES = 1000
+
+# Class running the decisions of one strategy one at a time
+class SymbolWorker:
+    """
+    Serial queue of the actions of one strategy, drained on a shared executor.
+
+    A worker holds no thread of its own: while it has queued actions it occupies
+    one executor thread, and idle workers cost nothing, so adding symbols does
+    not add threads. An exception only fails the action that raised it.
+
+    Args:
+        strategy_config (dict): The strategy configuration, see execute.DEFAULT_STRATEGY.
+        decide (callable): Runs one decision, called as decide(strategy_config, action).
+        executor (concurrent.futures.Executor): The executor shared by every worker.
+    """
+
+    def __init__(self, strategy_config, decide, executor):
+        self.strategy_config = strategy_config
+        self.decide = decide
+        self.executor = executor
+        self.actions = collections.deque()
+        self.running = False
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        self.counters = collections.Counter()
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def submit(self, action):
+        """
+        Queues an action, scheduling the worker on the executor if it is idle.
+        """
+        with self._lock:
+            self.actions.append((action, instrumentation.current_context()))
+            if self.running:
+                return
+            self.running = True
+            self._idle.clear()
+        self.executor.submit(self._drain)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self.actions:
+                    self.running = False
+                    self._idle.set()
+                    return
+                action, context = self.actions.popleft()
+            # One configuration per action, even if the settings are reloaded while it runs
+            strategy_config = self.strategy_config
+            start = time.perf_counter()
+            try:
+                with instrumentation.attach(context), instrumentation.span("runner.decide"):
+                    self.decide(strategy_config, action)
+                with self._lock:
+                    self.counters["processed"] += 1
+            except Exception as error:
+                with self._lock:
+                    self.counters["failed"] += 1
+                    self.last_error = repr(error)
+                print(f"Error in {strategy_config['Symbol']} {action}: {error}")
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+
+    def wait(self, timeout=None):
+        return self._idle.wait(timeout)
+
+    def metrics(self):
+        """
+        Returns the worker's counters and decision latency percentiles in seconds.
+        """
+        latencies = sorted(self.latencies)
+        with self._lock:
+            result = {"queued": len(self.actions)}
+            result.update(self.counters)
+        if latencies:
+            result["latency_p50"] = latencies[len(latencies) // 2]
+            result["latency_p99"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            result["latency_max"] = latencies[-1]
+        if self.last_error is not None:
+            result["last_error"] = self.last_error
+        return result
+
+# Class running several symbol/strategy configurations side by side
+class StrategyRunner:
+    """
+    Runs every configured strategy in its own SymbolWorker.
+
+    The workers share the process-wide caches: candles from market_stream,
+    symbol metadata from symbol_cache, order books from order_book and the
+    account from account_state, or, when the account is not streamed, one
+    account lookup refreshed at most every account_ttl seconds.
+
+    Args:
+        strategies (list): Strategy configurations, see execute.DEFAULT_STRATEGY.
+        project_settings (dict): Project-specific settings.
+        workers (int): The number of threads shared by the symbol workers.
+        account_ttl (float): Seconds an account lookup is reused.
+        decide (callable): Replaces execute.execute_strategy_async, called as
+            decide(strategy_config, action, project_settings, account). A coroutine
+            it returns is run to completion on the worker's thread.
+    """
+
+    def __init__(
+        self,
+        strategies,
+        project_settings,
+        workers=DEFAULT_WORKERS,
+        account_ttl=DEFAULT_ACCOUNT_TTL,
+        decide=execute.execute_strategy_async,
+    ):
+        self.project_settings = project_settings
+        self.account_ttl = account_ttl
+        self.decide = decide
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="strategy")
+        self.workers = {}
+        for entry in strategies:
+            strategy_config = execute.parse_strategy(entry)
+            key = (strategy_config["Symbol"], strategy_config["Timeframe"])
+            self.workers[key] = SymbolWorker(strategy_config, self._decide, self.executor)
+        self._account = None
+        self._account_expiry = 0.0
+        self._account_lock = threading.Lock()
+
+    def get_account(self):
+        """
+        Returns the account information, querying it once per account_ttl for every worker.
+        """
+        state = account_state.get_state()
+        if state is not None:
+            return state.account()
+        with self._account_lock:
+            if self._account is None or time.monotonic() >= self._account_expiry:
+                keys = self.project_settings["BinanceKeys"]
+                self._account = binance_connect.query_account(
+                    keys["API_KEY"], keys["SECRET_KEY"], binance_connect.get_trading_base_url(self.project_settings)
+                )
+                self._account_expiry = time.monotonic() + self.account_ttl
+            return self._account
+
+    def _decide(self, strategy_config, action):
+        result = self.decide(strategy_config, action, self.project_settings, self.get_account())
+        # The async decision requests its prices, symbol and candles concurrently, each worker thread runs its own loop
+        if inspect.iscoroutine(result):
+            return asyncio.run(result)
+        return result
+
+    def update_settings(self, project_settings):
+        """
+        Applies reloaded settings without stopping the workers.
+
+        Decisions already running finish with the settings they started with.
+        Workers of strategies still configured get their new configuration,
+        new strategies get a worker and removed ones stop taking actions once
+        their queued actions are done. New (symbol, timeframe) pairs are not
+        streamed until start_stream is called again.
+
+        Args:
+            project_settings (dict): The reloaded project-specific settings.
+
+        Returns:
+            list: The (symbol, timeframe) keys added.
+        """
+        strategies = project_settings.get("Strategies") or [execute.DEFAULT_STRATEGY]
+        workers = {}
+        added = []
+        for entry in strategies:
+            strategy_config = execute.parse_strategy(entry)
+            key = (strategy_config["Symbol"], strategy_config["Timeframe"])
+            worker = self.workers.get(key)
+            if worker is None:
+                worker = SymbolWorker(strategy_config, self._decide, self.executor)
+                added.append(key)
+            else:
+                worker.strategy_config = strategy_config
+            workers[key] = worker
+        with self._account_lock:
+            if project_settings["BinanceKeys"] != self.project_settings["BinanceKeys"]:
+                self._account = None
+            self.project_settings = project_settings
+        self.workers = workers
+        return added
+
+    def subscriptions(self):
+        return list(self.workers)
+
+    def start_stream(self, **kwargs):
+        """
+        Streams the candles of every configured (symbol, timeframe) into the shared buffers.
+        """
+        return market_stream.start_stream(self.subscriptions(), **kwargs)
+
+    def dispatch(self, action, symbol=None):
+        """
+        Queues an action on every worker, or on the workers of one symbol.
+
+        Args:
+            action (str): 'buy' or 'sell'.
+            symbol (str): Restricts the action to one symbol, None for every strategy.
+        """
+        for (worker_symbol, _), worker in self.workers.items():
+            if symbol is None or worker_symbol == symbol:
+                worker.submit(action)
+
+    def wait(self, timeout=None):
+        """
+        Blocks until every worker has no queued action, at most timeout seconds in total.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in self.workers.values():
+            worker.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def metrics(self):
+        """
+        Returns the metrics of every worker keyed by 'SYMBOL timeframe'.
+        """
+        return {f"{symbol} {timeframe}": worker.metrics() for (symbol, timeframe), worker in self.workers.items()}
+
+    def stop(self, timeout=None):
+        """
+        Waits for the queued actions, at most timeout seconds in total, then shuts the executor down.
+        """
+        self.wait(timeout)
+        self.executor.shutdown(wait=timeout is None)
+
+# Function to build a runner from the "Strategies" list of the settings
+def from_settings(project_settings, **kwargs):
+    """
+    Creates a StrategyRunner for the "Strategies" settings list, or the default SOLUSDT strategy.
+
+    Args:
+        project_settings (dict): Project-specific settings.
+        **kwargs: Extra StrategyRunner arguments.
+
+    Returns:
+        StrategyRunner: The runner, with no actions queued.
+    """
+    strategies = project_settings.get("Strategies") or [execute.DEFAULT_STRATEGY]
+    return StrategyRunner(strategies, project_settings, **kwargs)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run every configured strategy once")
+    parser.add_argument("action", choices=["buy", "sell"])
+    parser.add_argument("--settings", default=settings.DEFAULT_PATH)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    project_settings = settings.load(args.settings)
+    strategy_runner = from_settings(project_settings, workers=args.workers)
+    strategy_runner.dispatch(args.action)
+    strategy_runner.stop()
+    for name, metrics in strategy_runner.metrics().items():
+        print(name, metrics)
@@ -0,0 +1,113 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy
+import pandas
+import market_stream
+
+# Column order of the OHLCV axis of the candle array
+OHLCV_FIELDS = ("open", "high", "low", "close", "volume")
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(len(OHLCV_FIELDS))
+
+# Default number of concurrent kline requests
+DEFAULT_WORKERS = 16
+
+# Function to fetch candles for many symbols into one 3-D array
+def fetch_candle_array(symbols, timeframe, number_of_candles, workers=DEFAULT_WORKERS):
+    """
+    Fetches candles for many symbols concurrently and stacks them.
+
+    The requests go through the pooled clients of binance_connect, whose rate
+    limit governor keeps the burst within the Binance request weight limits.
+
+    Args:
+        symbols (list): The trading symbols.
+        timeframe (str): The candlestick timeframe (e.g., '1h').
+        number_of_candles (int): The number of candles per symbol.
+        workers (int): The number of concurrent requests.
+
+    Returns:
+        tuple: A (symbol, candle, OHLCV) float array, oldest candle first, and a
+        boolean mask of the symbols that returned enough candles.
+    """
+    candles = numpy.full((len(symbols), number_of_candles, len(OHLCV_FIELDS)), numpy.nan)
+    complete = numpy.zeros(len(symbols), dtype=bool)
+
+    def fetch(index):
+        try:
+            columns = market_stream.get_candle_columns(symbols[index], timeframe, number_of_candles)
+        except Exception as error:
+            print(f"Error: {symbols[index]}: {error}")
+            return
+        if len(columns["close"]) < number_of_candles:
+            return
+        for position, field in enumerate(OHLCV_FIELDS):
+            candles[index, :, position] = columns[field][-number_of_candles:]
+        complete[index] = True
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(fetch, range(len(symbols))))
+
+    return candles, complete
+
+# Function to evaluate the consecutive-candle rule over a 3-D candle array
+def scan_candle_array(symbols, candles, percentage_change, candle_color, complete=None):
+    """
+    Finds the symbols whose candles are all of one color with a minimum change each.
+
+    This is the rule of strategy.determine_trade_event evaluated for every symbol
+    in one vectorized pass. For red candles the size of the drop is compared with
+    percentage_change.
+
+    Args:
+        symbols (list): The trading symbols, one per row of candles.
+        candles (numpy.ndarray): A (symbol, candle, OHLCV) array.
+        percentage_change (float): The minimum open to close change of every candle.
+        candle_color (str): 'Green' or 'Red'.
+        complete (numpy.ndarray): Optional boolean mask of the usable rows.
+
+    Returns:
+        pandas.DataFrame: The matching symbols ranked by their weakest candle change.
+    """
+    opens = candles[:, :, OPEN]
+    closes = candles[:, :, CLOSE]
+    changes = (closes - opens) / opens
+
+    if candle_color == "Green":
+        same_color = opens < closes
+        strength = changes
+    else:
+        same_color = opens >= closes
+        strength = -changes
+
+    hits = numpy.all(same_color, axis=1) & numpy.all(strength >= percentage_change, axis=1)
+    if complete is not None:
+        hits &= complete
+
+    indexes = numpy.flatnonzero(hits)
+    result = pandas.DataFrame(
+        {
+            "symbol": numpy.asarray(symbols, dtype=object)[indexes],
+            "min_change": strength[indexes].min(axis=1),
+            "mean_change": strength[indexes].mean(axis=1),
+            "last_close": closes[indexes, -1],
+        }
+    )
+    return result.sort_values("min_change", ascending=False, ignore_index=True)
+
+# Function to scan many symbols for consecutive-candle trade events
+def scan_symbols(symbols, timeframe, percentage_change, candle_color, number_of_candles=3, workers=DEFAULT_WORKERS):
+    """
+    Fetches candles for all symbols and returns those meeting the trading condition.
+
+    Args:
+        symbols (list): The trading symbols.
+        timeframe (str): The candlestick timeframe (e.g., '1h').
+        percentage_change (float): The minimum change of every candle.
+        candle_color (str): 'Green' or 'Red'.
+        number_of_candles (int): The number of consecutive candles required.
+        workers (int): The number of concurrent requests.
+
+    Returns:
+        pandas.DataFrame: The matching symbols ranked by their weakest candle change.
+    """
+    candles, complete = fetch_candle_array(symbols, timeframe, number_of_candles, workers)
+    return scan_candle_array(symbols, candles, percentage_change, candle_color, complete)
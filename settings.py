@@ -0,0 +1,382 @@
+import collections.abc
+import json
+import os
+import threading
+import time
+import types
+from dotenv import dotenv_values
+
+# Default location of the JSON settings file
+DEFAULT_PATH = "settings.json"
+
+# Default location of the .env file merged into the settings
+DEFAULT_ENV_PATH = ".env"
+
+# Default number of seconds between checks of the settings files for changes
+DEFAULT_POLL_INTERVAL = 2.0
+
+# Spellings of the Binance keys accepted in settings.json, by canonical name
+KEY_ALIASES = {
+    "API_KEY": ("API_KEY", "API_Key", "api_key"),
+    "SECRET_KEY": ("SECRET_KEY", "Secret_Key", "SECRET_Key", "secret_key"),
+}
+
+# Environment variables overriding settings.json, by settings path
+ENV_OVERRIDES = {
+    ("BinanceKeys", "API_KEY"): "BINANCE_API_KEY",
+    ("BinanceKeys", "SECRET_KEY"): "BINANCE_API_SECRET",
+    ("BaseUrl",): "BINANCE_BASE_URL",
+    ("MarketDataBaseUrl",): "BINANCE_MARKET_DATA_URL",
+}
+
+# Tokens of execute.DEFAULT_STRATEGY, read by execute_analysis_and_trade whatever the strategies
+REQUIRED_TOKENS = ("SOL", "USDT", "BUSD")
+
+# Token pairs of a strategy that does not name its own, as in execute.DEFAULT_STRATEGY
+DEFAULT_PAIRS = {"ReferencePair": ("SOL", "USDT"), "CurrentPair": ("BUSD", "USDT")}
+
+# Timeframe of a strategy that does not name its own, as in execute.DEFAULT_STRATEGY
+DEFAULT_TIMEFRAME = "1h"
+
+# Numeric fields of a strategy entry
+STRATEGY_NUMBERS = ("PercentageChange", "NumberOfCandles", "QuoteSize")
+
+# Class carrying every problem found in the settings files
+class SettingsError(Exception):
+    def __init__(self, path, problems):
+        super().__init__(f"Invalid settings in {path}: " + "; ".join(problems))
+        self.path = path
+        self.problems = problems
+
+# Function to make a parsed JSON value read-only
+def freeze(value):
+    if isinstance(value, dict):
+        return types.MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+# Class holding one validated, read-only snapshot of the settings
+class Settings(collections.abc.Mapping):
+    """
+    Validated settings.json merged with the .env values, read like the project_settings dict.
+
+    The Binance keys are stored under their canonical names 'API_KEY' and 'SECRET_KEY'
+    whatever their spelling in settings.json, and the nested values are read-only, so a
+    snapshot handed to a trade cannot change while the trade runs. The main values are
+    also exposed as attributes.
+
+    Args:
+        data (dict): The merged and normalized settings.
+        path (str): The settings file the snapshot was loaded from.
+        version (int): Incremented each time the settings are reloaded.
+    """
+
+    def __init__(self, data, path=DEFAULT_PATH, version=1):
+        self._data = freeze(data)
+        self.path = path
+        self.version = version
+        self.loaded_at = time.time()
+        self.base_url = data.get("BaseUrl")
+        self.market_data_base_url = data.get("MarketDataBaseUrl")
+        self.api_key = data["BinanceKeys"]["API_KEY"]
+        self.secret_key = data["BinanceKeys"]["SECRET_KEY"]
+        self.tokens = self._data["Tokens"]
+        self.strategies = self._data.get("Strategies", ())
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"Settings(path={self.path!r}, version={self.version}, strategies={len(self.strategies)})"
+
+# Function to read settings.json and merge the .env values into it
+def read_settings(path=DEFAULT_PATH, env_path=DEFAULT_ENV_PATH):
+    """
+    Reads the settings file and applies the .env overrides, with the Binance keys renamed to their canonical names.
+
+    Values in the .env file take precedence over the process environment, so an
+    edited .env applies on the next reload.
+
+    Args:
+        path (str): The JSON settings file.
+        env_path (str): The .env file, skipped when missing.
+
+    Returns:
+        dict: The merged settings.
+    """
+    try:
+        with open(path, "r") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        raise SettingsError(path, ["file not found"])
+    except json.JSONDecodeError as error:
+        raise SettingsError(path, [f"invalid JSON: {error}"])
+    if not isinstance(data, dict):
+        raise SettingsError(path, ["the top level must be an object"])
+
+    keys = data.get("BinanceKeys") or {}
+    canonical = {}
+    for name, aliases in KEY_ALIASES.items():
+        canonical[name] = next((keys[alias] for alias in aliases if keys.get(alias)), "")
+    data["BinanceKeys"] = canonical
+
+    environment = dict(os.environ)
+    if env_path and os.path.exists(env_path):
+        environment.update({key: value for key, value in dotenv_values(env_path).items() if value is not None})
+    for settings_path, variable in ENV_OVERRIDES.items():
+        value = environment.get(variable)
+        if value:
+            target = data
+            for key in settings_path[:-1]:
+                target = target.setdefault(key, {})
+            target[settings_path[-1]] = value
+    return data
+
+# Function to list the problems of merged settings
+def validate(data, require_keys=True):
+    """
+    Checks the merged settings for missing keys and wrongly typed values.
+
+    Args:
+        data (dict): Settings from read_settings.
+        require_keys (bool): Whether empty Binance keys are a problem.
+
+    Returns:
+        list: One message per problem, empty when the settings are valid.
+    """
+    problems = []
+    if require_keys:
+        for name, variable in (("API_KEY", "BINANCE_API_KEY"), ("SECRET_KEY", "BINANCE_API_SECRET")):
+            if not data["BinanceKeys"].get(name):
+                problems.append(f"BinanceKeys.{name} is empty, set it in settings.json or {variable} in .env")
+    for name in ("BaseUrl", "MarketDataBaseUrl"):
+        value = data.get(name)
+        if value is not None and not (isinstance(value, str) and value.startswith(("http://", "https://"))):
+            problems.append(f"{name} must be an http(s) URL")
+
+    tokens = data.get("Tokens")
+    if not isinstance(tokens, dict):
+        problems.append("Tokens must be an object of token name to address")
+        tokens = {}
+    needed = set(REQUIRED_TOKENS)
+
+    strategies = data.get("Strategies", [])
+    if not isinstance(strategies, list):
+        problems.append("Strategies must be a list")
+        strategies = []
+    # The runner has one worker per (symbol, timeframe), a second entry would replace the first
+    seen = {}
+    for index, entry in enumerate(strategies):
+        where = f"Strategies[{index}]"
+        if not isinstance(entry, dict):
+            problems.append(f"{where} must be an object")
+            continue
+        if not isinstance(entry.get("Symbol"), str) or not entry["Symbol"]:
+            problems.append(f"{where}.Symbol is missing")
+        else:
+            key = (entry["Symbol"].upper(), entry.get("Timeframe", DEFAULT_TIMEFRAME))
+            if key in seen:
+                problems.append(f"{where} repeats the Symbol and Timeframe of Strategies[{seen[key]}], {key[0]} {key[1]}")
+            else:
+                seen[key] = index
+        for field in STRATEGY_NUMBERS:
+            value = entry.get(field)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0):
+                problems.append(f"{where}.{field} must be a positive number")
+        for field, default in DEFAULT_PAIRS.items():
+            pair = entry.get(field, default)
+            if not isinstance(pair, (list, tuple)) or len(pair) != 2:
+                problems.append(f"{where}.{field} must name two tokens")
+                continue
+            needed.update(pair)
+    for name in sorted(needed):
+        if not tokens.get(name):
+            problems.append(f"Tokens.{name} is missing")
+    return problems
+
+# Function to read and validate the settings files
+def load_settings(path=DEFAULT_PATH, env_path=DEFAULT_ENV_PATH, require_keys=True, version=1):
+    """
+    Reads, merges and validates the settings, raising on the first load instead of at the first trade.
+
+    Args:
+        path (str): The JSON settings file.
+        env_path (str): The .env file.
+        require_keys (bool): Whether empty Binance keys are an error.
+        version (int): The version of the returned snapshot.
+
+    Returns:
+        Settings: The validated snapshot.
+    """
+    data = read_settings(path, env_path)
+    problems = validate(data, require_keys)
+    if problems:
+        raise SettingsError(path, problems)
+    return Settings(data, path, version)
+
+# Class reloading the settings when their files change
+class SettingsWatcher:
+    """
+    Polls the modification times of the settings and .env files and swaps in a new snapshot when they change.
+
+    The new snapshot is validated before the swap; an invalid file is reported and
+    the previous snapshot stays in use. The swap replaces one reference, so a trade
+    that already holds a snapshot finishes with it.
+
+    Args:
+        path (str): The JSON settings file.
+        env_path (str): The .env file.
+        interval (float): Seconds between checks.
+        require_keys (bool): Whether empty Binance keys are an error.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, env_path=DEFAULT_ENV_PATH, interval=DEFAULT_POLL_INTERVAL, require_keys=True):
+        self.path = path
+        self.env_path = env_path
+        self.interval = interval
+        self.require_keys = require_keys
+        self.counters = collections.Counter()
+        self.last_error = None
+        self._stamps = self._read_stamps()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _read_stamps(self):
+        # The inode changes when a file is replaced by a rename, even within one mtime tick
+        stamps = []
+        for file_path in (self.path, self.env_path):
+            try:
+                status = os.stat(file_path)
+                stamps.append((status.st_mtime_ns, status.st_size, status.st_ino))
+            except (OSError, TypeError):
+                stamps.append(None)
+        return stamps
+
+    def start(self):
+        self._thread = threading.Thread(target=self._watch, name="settings-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """
+        Reloads the settings if a file changed since the last check.
+
+        Returns:
+            bool: True if a new snapshot was swapped in.
+        """
+        stamps = self._read_stamps()
+        if stamps == self._stamps:
+            return False
+        self._stamps = stamps
+        previous = _current
+        version = previous.version + 1 if previous is not None else 1
+        try:
+            snapshot = load_settings(self.path, self.env_path, self.require_keys, version)
+        except SettingsError as error:
+            self.counters["rejected"] += 1
+            self.last_error = str(error)
+            print(f"Settings not reloaded: {error}")
+            return False
+        _swap(snapshot)
+        self.counters["reloads"] += 1
+        print(f"Settings reloaded from {self.path} (version {version})")
+        return True
+
+    def metrics(self):
+        snapshot = _current
+        result = {"version": snapshot.version if snapshot is not None else None, "last_error": self.last_error}
+        result.update(self.counters)
+        return result
+
+# Snapshot read by current(), replaced whole on every reload
+_current = None
+
+# Callbacks told about every new snapshot
+_listeners = []
+
+# Watcher started by start_watching, None when the files are not watched
+_watcher = None
+
+# Function to replace the current snapshot and notify the listeners
+def _swap(snapshot):
+    global _current
+    _current = snapshot
+    for listener in list(_listeners):
+        try:
+            listener(snapshot)
+        except Exception as error:
+            print(f"Settings listener failed: {error}")
+
+# Function to load the settings once at startup
+def load(path=DEFAULT_PATH, env_path=DEFAULT_ENV_PATH, require_keys=True):
+    """
+    Loads and validates the settings and makes them the current snapshot.
+
+    Raises:
+        SettingsError: When a file is missing or a value is invalid.
+    """
+    snapshot = load_settings(path, env_path, require_keys)
+    _swap(snapshot)
+    return snapshot
+
+# Function to get the current settings snapshot
+def current():
+    """
+    Returns the current snapshot, loading settings.json on first use.
+
+    Read it once per trade and pass it along, so the whole trade sees one version.
+    """
+    snapshot = _current
+    if snapshot is None:
+        snapshot = load()
+    return snapshot
+
+# Function to register a callback receiving every new snapshot
+def add_listener(listener):
+    """
+    Calls listener(snapshot) on every swap, and now with the current snapshot if one is loaded.
+    """
+    _listeners.append(listener)
+    if _current is not None:
+        listener(_current)
+
+# Function to start reloading the settings when their files change
+def start_watching(interval=DEFAULT_POLL_INTERVAL, require_keys=True):
+    """
+    Watches the files of the current snapshot and swaps in new snapshots as they change.
+
+    Returns:
+        SettingsWatcher: The running watcher.
+    """
+    global _watcher
+    snapshot = current()
+    _watcher = SettingsWatcher(snapshot.path, DEFAULT_ENV_PATH, interval, require_keys)
+    _watcher.start()
+    return _watcher
+
+# Function to stop watching the settings files
+def stop_watching():
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
+
+# Function to get the running watcher
+def get_watcher():
+    return _watcher
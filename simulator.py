@@ -0,0 +1,1004 @@
+import argparse
+import base64
+import hashlib
+import itertools
+import json
+import random
+import socketserver
+import struct
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Default port the simulator listens on
+DEFAULT_PORT = 8008
+
+# Default starting balances of the simulated account
+DEFAULT_BALANCES = {"USDT": "10000", "SOL": "100"}
+
+# Number of milliseconds in each kline interval served by the simulator
+INTERVAL_MS = {
+    "1s": 1000,
+    "1m": 60000,
+    "3m": 180000,
+    "5m": 300000,
+    "15m": 900000,
+    "30m": 1800000,
+    "1h": 3600000,
+    "2h": 7200000,
+    "4h": 14400000,
+    "6h": 21600000,
+    "8h": 28800000,
+    "12h": 43200000,
+    "1d": 86400000,
+    "3d": 259200000,
+    "1w": 604800000,
+}
+
+# Order types accepted by the matching engine, and those that rest without a trigger
+ORDER_TYPES = ("LIMIT", "LIMIT_MAKER", "STOP_LOSS_LIMIT", "TAKE_PROFIT_LIMIT")
+LIMIT_TYPES = ("LIMIT", "LIMIT_MAKER")
+
+# Class carrying a Binance-style error response
+class SimulatorError(Exception):
+    def __init__(self, code, msg, status=400):
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+        self.status = status
+
+# Function to check a value against a filter step
+def is_multiple(value, step):
+    return step == 0 or (value % step) == 0
+
+# Class matching orders against a settable market price
+class MatchingEngine:
+    """
+    In-memory matching engine for the Spot order types used by the bot.
+
+    LIMIT orders fill at once when marketable and rest otherwise. STOP_LOSS_LIMIT
+    and TAKE_PROFIT_LIMIT orders wait for their stopPrice (or, for trailing stops,
+    their trailingDelta in basis points from the best price since placement) and
+    then behave as LIMIT orders. LIMIT_MAKER orders are rejected when they would
+    take. Fills happen at the limit price, against the simulated account balances.
+
+    Order lists follow the Binance rules: the two legs of an OCO share one lock
+    and the fill of one expires the other; the pending pair of an OTOCO is placed
+    when its working order fills; canceling any order of a list cancels the list.
+
+    Args:
+        symbols (list): exchange_info symbol entries.
+        prices (dict): Starting market price per symbol.
+        balances (dict): Starting free balance per asset.
+    """
+
+    def __init__(self, symbols, prices=None, balances=None):
+        self.symbols = {entry["symbol"]: entry for entry in symbols}
+        self.filters = {
+            entry["symbol"]: {f["filterType"]: f for f in entry.get("filters", [])} for entry in symbols
+        }
+        self.prices = {symbol: Decimal(str(price)) for symbol, price in (prices or {}).items()}
+        self.balances = {
+            asset: {"free": Decimal(amount), "locked": Decimal(0)}
+            for asset, amount in (balances or DEFAULT_BALANCES).items()
+        }
+        self.open_orders = {}
+        self.orders_by_symbol = {}
+        self.order_ids = itertools.count(1)
+        self.order_lists = {}
+        self.order_list_ids = itertools.count(1)
+        self.trade_ids = itertools.count(1)
+        self.listeners = []
+        self.listen_keys = set()
+        self.lock = threading.Lock()
+
+    def _balance(self, asset):
+        return self.balances.setdefault(asset, {"free": Decimal(0), "locked": Decimal(0)})
+
+    def add_listener(self, listener):
+        """
+        Registers a callback receiving the user data stream events of the account.
+
+        Listeners are called as listener(event) with executionReport and
+        outboundAccountPosition events, in order, while the engine lock is held.
+        """
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def _publish(self, order, execution_type, assets):
+        if not self.listeners:
+            return
+        now = int(time.time() * 1000)
+        filled = execution_type == "TRADE"
+        report = {
+            "e": "executionReport",
+            "E": now,
+            "s": order["symbol"],
+            "c": order["clientOrderId"],
+            "S": order["side"],
+            "o": order["type"],
+            "f": order["timeInForce"],
+            "q": f"{order['quantity']:f}",
+            "p": f"{order['price']:f}",
+            "P": f"{order['stopPrice']:f}" if order["stopPrice"] is not None else "0",
+            "C": order["clientOrderId"] if execution_type == "CANCELED" else "",
+            "x": execution_type,
+            "X": order["status"],
+            "r": "NONE",
+            "i": order["orderId"],
+            "l": f"{order['quantity']:f}" if filled else "0",
+            "z": f"{order['executedQty']:f}",
+            "L": f"{order['price']:f}" if filled else "0",
+            "n": "0",
+            "N": None,
+            "T": order["updateTime"],
+            "t": next(self.trade_ids) if filled else -1,
+            "O": order["time"],
+            "Z": f"{order['executedQty'] * order['price']:f}",
+            "Y": f"{order['quantity'] * order['price']:f}" if filled else "0",
+            "g": order["orderListId"],
+        }
+        position = {
+            "e": "outboundAccountPosition",
+            "E": now,
+            "u": order["updateTime"],
+            "B": [
+                {"a": asset, "f": f"{self.balances[asset]['free']:f}", "l": f"{self.balances[asset]['locked']:f}"}
+                for asset in assets
+            ],
+        }
+        for listener in self.listeners:
+            listener(report)
+            listener(position)
+
+    def _assets(self, order):
+        entry = self.symbols[order["symbol"]]
+        return (entry["baseAsset"], entry["quoteAsset"])
+
+    def _validate(self, symbol, quantity, price):
+        filters = self.filters[symbol]
+        lot_size = filters.get("LOT_SIZE")
+        if lot_size is not None:
+            if quantity < Decimal(lot_size["minQty"]) or quantity > Decimal(lot_size["maxQty"]):
+                raise SimulatorError(-1013, "Filter failure: LOT_SIZE")
+            if not is_multiple(quantity - Decimal(lot_size["minQty"]), Decimal(lot_size["stepSize"])):
+                raise SimulatorError(-1013, "Filter failure: LOT_SIZE")
+        price_filter = filters.get("PRICE_FILTER")
+        if price_filter is not None and price is not None:
+            if price < Decimal(price_filter["minPrice"]) or price > Decimal(price_filter["maxPrice"]):
+                raise SimulatorError(-1013, "Filter failure: PRICE_FILTER")
+            if not is_multiple(price - Decimal(price_filter["minPrice"]), Decimal(price_filter["tickSize"])):
+                raise SimulatorError(-1013, "Filter failure: PRICE_FILTER")
+
+    def _lock_amount(self, order):
+        entry = self.symbols[order["symbol"]]
+        if order["side"] == "BUY":
+            return entry["quoteAsset"], order["quantity"] * order["price"]
+        return entry["baseAsset"], order["quantity"]
+
+    def _lock_funds(self, orders):
+        # The legs of an OCO share one lock, sized for the leg that needs the most
+        asset, amount = max((self._lock_amount(order) for order in orders), key=lambda lock: lock[1])
+        balance = self._balance(asset)
+        if balance["free"] < amount:
+            raise SimulatorError(-2010, "Account has insufficient balance for requested action.")
+        balance["free"] -= amount
+        balance["locked"] += amount
+        lock = [asset, amount]
+        for order in orders:
+            order["locked"] = lock
+
+    def _release_funds(self, order):
+        lock = order["locked"]
+        if lock is None:
+            return
+        balance = self._balance(lock[0])
+        balance["locked"] -= lock[1]
+        balance["free"] += lock[1]
+        lock[1] = Decimal(0)
+
+    def _fill(self, order):
+        entry = self.symbols[order["symbol"]]
+        asset, amount = order["locked"]
+        order["locked"][1] = Decimal(0)
+        self._balance(asset)["locked"] -= amount
+        if order["side"] == "BUY":
+            spent = order["quantity"] * order["price"]
+            self._balance(entry["baseAsset"])["free"] += order["quantity"]
+        else:
+            spent = order["quantity"]
+            self._balance(entry["quoteAsset"])["free"] += order["quantity"] * order["price"]
+        # A shared OCO lock can exceed what the filled leg spends
+        self._balance(asset)["free"] += amount - spent
+        order["status"] = "FILLED"
+        order["executedQty"] = order["quantity"]
+        order["updateTime"] = int(time.time() * 1000)
+        self._remove(order)
+        self._publish(order, "TRADE", self._assets(order))
+        if order["orderListId"] != -1:
+            self._finish_list_order(order)
+
+    def _close(self, order, status):
+        self._release_funds(order)
+        order["status"] = status
+        order["updateTime"] = int(time.time() * 1000)
+        self._remove(order)
+        self._publish(order, status, (order["locked"][0],) if order["locked"] is not None else ())
+
+    def _remove(self, order):
+        self.open_orders.pop(order["orderId"], None)
+        self.orders_by_symbol.get(order["symbol"], {}).pop(order["orderId"], None)
+
+    def _is_marketable(self, order, market):
+        if order["side"] == "BUY":
+            return market <= order["price"]
+        return market >= order["price"]
+
+    def _is_triggered(self, order, market):
+        if order.get("trailingDelta") is not None:
+            delta = order["trailingDelta"] / Decimal(10000)
+            if order["side"] == "BUY":
+                order["best"] = min(order["best"], market)
+                return market >= order["best"] * (1 + delta)
+            order["best"] = max(order["best"], market)
+            return market <= order["best"] * (1 - delta)
+        stop_price = order["stopPrice"]
+        rising = (order["type"] == "STOP_LOSS_LIMIT") == (order["side"] == "BUY")
+        return market >= stop_price if rising else market <= stop_price
+
+    def _match(self, order, market):
+        # Orders filled, canceled or expired earlier in the same price move are skipped
+        if market is None or order["status"] != "NEW":
+            return
+        if order["type"] not in LIMIT_TYPES and not order["triggered"]:
+            if not self._is_triggered(order, market):
+                return
+            order["triggered"] = True
+        if self._is_marketable(order, market):
+            self._fill(order)
+
+    def _make_order(self, symbol, side, order_type, quantity, price, stop_price=None, trailing_delta=None,
+                    time_in_force="GTC", client_order_id=None, order_list_id=-1):
+        if symbol not in self.symbols:
+            raise SimulatorError(-1121, "Invalid symbol.")
+        if order_type not in ORDER_TYPES:
+            raise SimulatorError(-1116, "Invalid orderType.")
+        if quantity is None or price is None:
+            raise SimulatorError(-1102, "Mandatory parameter 'quantity' or 'price' was not sent.")
+        if order_type not in LIMIT_TYPES and stop_price is None and trailing_delta is None:
+            raise SimulatorError(-1102, "Mandatory parameter 'stopPrice' or 'trailingDelta' was not sent.")
+        quantity = Decimal(quantity)
+        price = Decimal(price)
+        self._validate(symbol, quantity, price)
+        market = self.prices.get(symbol)
+        now = int(time.time() * 1000)
+        return {
+            "symbol": symbol,
+            "orderId": next(self.order_ids),
+            "clientOrderId": client_order_id or f"sim-{time.time_ns()}",
+            "side": side,
+            "type": order_type,
+            "timeInForce": time_in_force or "GTC",
+            "quantity": quantity,
+            "price": price,
+            "stopPrice": Decimal(stop_price) if stop_price is not None else None,
+            "trailingDelta": int(trailing_delta) if trailing_delta is not None else None,
+            "best": market if market is not None else price,
+            "triggered": False,
+            "status": "NEW",
+            "executedQty": Decimal(0),
+            "time": now,
+            "updateTime": now,
+            "orderListId": order_list_id,
+            "locked": None,
+        }
+
+    def _open(self, orders):
+        """
+        Puts orders on the book, sharing one lock when they are the legs of an OCO.
+        """
+        self._lock_funds(orders)
+        for order in orders:
+            order["status"] = "NEW"
+            self.open_orders[order["orderId"]] = order
+            self.orders_by_symbol.setdefault(order["symbol"], {})[order["orderId"]] = order
+            self._publish(order, "NEW", (order["locked"][0],))
+        market = self.prices.get(orders[0]["symbol"])
+        for order in orders:
+            self._match(order, market)
+
+    def _reject_if_taker(self, order):
+        market = self.prices.get(order["symbol"])
+        if order["type"] == "LIMIT_MAKER" and market is not None and self._is_marketable(order, market):
+            raise SimulatorError(-2010, "Order would immediately match and take.")
+
+    def new_order(self, params):
+        """
+        Places an order and matches it against the current market price.
+
+        Args:
+            params (dict): The order request parameters.
+
+        Returns:
+            dict: The order in the Binance response format.
+        """
+        with self.lock:
+            order = self._make_order(
+                params.get("symbol"),
+                params.get("side"),
+                params.get("type"),
+                params.get("quantity"),
+                params.get("price"),
+                params.get("stopPrice"),
+                params.get("trailingDelta"),
+                params.get("timeInForce"),
+                params.get("newClientOrderId"),
+            )
+            self._reject_if_taker(order)
+            self._open([order])
+            return format_order(order)
+
+    def _leg(self, params, prefix, symbol, side, quantity, order_list_id):
+        return self._make_order(
+            symbol,
+            side,
+            params[f"{prefix}Type"],
+            quantity,
+            params.get(f"{prefix}Price"),
+            params.get(f"{prefix}StopPrice"),
+            params.get(f"{prefix}TrailingDelta"),
+            params.get(f"{prefix}TimeInForce"),
+            params.get(f"{prefix}ClientOrderId"),
+            order_list_id,
+        )
+
+    def _check_oco_prices(self, above, below, reference):
+        # The above leg must trigger above the reference price and the below leg under it
+        above_price = above["stopPrice"] if above["stopPrice"] is not None else above["price"]
+        below_price = below["stopPrice"] if below["stopPrice"] is not None else below["price"]
+        if reference is not None and not above_price > reference > below_price:
+            raise SimulatorError(-2010, "The relationship of the prices for the orders is not correct.")
+
+    def _new_list(self, symbol, contingency_type, params, orders, working=None, pending=()):
+        order_list = {
+            "orderListId": orders[0]["orderListId"],
+            "contingencyType": contingency_type,
+            "listStatusType": "EXEC_STARTED",
+            "listOrderStatus": "EXECUTING",
+            "listClientOrderId": params.get("listClientOrderId", f"sim-list-{time.time_ns()}"),
+            "transactionTime": int(time.time() * 1000),
+            "symbol": symbol,
+            "orders": orders,
+            "working": working,
+            "pending": list(pending),
+        }
+        self.order_lists[order_list["orderListId"]] = order_list
+        return order_list
+
+    def new_oco(self, params):
+        """
+        Places an OCO pair: when one leg fills the other expires.
+
+        Args:
+            params (dict): The POST /api/v3/orderList/oco parameters; the legs must be
+                LIMIT_MAKER or STOP_LOSS_LIMIT orders.
+
+        Returns:
+            dict: The order list in the Binance response format.
+        """
+        with self.lock:
+            symbol = params.get("symbol")
+            order_list_id = next(self.order_list_ids)
+            above = self._leg(params, "above", symbol, params["side"], params["quantity"], order_list_id)
+            below = self._leg(params, "below", symbol, params["side"], params["quantity"], order_list_id)
+            self._check_oco_prices(above, below, self.prices.get(symbol))
+            order_list = self._new_list(symbol, "OCO", params, [above, below])
+            self._open([above, below])
+            return format_order_list(order_list)
+
+    def new_otoco(self, params):
+        """
+        Places a working order whose fill places a pending OCO pair.
+
+        Args:
+            params (dict): The POST /api/v3/orderList/otoco parameters.
+
+        Returns:
+            dict: The order list in the Binance response format.
+        """
+        with self.lock:
+            symbol = params.get("symbol")
+            order_list_id = next(self.order_list_ids)
+            working = self._leg(
+                params, "working", symbol, params["workingSide"], params["workingQuantity"], order_list_id
+            )
+            above = self._leg(
+                params, "pendingAbove", symbol, params["pendingSide"], params["pendingQuantity"], order_list_id
+            )
+            below = self._leg(
+                params, "pendingBelow", symbol, params["pendingSide"], params["pendingQuantity"], order_list_id
+            )
+            self._check_oco_prices(above, below, working["price"])
+            self._reject_if_taker(working)
+            for leg in (above, below):
+                leg["status"] = "PENDING_NEW"
+            order_list = self._new_list(symbol, "OTO", params, [working, above, below], working, (above, below))
+            self._open([working])
+            return format_order_list(order_list)
+
+    def _finish_list_order(self, order):
+        order_list = self.order_lists[order["orderListId"]]
+        if order is order_list["working"]:
+            # The filled working order places the pending pair, which then behaves as an OCO
+            pending, order_list["pending"] = order_list["pending"], []
+            try:
+                self._open(pending)
+            except SimulatorError:
+                for leg in pending:
+                    self._close(leg, "EXPIRED")
+            return
+        for sibling in order_list["orders"]:
+            if sibling is not order and sibling["status"] in ("NEW", "PENDING_NEW"):
+                self._close(sibling, "EXPIRED")
+        order_list["listStatusType"] = "ALL_DONE"
+        order_list["listOrderStatus"] = "ALL_DONE"
+
+    def _cancel_list(self, order_list):
+        for order in order_list["orders"]:
+            if order["status"] == "NEW":
+                self._close(order, "CANCELED")
+            elif order["status"] == "PENDING_NEW":
+                self._close(order, "EXPIRED")
+        order_list["pending"] = []
+        order_list["listStatusType"] = "ALL_DONE"
+        order_list["listOrderStatus"] = "ALL_DONE"
+
+    def cancel_order_list(self, symbol, order_list_id):
+        with self.lock:
+            order_list = self.order_lists.get(int(order_list_id))
+            if order_list is None or order_list["symbol"] != symbol:
+                raise SimulatorError(-2011, "Order list does not exist.")
+            if order_list["listOrderStatus"] == "ALL_DONE":
+                raise SimulatorError(-2011, "Order list is already done.")
+            self._cancel_list(order_list)
+            return format_order_list(order_list)
+
+    def cancel_order(self, symbol, order_id):
+        """
+        Cancels one order; canceling an order of a list cancels the whole list, as on Binance.
+        """
+        with self.lock:
+            order = self.open_orders.get(int(order_id))
+            if order is None or order["symbol"] != symbol:
+                raise SimulatorError(-2011, "Unknown order sent.")
+            if order["orderListId"] != -1:
+                self._cancel_list(self.order_lists[order["orderListId"]])
+            else:
+                self._close(order, "CANCELED")
+            return format_order(order)
+
+    def set_price(self, symbol, price):
+        """
+        Moves the market price of a symbol and matches its open orders.
+
+        Returns:
+            list: The orders filled by the move.
+        """
+        with self.lock:
+            market = Decimal(str(price))
+            self.prices[symbol] = market
+            filled = []
+            for order in list(self.orders_by_symbol.get(symbol, {}).values()):
+                self._match(order, market)
+                if order["status"] == "FILLED":
+                    filled.append(format_order(order))
+            return filled
+
+    def cancel_open_orders(self, symbol):
+        with self.lock:
+            canceled = []
+            for order in list(self.orders_by_symbol.get(symbol, {}).values()):
+                if order["status"] != "NEW":
+                    continue
+                if order["orderListId"] != -1:
+                    self._cancel_list(self.order_lists[order["orderListId"]])
+                else:
+                    self._close(order, "CANCELED")
+                canceled.append(format_order(order))
+            return canceled
+
+    def get_open_orders(self, symbol=None):
+        with self.lock:
+            if symbol is None:
+                orders = self.open_orders.values()
+            else:
+                orders = self.orders_by_symbol.get(symbol, {}).values()
+            return [format_order(order) for order in orders]
+
+    def account(self):
+        with self.lock:
+            return {
+                "canTrade": True,
+                "canWithdraw": True,
+                "canDeposit": True,
+                "accountType": "SPOT",
+                "updateTime": int(time.time() * 1000),
+                "balances": [
+                    {"asset": asset, "free": str(balance["free"]), "locked": str(balance["locked"])}
+                    for asset, balance in self.balances.items()
+                ],
+            }
+
+    def new_listen_key(self):
+        with self.lock:
+            listen_key = f"sim-{time.time_ns():x}"
+            self.listen_keys.add(listen_key)
+            return {"listenKey": listen_key}
+
+    def renew_listen_key(self, listen_key):
+        with self.lock:
+            if listen_key not in self.listen_keys:
+                raise SimulatorError(-1125, "This listenKey does not exist.")
+            return {}
+
+    def close_listen_key(self, listen_key):
+        with self.lock:
+            self.listen_keys.discard(listen_key)
+            return {}
+
+    def klines(self, symbol, interval, limit):
+        """
+        Returns a deterministic random walk of candles ending at the current price.
+        """
+        interval_ms = INTERVAL_MS.get(interval, 60000)
+        limit = min(int(limit), 1000)
+        last_open = int(time.time() * 1000) // interval_ms * interval_ms
+        generator = random.Random(f"{symbol}-{interval}-{last_open}")
+        close = float(self.prices.get(symbol, 1))
+        candles = []
+        for index in range(limit):
+            open_price = close / (1 + generator.gauss(0, 0.002))
+            open_time = last_open - index * interval_ms
+            candles.append([
+                open_time,
+                f"{open_price:.8f}",
+                f"{max(open_price, close) * 1.001:.8f}",
+                f"{min(open_price, close) * 0.999:.8f}",
+                f"{close:.8f}",
+                "100.00000000",
+                open_time + interval_ms - 1,
+                f"{100 * close:.8f}",
+                100,
+                "50.00000000",
+                f"{50 * close:.8f}",
+                "0",
+            ])
+            close = open_price
+        candles.reverse()
+        return candles
+
+# Function to convert an engine order to the Binance response format
+def format_order(order):
+    return {
+        "symbol": order["symbol"],
+        "orderId": order["orderId"],
+        "orderListId": order["orderListId"],
+        "clientOrderId": order["clientOrderId"],
+        "transactTime": order["updateTime"],
+        "price": f"{order['price']:f}",
+        "origQty": f"{order['quantity']:f}",
+        "executedQty": f"{order['executedQty']:f}",
+        "status": order["status"],
+        "timeInForce": order["timeInForce"],
+        "type": order["type"],
+        "side": order["side"],
+        "stopPrice": f"{order['stopPrice']:f}" if order["stopPrice"] is not None else "0",
+        "time": order["time"],
+        "updateTime": order["updateTime"],
+    }
+
+# Function to convert an engine order list to the Binance response format
+def format_order_list(order_list):
+    return {
+        "orderListId": order_list["orderListId"],
+        "contingencyType": order_list["contingencyType"],
+        "listStatusType": order_list["listStatusType"],
+        "listOrderStatus": order_list["listOrderStatus"],
+        "listClientOrderId": order_list["listClientOrderId"],
+        "transactionTime": order_list["transactionTime"],
+        "symbol": order_list["symbol"],
+        "orders": [
+            {"symbol": order["symbol"], "orderId": order["orderId"], "clientOrderId": order["clientOrderId"]}
+            for order in order_list["orders"]
+        ],
+        "orderReports": [format_order(order) for order in order_list["orders"]],
+    }
+
+# Class routing Spot REST requests to the matching engine
+class SimulatorHandler(BaseHTTPRequestHandler):
+    """
+    Serves the subset of the Spot REST API used by the bot, plus /sim/price to move prices.
+    User data stream events are delivered in process, see FakeUserDataStream.
+
+    Request signatures are not verified.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _params(self, url):
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            params.update({key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()})
+        return params
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self, method):
+        url = urlparse(self.path)
+        params = self._params(url)
+        engine = self.server.engine
+        routes = {
+            ("GET", "/api/v3/ping"): lambda: {},
+            ("GET", "/api/v3/time"): lambda: {"serverTime": int(time.time() * 1000)},
+            ("GET", "/sapi/v1/system/status"): lambda: {"status": 0, "msg": "normal"},
+            ("GET", "/api/v3/exchangeInfo"): lambda: {
+                "timezone": "UTC",
+                "serverTime": int(time.time() * 1000),
+                "symbols": list(engine.symbols.values()),
+            },
+            ("GET", "/api/v3/klines"): lambda: engine.klines(
+                params["symbol"], params["interval"], params.get("limit", 500)
+            ),
+            ("GET", "/api/v3/account"): engine.account,
+            ("POST", "/api/v3/order"): lambda: engine.new_order(params),
+            ("DELETE", "/api/v3/order"): lambda: engine.cancel_order(params["symbol"], params["orderId"]),
+            ("POST", "/api/v3/orderList/oco"): lambda: engine.new_oco(params),
+            ("POST", "/api/v3/orderList/otoco"): lambda: engine.new_otoco(params),
+            ("DELETE", "/api/v3/orderList"): lambda: engine.cancel_order_list(params["symbol"], params["orderListId"]),
+            ("GET", "/api/v3/openOrders"): lambda: engine.get_open_orders(params.get("symbol")),
+            ("DELETE", "/api/v3/openOrders"): lambda: engine.cancel_open_orders(params["symbol"]),
+            ("POST", "/api/v3/userDataStream"): engine.new_listen_key,
+            ("PUT", "/api/v3/userDataStream"): lambda: engine.renew_listen_key(params["listenKey"]),
+            ("DELETE", "/api/v3/userDataStream"): lambda: engine.close_listen_key(params["listenKey"]),
+            ("POST", "/sim/price"): lambda: engine.set_price(params["symbol"], params["price"]),
+        }
+        route = routes.get((method, url.path))
+        try:
+            if route is None:
+                raise SimulatorError(-1, f"Unsupported endpoint {method} {url.path}", status=404)
+            self._send(200, route())
+        except SimulatorError as error:
+            self._send(error.status, {"code": error.code, "msg": error.msg})
+        except KeyError as error:
+            self._send(400, {"code": -1102, "msg": f"Mandatory parameter {error} was not sent."})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PUT(self):
+        self._route("PUT")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+# Class delivering the engine's account events like a user data websocket stream
+class FakeUserDataStream:
+    """
+    In-process stand-in for the user data stream of a listen key.
+
+    Events are serialized to JSON and passed to on_message(None, message), the
+    callback signature of the websocket client. expire() sends listenKeyExpired
+    and invalidates the key, as Binance does when a key is not renewed. drop()
+    ends the stream as a lost connection would.
+
+    Args:
+        engine (MatchingEngine): The engine whose events are streamed.
+        listen_key (str): The listen key the stream was opened with.
+        on_message (callable): Called as on_message(None, message).
+        on_close (callable): Called with no arguments by drop().
+    """
+
+    def __init__(self, engine, listen_key, on_message, on_close=None):
+        self.engine = engine
+        self.listen_key = listen_key
+        self.on_message = on_message
+        self.on_close = on_close
+        engine.add_listener(self._send)
+
+    def _send(self, event):
+        if self.listen_key in self.engine.listen_keys:
+            self.on_message(None, json.dumps(event))
+
+    def expire(self):
+        with self.engine.lock:
+            self.engine.listen_keys.discard(self.listen_key)
+        self.on_message(None, json.dumps({"e": "listenKeyExpired", "E": int(time.time() * 1000), "listenKey": self.listen_key}))
+
+    def drop(self):
+        self.stop()
+        if self.on_close is not None:
+            self.on_close()
+
+    def stop(self):
+        self.engine.remove_listener(self._send)
+
+# Function to build a stream factory for account_state.AccountState
+def user_data_stream_factory(engine, streams=None):
+    """
+    Returns a stream_factory opening FakeUserDataStreams on the engine.
+
+    Args:
+        engine (MatchingEngine): The engine whose events are streamed.
+        streams (list): Receives every opened stream, e.g. to expire or drop it.
+    """
+
+    def open_stream(listen_key, on_message, on_close=None):
+        stream = FakeUserDataStream(engine, listen_key, on_message, on_close)
+        if streams is not None:
+            streams.append(stream)
+        return stream
+
+    return open_stream
+
+# GUID appended to the client key in the websocket handshake, from RFC 6455
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Websocket frame opcodes used by the kline stream
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+# Function to convert a candle to the "k" object of a kline stream event
+def candle_to_kline(symbol, interval, candle, closed):
+    return {
+        "t": candle["time"],
+        "T": candle["close_time"],
+        "s": symbol,
+        "i": interval,
+        "o": f"{candle['open']:.8f}",
+        "c": f"{candle['close']:.8f}",
+        "h": f"{candle['high']:.8f}",
+        "l": f"{candle['low']:.8f}",
+        "v": f"{candle['volume']:.8f}",
+        "n": candle["number_of_trades"],
+        "x": closed,
+        "q": f"{candle['quote_asset_volume']:.8f}",
+        "V": f"{candle['taker_buy_base_asset_volume']:.8f}",
+        "Q": f"{candle['taker_buy_quote_asset_volume']:.8f}",
+        "B": "0",
+    }
+
+# Class serving one websocket connection of the fake kline stream
+class KlineStreamHandler(socketserver.StreamRequestHandler):
+    """
+    Speaks the subset of RFC 6455 used by the Binance websocket client: the handshake,
+    unfragmented text frames, ping and close. SUBSCRIBE and UNSUBSCRIBE requests
+    change the streams the connection receives.
+    """
+
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.streams = set()
+        self.send_lock = threading.Lock()
+        self.combined = False
+
+    def handle(self):
+        request_line = self.rfile.readline().decode("latin-1")
+        headers = {}
+        while True:
+            line = self.rfile.readline().decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if "sec-websocket-key" not in headers:
+            self.wfile.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return
+        accept = base64.b64encode(hashlib.sha1((headers["sec-websocket-key"] + WEBSOCKET_GUID).encode()).digest())
+        self.wfile.write(
+            b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+        )
+        # /stream wraps every event as {"stream": ..., "data": ...}, /ws sends it bare
+        self.combined = request_line.split(" ")[1].startswith("/stream")
+        self.server.add_connection(self)
+        try:
+            while True:
+                frame = self.read_frame()
+                if frame is None:
+                    return
+                opcode, payload = frame
+                if opcode == OPCODE_TEXT:
+                    self.handle_request(json.loads(payload))
+                elif opcode == OPCODE_PING:
+                    self.send_frame(OPCODE_PONG, payload)
+                elif opcode == OPCODE_CLOSE:
+                    self.send_frame(OPCODE_CLOSE, payload[:2])
+                    return
+        except (OSError, ValueError):
+            return
+        finally:
+            self.server.remove_connection(self)
+
+    def read_frame(self):
+        header = self.rfile.read(2)
+        if len(header) < 2:
+            return None
+        opcode = header[0] & 0x0F
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self.rfile.read(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self.rfile.read(8))[0]
+        # Client frames are always masked
+        mask = self.rfile.read(4) if header[1] & 0x80 else b"\0\0\0\0"
+        payload = bytearray(self.rfile.read(length))
+        for index in range(len(payload)):
+            payload[index] ^= mask[index % 4]
+        return opcode, bytes(payload)
+
+    def send_frame(self, opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        with self.send_lock:
+            self.wfile.write(header + payload)
+
+    def handle_request(self, request):
+        streams = request.get("params") or []
+        if request.get("method") == "SUBSCRIBE":
+            self.streams.update(streams)
+        elif request.get("method") == "UNSUBSCRIBE":
+            self.streams.difference_update(streams)
+        self.send_frame(OPCODE_TEXT, json.dumps({"result": None, "id": request.get("id")}).encode())
+
+    def send_event(self, stream, event):
+        if stream not in self.streams:
+            return
+        message = {"stream": stream, "data": event} if self.combined else event
+        try:
+            self.send_frame(OPCODE_TEXT, json.dumps(message).encode())
+        except OSError:
+            pass
+
+# Class serving kline events to websocket clients like the Binance market data stream
+class KlineStreamServer(socketserver.ThreadingTCPServer):
+    """
+    Local stand-in for the kline websocket streams, for market_stream.MarketDataStream.
+
+    Candles are pushed with push_kline, as an update of the open candle or as its
+    final, closed version; every connection subscribed to the pair receives them.
+    drop_connections closes every socket, as a network failure would.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, KlineStreamHandler)
+        self.connections = set()
+        self.connections_lock = threading.Lock()
+
+    def add_connection(self, handler):
+        with self.connections_lock:
+            self.connections.add(handler)
+
+    def remove_connection(self, handler):
+        with self.connections_lock:
+            self.connections.discard(handler)
+
+    def subscriber_count(self, symbol, interval):
+        stream = f"{symbol.lower()}@kline_{interval}"
+        with self.connections_lock:
+            return sum(stream in handler.streams for handler in self.connections)
+
+    def push_kline(self, symbol, interval, candle, closed):
+        """
+        Sends a kline event to the connections subscribed to the pair.
+
+        Args:
+            symbol (str): The trading symbol (e.g., 'SOLUSDT').
+            interval (str): The kline interval (e.g., '1m').
+            candle (dict): The candle in the get_candlestick_data format.
+            closed (bool): Whether this is the final update of the candle.
+        """
+        event = {
+            "e": "kline",
+            "E": int(time.time() * 1000),
+            "s": symbol,
+            "k": candle_to_kline(symbol, interval, candle, closed),
+        }
+        stream = f"{symbol.lower()}@kline_{interval}"
+        with self.connections_lock:
+            handlers = list(self.connections)
+        for handler in handlers:
+            handler.send_event(stream, event)
+
+    def drop_connections(self):
+        with self.connections_lock:
+            handlers = list(self.connections)
+        for handler in handlers:
+            try:
+                handler.connection.shutdown(2)
+            except OSError:
+                pass
+
+# Function to start the fake kline stream in a background thread
+def start_kline_stream(port=0):
+    """
+    Starts a KlineStreamServer.
+
+    Args:
+        port (int): The port to listen on, 0 picks a free port.
+
+    Returns:
+        tuple: The running server and its base URL, the stream_url of MarketDataStream.
+    """
+    server = KlineStreamServer(("127.0.0.1", port))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"ws://127.0.0.1:{server.server_address[1]}"
+
+# Function to start the simulator in a background thread
+def start_simulator(symbols, prices=None, balances=None, port=0):
+    """
+    Starts the exchange simulator.
+
+    Args:
+        symbols (list): exchange_info symbol entries.
+        prices (dict): Starting market price per symbol.
+        balances (dict): Starting free balance per asset.
+        port (int): The port to listen on, 0 picks a free port.
+
+    Returns:
+        tuple: The running server and its base URL.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), SimulatorHandler)
+    server.daemon_threads = True
+    server.engine = MatchingEngine(symbols, prices, balances)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Binance Spot exchange simulator")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--symbols-file", default="sol_pair.json", help="exchange_info symbol entries to serve")
+    parser.add_argument("--price", action="append", default=[], help="starting price as SYMBOL=PRICE")
+    args = parser.parse_args()
+
+    with open(args.symbols_file, "r") as file:
+        symbols = json.load(file)
+    prices = dict(item.split("=") for item in args.price)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), SimulatorHandler)
+    server.engine = MatchingEngine(symbols, prices)
+    print(f"Simulator listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -1,12 +1,27 @@
 # Import necessary libraries
+import os
 import pandas
 import numpy
-import binance_connect
-import time
+import indicators
+import instrumentation
+import market_stream
+import order_book
+import order_filters
+import scanner
+import symbol_cache
 import requests
 
+# Base URL of the token price endpoints served by moralis/app.py
+PRICE_SERVICE_URL = os.getenv("PRICE_SERVICE_URL", "http://localhost:5002")
+
+# Seconds to wait for the price endpoints before giving up on a decision
+PRICE_REQUEST_TIMEOUT = 10.0
+
+# In-process price lookup installed by the app serving the price endpoints, see set_price_source
+_price_source = None
+
 # Function to convert Binance candlestick data to a Pandas DataFrame
-def get_and_transform_data(symbol, timeframe, number_of_candles):
+def get_and_transform_data(symbol, timeframe, number_of_candles, get_candles=None):
     """
     Retrieve and transform candlestick data from Binance into a DataFrame.
 
@@ -14,13 +29,29 @@ def get_and_transform_data(symbol, timeframe, number_of_candles):
         symbol (str): The trading symbol (e.g., 'SOLUSDT').
         timeframe (str): The timeframe for the candlestick data (e.g., '1h', '1d').
         number_of_candles (int): The number of candles to retrieve.
+        get_candles (callable): Candle source, defaults to market_stream.get_candles.
 
     Returns:
         pandas.DataFrame: Transformed candlestick data with added columns.
     """
-    # Retrieve raw candlestick data from Binance
-    raw_data = binance_connect.get_candlestick_data(symbol, timeframe, number_of_candles)
+    get_candles = get_candles or market_stream.get_candles
+
+    # Retrieve raw candlestick data, from the streamed buffer when available
+    raw_data = get_candles(symbol, timeframe, number_of_candles)
+
+    return transform_data(raw_data)
+
+# Function to convert candle dictionaries to a Pandas DataFrame
+def transform_data(raw_data):
+    """
+    Transform candle dictionaries into a DataFrame with a candle color column.
+
+    Args:
+        raw_data (list): Candles in the get_candlestick_data format.
 
+    Returns:
+        pandas.DataFrame: Transformed candlestick data with added columns.
+    """
     # Transform the raw data into a DataFrame
     df = pandas.DataFrame(raw_data)
 
@@ -33,7 +64,45 @@ def get_and_transform_data(symbol, timeframe, number_of_candles):
 
     return df
 
+# Function to retrieve candlestick data as a columnar DataFrame
+def get_and_transform_columns(symbol, timeframe, number_of_candles, get_columns=None):
+    """
+    Retrieve candlestick data as columns and wrap them in a DataFrame.
+
+    This is the columnar counterpart of get_and_transform_data: the candles are
+    parsed straight into NumPy columns and the color is the boolean 'is_green'
+    column instead of 'Green'/'Red' strings.
+
+    Args:
+        symbol (str): The trading symbol (e.g., 'SOLUSDT').
+        timeframe (str): The timeframe for the candlestick data (e.g., '1h', '1d').
+        number_of_candles (int): The number of candles to retrieve.
+        get_columns (callable): Column source, defaults to market_stream.get_candle_columns.
+
+    Returns:
+        pandas.DataFrame: Candlestick data with an 'is_green' column.
+    """
+    get_columns = get_columns or market_stream.get_candle_columns
+    return transform_columns(get_columns(symbol, timeframe, number_of_candles))
+
+# Function to wrap candle columns in a DataFrame without copying them
+def transform_columns(columns):
+    """
+    Build a DataFrame over candle columns, reinterpreting the millisecond timestamps in place.
+
+    Args:
+        columns (dict): Columns in the get_candlestick_columns format.
+
+    Returns:
+        pandas.DataFrame: Candlestick data with an 'is_green' column.
+    """
+    columns = dict(columns)
+    columns["time"] = columns["time"].view("datetime64[ms]")
+    columns["close_time"] = columns["close_time"].view("datetime64[ms]")
+    return pandas.DataFrame(columns, copy=False)
+
 # Function to get the price of a token based on its address and blockchain chain
+@instrumentation.timed()
 def get_token_price(address, chain):
     """
     Get the price of a token based on its address and blockchain chain.
@@ -45,15 +114,44 @@ def get_token_price(address, chain):
     Returns:
         float: The price of the token in USD.
     """
-    # Make an API request to retrieve token price data
-    url = f"http://localhost:5002/getPrice?address={address}&chain={chain}"
-    response = requests.get(url)
-    data = response.json()
+    return get_token_prices([address], chain)[address]
+
+# Function to resolve token prices in-process instead of over PRICE_SERVICE_URL
+def set_price_source(get_prices):
+    """
+    Installs the price lookup used by get_token_prices, None restores the HTTP requests.
 
-    # Extract the USD price from the response
-    usd_price = data["usdPrice"]
+    Args:
+        get_prices (callable): Called as get_prices(addresses, chain), returns the
+            /getPrices response: the price result of each address, keyed by address.
+    """
+    global _price_source
+    _price_source = get_prices
 
-    return usd_price
+# Function to get the prices of several tokens in one request
+@instrumentation.timed()
+def get_token_prices(addresses, chain):
+    """
+    Get the prices of several tokens on the same blockchain chain in one request.
+
+    Args:
+        addresses (list): The tokens' addresses.
+        chain (str): The blockchain chain (e.g., 'Ethereum', 'Binance Smart Chain').
+
+    Returns:
+        dict: The price of each token in USD, keyed by address.
+    """
+    if _price_source is not None:
+        # Same cache as the endpoints, without a request to our own listener
+        data = _price_source(addresses, chain)
+    else:
+        # Make a single API request for all the token prices
+        url = f"{PRICE_SERVICE_URL}/getPrices?addresses={','.join(addresses)}&chain={chain}"
+        response = requests.get(url, timeout=PRICE_REQUEST_TIMEOUT)
+        data = response.json()
+
+    # Extract the USD price of each token from the response
+    return {address: data[address]["usdPrice"] for address in addresses}
 
 # Function to check the pair relation
 def check_pair_relation(address1, address2, chain):
@@ -68,12 +166,25 @@ def check_pair_relation(address1, address2, chain):
     Returns:
         float: The ratio of the prices of the two tokens.
     """
-    price1 = get_token_price(address1, chain)
-    price2 = get_token_price(address2, chain)
+    return check_pair_relations([(address1, address2)], chain)[0]
 
-    ratio = price1 / price2
+# Function to check the relation of several pairs with one price request
+@instrumentation.timed()
+def check_pair_relations(pairs, chain):
+    """
+    Check the price ratios of several token pairs, fetching every price in one batched request.
 
-    return ratio
+    Args:
+        pairs (list): (address1, address2) tuples.
+        chain (str): The blockchain chain (e.g., 'Ethereum', 'Binance Smart Chain').
+
+    Returns:
+        list: The ratio of the prices of each pair.
+    """
+    addresses = list(dict.fromkeys(address for pair in pairs for address in pair))
+    prices = get_token_prices(addresses, chain)
+
+    return [prices[address1] / prices[address2] for address1, address2 in pairs]
 
 # Function to check the current ratio relative to a reference ratio
 def check_ratio_relation(current_ratio, reference_ratio):
@@ -93,55 +204,36 @@ def check_ratio_relation(current_ratio, reference_ratio):
         return True
 
 # Function to check for consecutive price increases or decreases
-def determine_trade_event(symbol, timeframe, percentage_change, candle_color):
+@instrumentation.timed()
+def determine_trade_event(symbol, timeframe, percentage_change, candle_color, get_candles=None, number_of_candles=3):
     """
     Check for consecutive candlesticks with the same color and percentage changes to trigger trades.
 
+    The candles are fed to an indicators.ConsecutiveCounter, the same rule the
+    scanner and the backtester evaluate over arrays, so a red candle counts
+    when its drop is at least percentage_change.
+
     Args:
         symbol (str): The trading symbol (e.g., 'SOLUSDT').
         timeframe (str): The timeframe for candlestick data (e.g., '1h', '1d').
         percentage_change (float): The minimum percentage change required to trigger a trade.
         candle_color (str): The color of candlesticks to be considered ('Green' or 'Red').
+        get_candles (callable): Candle source, defaults to market_stream.get_candles.
+        number_of_candles (int): The number of consecutive candles required.
 
     Returns:
         bool: True if trading conditions are met, otherwise False.
     """
-    candlestick_data = get_and_transform_data(symbol, timeframe, 3)
-
-    if (
-        candlestick_data.loc[0, "RedOrGreen"] == candle_color
-        and candlestick_data.loc[1, "RedOrGreen"] == candle_color
-        and candlestick_data.loc[2, "RedOrGreen"] == candle_color
-    ):
-        change_one = determine_percentage_change(
-            candlestick_data.loc[0, "open"], candlestick_data.loc[0, "close"]
-        )
-        change_two = determine_percentage_change(
-            candlestick_data.loc[1, "open"], candlestick_data.loc[1, "close"]
-        )
-        change_three = determine_percentage_change(
-            candlestick_data.loc[2, "open"], candlestick_data.loc[2, "close"]
-        )
-
-        if candle_color == "Red":
-            print(f'First Drop: {change_one}')
-            print(f'Second Drop: {change_two}')
-            print(f'Third Drop: {change_three}')
-        elif candle_color == "Green":
-            print(f'First Increase: {change_one}')
-            print(f'Second Increase: {change_two}')
-            print(f'Third Increase: {change_three}')
-
-        if (
-            change_one >= percentage_change
-            and change_two >= percentage_change
-            and change_three >= percentage_change
-        ):
-            return True
-        else:
-            return False
-    else:
-        return False
+    get_candles = get_candles or market_stream.get_candles
+    candles = get_candles(symbol, timeframe, number_of_candles)
+
+    counter = indicators.ConsecutiveCounter(percentage_change, candle_color)
+    movement = "Drop" if candle_color == "Red" else "Increase"
+    for position, candle in enumerate(candles):
+        counter.update_candle(candle)
+        print(f'Candle {position + 1} {movement}: {determine_percentage_change(candle["open"], candle["close"])}')
+
+    return counter.value >= number_of_candles
 
 # Function to calculate percentage change between two prices
 def determine_percentage_change(close_previous, close_current):
@@ -158,6 +250,7 @@ def determine_percentage_change(close_previous, close_current):
     return (close_current - close_previous) / close_previous
 
 # Function to analyze symbols based on specified trading conditions
+@instrumentation.timed()
 def analyze_symbols(symbol_dataframe, timeframe, percentage, type):
     """
     Analyze trading symbols based on specific trading conditions.
@@ -171,67 +264,91 @@ def analyze_symbols(symbol_dataframe, timeframe, percentage, type):
     Returns:
         bool: True if trading conditions are met for at least one symbol, otherwise False.
     """
-    for index in symbol_dataframe.index:
-        if type == "buy":
-            analysis = determine_trade_event(
-                symbol_dataframe.loc[index],
-                timeframe,
-                percentage,
-                "Green",
-            )
-            if analysis:
-                print(f'{symbol_dataframe["symbol"][index]} has 3 consecutive rises')
-            else:
-                print(
-                    f'{symbol_dataframe["symbol"][index]} does not have 3 consecutive rises'
-                )
-            time.sleep(1)
-            return analysis
-        elif type == "sell":
-            analysis = determine_trade_event(
-                symbol_dataframe["symbol"][index],
-                timeframe=timeframe,
-                percentage_change=percentage,
-                candle_color="Red",
-            )
-            if analysis:
-                print(f'{symbol_dataframe["symbol"][index]} has 3 consecutive drops')
-            else:
-                print(
-                    f'{symbol_dataframe["symbol"][index]} does not have 3 consecutive drops'
-                )
-            time.sleep(1)
-            return analysis
+    symbols = list(symbol_dataframe["symbol"])
+    candle_color = "Green" if type == "buy" else "Red"
+    movement = "rises" if type == "buy" else "drops"
+
+    # Evaluate every symbol in one vectorized pass over concurrently fetched candles
+    hits = scanner.scan_symbols(symbols, timeframe, percentage, candle_color)
+    matched = set(hits["symbol"])
+    for symbol in symbols:
+        if symbol in matched:
+            print(f"{symbol} has 3 consecutive {movement}")
+        else:
+            print(f"{symbol} does not have 3 consecutive {movement}")
+
+    return len(matched) > 0
+
+# Function to price an order from the local order book
+def price_from_order_book(side, quote_size, pair, book):
+    """
+    Set the limit price of an order to the worst book level needed to fill it.
+
+    Args:
+        side (str): 'BUY' or 'SELL'.
+        quote_size (float): The order size in the quote asset.
+        pair (dict): Symbol metadata from symbol_cache.get_symbol.
+        book (order_book.LocalOrderBook): The local book of the symbol.
+
+    Returns:
+        tuple: (price, quantity), or None if the book cannot fill the order.
+    """
+    reference_price = book.best_ask() if side == "BUY" else book.best_bid()
+    if reference_price is None:
+        return None
+    rules = order_filters.get_rules(pair["symbol"], pair)
+    quantity = rules.round_quantity(quote_size / reference_price, reference_price)
+
+    estimate = book.estimate_fill(side, quantity)
+    if estimate is None or not estimate["complete"]:
+        return None
+    print(f'Expected {side} fill: {estimate["average_price"]}, slippage: {estimate["slippage"]}')
+
+    # Round away from the book so the limit still reaches the worst level
+    rounding = order_filters.UP if side == "BUY" else order_filters.DOWN
+    return rules.round_price(estimate["worst_price"], rounding), quantity
+
+# Function to get the candle whose close prices an order
+def get_last_candle(symbol, timeframe, get_candles=None):
+    # The stream's closed candles lag by up to a timeframe, so live orders use the open candle
+    if get_candles is None:
+        return market_stream.get_live_candle(symbol, timeframe)
+    return get_candles(symbol, timeframe, 1)[-1]
 
 # Function to calculate buying parameters for a symbol
-def calculate_buy_params(symbol, pair, timeframe):
+@instrumentation.timed()
+def calculate_buy_params(symbol, pair, timeframe, get_candles=None, stop_multiplier=1.01, quote_size=0.1, book=None):
     """
     Calculate trading parameters for a buy trade.
 
     Args:
         symbol (str): The trading symbol (e.g., 'SOLUSDT').
-        pair (pandas.DataFrame): DataFrame containing trading pair details.
+        pair (dict): Symbol metadata from symbol_cache.get_symbol, looked up if None.
         timeframe (str): The timeframe for candlestick data (e.g., '1h', '1d').
+        get_candles (callable): Candle source of the last price, the open candle of
+            market_stream.get_live_candle when None.
+        stop_multiplier (float): The order price relative to the last close.
+        quote_size (float): The order size in the quote asset.
+        book (order_book.LocalOrderBook): Book to price the order from, defaults to the
+            shared book of the symbol; the last price is used when no book is in sync.
 
     Returns:
         dict: Parameters for a buy trade.
     """
-    raw_data = binance_connect.get_candlestick_data(symbol, timeframe, 1)
-
-    precision = pair.iloc[0]["baseAssetPrecision"]
-    filters = pair.iloc[0]["filters"]
-    for f in filters:
-        if f["filterType"] == "LOT_SIZE":
-            step_size = float(f["stepSize"])
-            min_qty = float(f["minQty"])
-        elif f["filterType"] == "PRICE_FILTER":
-            tick_size = float(f["tickSize"])
-
-    close_price = raw_data[0]["close"]
-    buy_stop = close_price * 1.01
-    buy_stop = round(buy_stop / tick_size) * tick_size
-    raw_quantity = 0.1 / buy_stop
-    quantity = max(min_qty, round(raw_quantity - (raw_quantity % step_size), precision))
+    if pair is None:
+        pair = symbol_cache.get_symbol(symbol)
+    book = book or order_book.get_book(symbol)
+    book_price = price_from_order_book("BUY", quote_size, pair, book) if book is not None else None
+
+    if book_price is not None:
+        buy_stop, quantity = book_price
+    else:
+        last_candle = get_last_candle(symbol, timeframe, get_candles)
+
+        rules = order_filters.get_rules(symbol, pair)
+        close_price = last_candle["close"]
+        buy_stop = rules.round_price(close_price * stop_multiplier)
+        quantity = rules.round_quantity(quote_size / buy_stop, buy_stop)
     params = {
         "symbol": symbol,
         "side": "BUY",
@@ -244,32 +361,39 @@ def calculate_buy_params(symbol, pair, timeframe):
     return params
 
 # Function to calculate selling parameters for a symbol
-def calculate_sell_params(symbol, pair, timeframe):
+@instrumentation.timed()
+def calculate_sell_params(symbol, pair, timeframe, get_candles=None, stop_multiplier=0.99, quote_size=0.1, book=None):
     """
     Calculate trading parameters for a sell trade.
 
     Args:
         symbol (str): The trading symbol (e.g., 'SOLUSDT').
-        pair (pandas.DataFrame): DataFrame containing trading pair details.
+        pair (dict): Symbol metadata from symbol_cache.get_symbol, looked up if None.
         timeframe (str): The timeframe for candlestick data
+        get_candles (callable): Candle source of the last price, the open candle of
+            market_stream.get_live_candle when None.
+        stop_multiplier (float): The stop price relative to the last close, used for sizing.
+        quote_size (float): The order size in the quote asset.
+        book (order_book.LocalOrderBook): Book to price the order from, defaults to the
+            shared book of the symbol; the last price is used when no book is in sync.
 
     Returns:
         dict: Parameters for a sell trade.
     """
-    raw_data = binance_connect.get_candlestick_data(symbol=symbol, timeframe=timeframe, number_of_candles=1)
+    if pair is None:
+        pair = symbol_cache.get_symbol(symbol)
+    book = book or order_book.get_book(symbol)
+    book_price = price_from_order_book("SELL", quote_size, pair, book) if book is not None else None
 
-    precision = pair.iloc[0]["baseAssetPrecision"]
-    filters = pair.iloc[0]["filters"]
-    for f in filters:
-        if f["filterType"] == "LOT_SIZE":
-            min_qty = float(f["minQty"])
-            step_size = float(f["stepSize"])
-            break
+    if book_price is not None:
+        close_price, quantity = book_price
+    else:
+        last_candle = get_last_candle(symbol, timeframe, get_candles)
 
-    close_price = raw_data[0]["close"]
-    sell_stop = close_price * 0.99
-    raw_quantity = 0.1 / sell_stop
-    quantity = max(min_qty, round(raw_quantity - (raw_quantity % step_size), precision))
+        rules = order_filters.get_rules(symbol, pair)
+        close_price = rules.round_price(last_candle["close"])
+        sell_stop = close_price * stop_multiplier
+        quantity = rules.round_quantity(quote_size / sell_stop, close_price)
     params = {
         "symbol": symbol,
         "side": "SELL",
@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+import time
+import binance_connect
+import instrumentation
+
+# Default location of the persisted exchange_info snapshot
+DEFAULT_CACHE_PATH = "exchange_info.json"
+
+# Default number of seconds before the snapshot is refreshed from the exchange
+DEFAULT_TTL = 3600
+
+# Binance error code returned when an order violates a symbol filter
+FILTER_FAILURE_CODE = -1013
+
+# Function to parse one exchange_info symbol entry into flat filter values
+def parse_symbol(symbol_info):
+    """
+    Flattens the filters of an exchange_info symbol entry into ready-to-use values.
+
+    Args:
+        symbol_info (dict): One entry of exchange_info["symbols"].
+
+    Returns:
+        dict: Symbol metadata with pre-parsed LOT_SIZE/PRICE_FILTER values.
+    """
+    filters = {f["filterType"]: f for f in symbol_info.get("filters", [])}
+    lot_size = filters.get("LOT_SIZE", {})
+    price_filter = filters.get("PRICE_FILTER", {})
+    notional = filters.get("NOTIONAL", filters.get("MIN_NOTIONAL", {}))
+
+    return {
+        "symbol": symbol_info["symbol"],
+        "status": symbol_info.get("status"),
+        "base_asset": symbol_info.get("baseAsset"),
+        "quote_asset": symbol_info.get("quoteAsset"),
+        "base_asset_precision": symbol_info.get("baseAssetPrecision", 8),
+        "step_size": float(lot_size.get("stepSize", 0)),
+        "min_qty": float(lot_size.get("minQty", 0)),
+        "max_qty": float(lot_size.get("maxQty", 0)),
+        "tick_size": float(price_filter.get("tickSize", 0)),
+        "min_price": float(price_filter.get("minPrice", 0)),
+        "max_price": float(price_filter.get("maxPrice", 0)),
+        "min_notional": float(notional.get("minNotional", 0)),
+        "filters": filters,
+        "info": symbol_info,
+    }
+
+# Function to look up a symbol in an exchange_info snapshot file without refreshing it
+def read_symbol(path, symbol):
+    """
+    Reads one symbol from a snapshot file such as sol_pair.json, read-only.
+
+    Unlike SymbolCache, a missing symbol is not downloaded and the file is never
+    rewritten, so command line tools can point at a tracked fixture.
+
+    Args:
+        path (str): A bare list of exchange_info symbol entries, or a persisted SymbolCache snapshot.
+        symbol (str): The trading symbol (e.g., 'SOLUSDT').
+
+    Returns:
+        dict: Symbol metadata, see parse_symbol, or None when the file does not list the symbol.
+    """
+    with open(path, "r") as file:
+        snapshot = json.load(file)
+    symbol_list = snapshot if isinstance(snapshot, list) else snapshot["symbols"]
+    for symbol_info in symbol_list:
+        if symbol_info["symbol"] == symbol:
+            return parse_symbol(symbol_info)
+    return None
+
+# Class holding exchange_info symbol metadata in memory and on disk
+class SymbolCache:
+    """
+    Caches exchange_info symbol metadata with a TTL and a dict index for O(1) lookups.
+
+    The snapshot is loaded from disk when present, fetched from the exchange once
+    it is older than the TTL, and refreshed early when an order is rejected by a
+    symbol filter.
+
+    Args:
+        cache_path (str): The JSON file the snapshot is persisted to.
+        ttl (float): The number of seconds a snapshot stays valid.
+        fetch (callable): Returns a fresh exchange_info payload.
+    """
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, fetch=None):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.fetch = fetch or (lambda: binance_connect.get_client().exchange_info())
+        self.symbols = {}
+        self.by_quote_asset = {}
+        self.updated_at = 0.0
+        self._lock = threading.Lock()
+        self._load_from_disk()
+
+    def _index(self, symbol_list, updated_at):
+        symbols = {}
+        by_quote_asset = {}
+        for symbol_info in symbol_list:
+            parsed = parse_symbol(symbol_info)
+            symbols[parsed["symbol"]] = parsed
+            if parsed["status"] == "TRADING":
+                by_quote_asset.setdefault(parsed["quote_asset"], []).append(parsed["symbol"])
+        # Swap the indexes in one step so readers never see a half-built cache
+        self.symbols, self.by_quote_asset, self.updated_at = symbols, by_quote_asset, updated_at
+
+    def _load_from_disk(self):
+        if not os.path.exists(self.cache_path):
+            return
+        with open(self.cache_path, "r") as file:
+            snapshot = json.load(file)
+        # A bare list of symbols (like sol_pair.json) is a snapshot without a timestamp
+        if isinstance(snapshot, list):
+            self._index(snapshot, os.path.getmtime(self.cache_path))
+        else:
+            self._index(snapshot["symbols"], snapshot.get("updated_at", 0.0))
+
+    def _save_to_disk(self, symbol_list):
+        temporary_path = self.cache_path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"updated_at": self.updated_at, "symbols": symbol_list}, file)
+        os.replace(temporary_path, self.cache_path)
+
+    def is_stale(self):
+        return time.time() - self.updated_at > self.ttl
+
+    @instrumentation.timed("symbol_cache.refresh")
+    def refresh(self, seen_at=None):
+        """
+        Downloads exchange_info, rebuilds the indexes and persists the snapshot.
+
+        Args:
+            seen_at (float): The updated_at the caller found wanting. When another
+                thread refreshed since, its snapshot is kept and nothing is downloaded.
+        """
+        with self._lock:
+            # Callers that waited on the lock for the same stale snapshot share one download
+            if seen_at is not None and self.updated_at != seen_at:
+                return
+            symbol_list = self.fetch()["symbols"]
+            self._index(symbol_list, time.time())
+            if self.cache_path:
+                self._save_to_disk(symbol_list)
+
+    def _ensure_fresh(self):
+        seen_at = self.updated_at
+        if self.is_stale():
+            self.refresh(seen_at)
+
+    def get_symbol(self, symbol):
+        """
+        Returns the pre-parsed metadata of a symbol.
+
+        Args:
+            symbol (str): The trading symbol (e.g., 'SOLUSDT').
+
+        Returns:
+            dict: Symbol metadata, see parse_symbol.
+        """
+        self._ensure_fresh()
+        seen_at = self.updated_at
+        parsed = self.symbols.get(symbol)
+        if parsed is None:
+            # The symbol may have been listed after the snapshot was taken
+            self.refresh(seen_at)
+            parsed = self.symbols[symbol]
+        return parsed
+
+    def get_quote_asset_symbols(self, quote_asset):
+        """
+        Returns the symbols in 'TRADING' status quoted in the given asset.
+
+        Args:
+            quote_asset (str): The quote asset symbol (e.g., 'USDT').
+
+        Returns:
+            list: Symbol names.
+        """
+        self._ensure_fresh()
+        return list(self.by_quote_asset.get(quote_asset, []))
+
+    def handle_order_error(self, error):
+        """
+        Refreshes the snapshot if an order was rejected by a symbol filter.
+
+        Args:
+            error (Exception): The error raised by the order call.
+
+        Returns:
+            bool: True if the cache was refreshed.
+        """
+        if getattr(error, "error_code", None) == FILTER_FAILURE_CODE:
+            # Orders rejected together reload the filters once
+            self.refresh(self.updated_at)
+            return True
+        return False
+
+# Shared cache used by the strategy and execute modules
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+# Function to get the shared symbol cache
+def get_cache():
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = SymbolCache()
+    return _default_cache
+
+# Function to look up a symbol in the shared cache
+def get_symbol(symbol):
+    return get_cache().get_symbol(symbol)
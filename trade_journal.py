@@ -0,0 +1,373 @@
+import collections
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import numpy
+import instrumentation
+
+# Default location of the journal database
+DEFAULT_PATH = "trade_journal.db"
+
+# Default maximum number of entries written per transaction
+DEFAULT_BATCH_SIZE = 1000
+
+# Default number of seconds the writer waits to fill a batch before committing it
+DEFAULT_FLUSH_INTERVAL = 0.05
+
+# Kinds of journal entries
+INTENT = "intent"
+DECISION = "decision"
+ORDER = "order"
+RESPONSE = "response"
+ERROR = "error"
+ORDER_UPDATE = "order_update"
+
+# Statements creating the append-only entry table and its range indexes
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS entries (
+        id INTEGER PRIMARY KEY,
+        time INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        symbol TEXT,
+        trace_id TEXT,
+        payload TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS entries_symbol_time ON entries (symbol, time)",
+    "CREATE INDEX IF NOT EXISTS entries_time ON entries (time)",
+)
+
+# Function to open a connection to the journal database in WAL mode
+def connect(path, synchronous="FULL"):
+    """
+    Opens the journal database, creating its table on first use.
+
+    Args:
+        path (str): The database file.
+        synchronous (str): SQLite synchronous level; FULL fsyncs the WAL on every commit.
+
+    Returns:
+        sqlite3.Connection: The connection.
+    """
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(f"PRAGMA synchronous={synchronous}")
+    for statement in SCHEMA:
+        connection.execute(statement)
+    connection.commit()
+    return connection
+
+# Class appending trade entries to a SQLite journal from a background writer thread
+class TradeJournal:
+    """
+    Append-only journal of webhook intents, decisions, orders and exchange responses.
+
+    record() only encodes the entry and queues it, so the trading path never waits
+    on the disk. A writer thread takes up to batch_size queued entries, or what
+    arrived within flush_interval seconds, and writes them in one transaction, so
+    one WAL fsync covers the whole batch. Readers use their own connections and
+    run alongside the writer.
+
+    Args:
+        path (str): The database file.
+        batch_size (int): The maximum number of entries per transaction.
+        flush_interval (float): Seconds the writer waits for more entries before committing.
+        synchronous (str): SQLite synchronous level, FULL or NORMAL.
+    """
+
+    def __init__(
+        self,
+        path=DEFAULT_PATH,
+        batch_size=DEFAULT_BATCH_SIZE,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+        synchronous="FULL",
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.synchronous = synchronous
+        self.queue = queue.Queue()
+        self.thread = None
+        self.counters = collections.Counter()
+        self._connection = connect(path, synchronous)
+        self._local = threading.local()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._write, name="trade-journal", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Writes the queued entries, then stops the writer and closes the database.
+
+        Args:
+            timeout (float): Seconds to wait for the writer, None waits forever.
+        """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout)
+            self.thread = None
+        self._connection.close()
+
+    def record(self, kind, symbol, payload, time_ms=None):
+        """
+        Queues an entry for the writer thread.
+
+        Args:
+            kind (str): The entry kind, e.g. INTENT, DECISION, ORDER or RESPONSE.
+            symbol (str): The trading symbol the entry applies to, or None.
+            payload (dict): JSON-serializable details of the entry.
+            time_ms (int): The entry time in milliseconds, now when None.
+        """
+        if time_ms is None:
+            time_ms = int(time.time() * 1000)
+        context = instrumentation.current_context()
+        trace_id = context[0] if context is not None else None
+        # Encode now so later changes to the payload's objects cannot alter the entry
+        self.queue.put((time_ms, kind, symbol, trace_id, json.dumps(payload, default=str)))
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every entry recorded so far is committed to disk.
+
+        Args:
+            timeout (float): Seconds to wait, None waits forever.
+
+        Returns:
+            bool: True if the entries were committed within the timeout.
+        """
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def _write(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            waiters = []
+            item = self.queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                # Wait for more entries only while there are entries to commit
+                remaining = deadline - time.monotonic() if batch else 0
+                try:
+                    item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._commit(batch)
+            for waiter in waiters:
+                waiter.set()
+
+    def _commit(self, batch):
+        start = time.perf_counter()
+        try:
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT INTO entries (time, kind, symbol, trace_id, payload) VALUES (?, ?, ?, ?, ?)", batch
+                )
+        except sqlite3.Error as error:
+            self.counters["errors"] += 1
+            print(f"Trade journal write failed: {error}")
+            return
+        instrumentation.observe("trade_journal.commit", time.perf_counter() - start)
+        self.counters["entries"] += len(batch)
+        self.counters["batches"] += 1
+
+    def _reader(self):
+        # One read connection per thread; WAL readers see the last commit and do not block the writer
+        reader = getattr(self._local, "connection", None)
+        if reader is None:
+            reader = sqlite3.connect(self.path)
+            self._local.connection = reader
+        return reader
+
+    @staticmethod
+    def _where(symbol, kinds, start_ms, end_ms):
+        clauses = []
+        values = []
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            values.append(symbol)
+        if start_ms is not None:
+            clauses.append("time >= ?")
+            values.append(start_ms)
+        if end_ms is not None:
+            clauses.append("time < ?")
+            values.append(end_ms)
+        if kinds:
+            kinds = (kinds,) if isinstance(kinds, str) else tuple(kinds)
+            clauses.append(f"kind IN ({', '.join('?' * len(kinds))})")
+            values.extend(kinds)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", values
+
+    def query(self, symbol=None, kinds=None, start_ms=None, end_ms=None, limit=None):
+        """
+        Yields the committed entries matching a symbol, kinds and time range, oldest first.
+
+        Rows are read from the (symbol, time) or (time) index and decoded one at a
+        time, so ranges of millions of entries are streamed without being loaded.
+
+        Args:
+            symbol (str): Only entries of this symbol, every symbol when None.
+            kinds (str or list): Only entries of these kinds, every kind when None.
+            start_ms (int): Only entries at or after this time in milliseconds.
+            end_ms (int): Only entries before this time in milliseconds.
+            limit (int): The maximum number of entries.
+
+        Yields:
+            dict: The entry with 'id', 'time', 'kind', 'symbol', 'trace_id' and the decoded 'payload'.
+        """
+        where, values = self._where(symbol, kinds, start_ms, end_ms)
+        statement = f"SELECT id, time, kind, symbol, trace_id, payload FROM entries{where} ORDER BY time, id"
+        if limit is not None:
+            statement += " LIMIT ?"
+            values.append(limit)
+        for entry_id, time_ms, kind, entry_symbol, trace_id, payload in self._reader().execute(statement, values):
+            yield {
+                "id": entry_id,
+                "time": time_ms,
+                "kind": kind,
+                "symbol": entry_symbol,
+                "trace_id": trace_id,
+                "payload": json.loads(payload),
+            }
+
+    def count(self, symbol=None, kinds=None, start_ms=None, end_ms=None):
+        where, values = self._where(symbol, kinds, start_ms, end_ms)
+        return self._reader().execute(f"SELECT COUNT(*) FROM entries{where}", values).fetchone()[0]
+
+    def trace(self, trace_id):
+        """
+        Returns every entry of one trace, e.g. the intent, decision, order and response of one webhook.
+        """
+        rows = self._reader().execute(
+            "SELECT id, time, kind, symbol, payload FROM entries WHERE trace_id = ? ORDER BY id", (trace_id,)
+        )
+        return [
+            {"id": entry_id, "time": time_ms, "kind": kind, "symbol": symbol, "trace_id": trace_id, "payload": json.loads(payload)}
+            for entry_id, time_ms, kind, symbol, payload in rows
+        ]
+
+    def candle_columns(self, symbol, start_ms=None, end_ms=None):
+        """
+        Rebuilds kline columns from the candle snapshots of the recorded decisions.
+
+        Snapshots overlap, so each candle is kept once, from its latest snapshot.
+        The result has the layout of backtest.load_klines, but a decision only
+        journals the NumberOfCandles candles it analyzed, so candles between
+        decisions are missing and backtest.run_backtest refuses the columns
+        unless the snapshots happen to cover every candle.
+
+        Args:
+            symbol (str): The trading symbol.
+            start_ms (int): Only decisions at or after this time in milliseconds.
+            end_ms (int): Only decisions before this time in milliseconds.
+
+        Returns:
+            dict: One NumPy array per candle key, oldest candle first.
+        """
+        candles = {}
+        for entry in self.query(symbol, DECISION, start_ms, end_ms):
+            for candle in entry["payload"].get("candles", ()):
+                candles[candle["time"]] = candle
+        rows = [candles[open_time] for open_time in sorted(candles)]
+        columns = {}
+        for field in (rows[0] if rows else ()):
+            # Integer fields such as the open time decode from JSON as ints, prices as floats
+            dtype = numpy.int64 if isinstance(rows[0][field], int) else numpy.float64
+            columns[field] = numpy.array([row[field] for row in rows], dtype=dtype)
+        return columns
+
+    def subscribe(self, state):
+        """
+        Records every order update streamed to an account_state.AccountState, fills included.
+        """
+        state.add_listener(lambda order: self.record(ORDER_UPDATE, order["symbol"], order, order.get("updateTime")))
+
+    def metrics(self):
+        result = {"path": self.path, "queued": self.queue.qsize()}
+        result.update(self.counters)
+        return result
+
+# Journal shared by the bot, None until open_journal is called
+_active_journal = None
+
+# Function to open the shared journal
+def open_journal(path=DEFAULT_PATH, **kwargs):
+    """
+    Opens and starts the shared journal written by record and journal_order.
+
+    Args:
+        path (str): The database file.
+        **kwargs: Extra TradeJournal arguments.
+
+    Returns:
+        TradeJournal: The running journal.
+    """
+    global _active_journal
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    journal = TradeJournal(path, **kwargs)
+    journal.start()
+    _active_journal = journal
+    return journal
+
+# Function to close the shared journal after writing its queued entries
+def close_journal():
+    global _active_journal
+    if _active_journal is not None:
+        journal = _active_journal
+        _active_journal = None
+        journal.stop()
+
+# Function to get the shared journal
+def get_journal():
+    return _active_journal
+
+# Function to record an entry in the shared journal, if one is open
+def record(kind, symbol, payload):
+    journal = _active_journal
+    if journal is not None:
+        journal.record(kind, symbol, payload)
+
+# Function to send an order and record its parameters and outcome in the shared journal
+def journal_order(symbol, params, send):
+    """
+    Records the submitted parameters, calls send() and records its response or error.
+
+    Args:
+        symbol (str): The trading symbol.
+        params (dict): The submitted parameters.
+        send (callable): Sends the order and returns the exchange response.
+
+    Returns:
+        dict: The response of send().
+    """
+    journal = _active_journal
+    if journal is None:
+        return send()
+    journal.record(ORDER, symbol, params)
+    try:
+        response = send()
+    except Exception as error:
+        journal.record(ERROR, symbol, {
+            "error": type(error).__name__,
+            "message": str(error),
+            "code": getattr(error, "error_code", None),
+            "status": getattr(error, "status_code", None),
+        })
+        raise
+    journal.record(RESPONSE, symbol, response)
+    return response
@@ -0,0 +1,147 @@
+import collections
+import queue
+import threading
+import time
+import instrumentation
+
+# Default number of worker threads draining the intent queue
+DEFAULT_WORKERS = 2
+
+# Default number of seconds during which duplicate intents for a symbol are coalesced
+DEFAULT_COALESCE_WINDOW = 5.0
+
+# Default number of transaction hashes remembered for deduplication
+DEFAULT_SEEN_HASHES = 10000
+
+# Number of latency samples kept for the metrics
+LATENCY_SAMPLES = 1000
+
+# Class queueing buy/sell intents and executing them on a worker pool
+class TradeQueue:
+    """
+    Background queue of trade intents produced by the webhook.
+
+    Intents are deduplicated by transaction hash on submit, and an intent for
+    the same (symbol, action) as one executed within the coalescing window is
+    dropped by the workers.
+
+    Args:
+        handler (callable): Executes an intent, called as handler(action, symbol).
+        workers (int): The number of worker threads.
+        coalesce_window (float): Seconds during which repeated intents are coalesced.
+        seen_hashes (int): The number of transaction hashes remembered.
+    """
+
+    def __init__(
+        self,
+        handler,
+        workers=DEFAULT_WORKERS,
+        coalesce_window=DEFAULT_COALESCE_WINDOW,
+        seen_hashes=DEFAULT_SEEN_HASHES,
+    ):
+        self.handler = handler
+        self.worker_count = workers
+        self.coalesce_window = coalesce_window
+        self.seen_hashes = seen_hashes
+        self.queue = queue.Queue()
+        self.threads = []
+        self._seen = collections.OrderedDict()
+        self._last_run = {}
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        self.counters = collections.Counter()
+
+    def start(self):
+        for index in range(self.worker_count):
+            thread = threading.Thread(target=self._work, name=f"trade-worker-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        """
+        Lets the workers drain the queued intents, then stops them.
+
+        Args:
+            timeout (float): Seconds to wait for all the workers together, None waits forever.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self.threads = []
+
+    def submit(self, action, symbol, tx_hash=None):
+        """
+        Queues a trade intent unless its transaction was already seen.
+
+        Args:
+            action (str): 'buy' or 'sell'.
+            symbol (str): The trading symbol the intent applies to.
+            tx_hash (str): The transaction hash that triggered the intent.
+
+        Returns:
+            bool: True if the intent was queued.
+        """
+        if tx_hash is not None:
+            with self._lock:
+                if tx_hash in self._seen:
+                    self.counters["duplicate"] += 1
+                    return False
+                self._seen[tx_hash] = True
+                if len(self._seen) > self.seen_hashes:
+                    self._seen.popitem(last=False)
+        # The intent carries the webhook's trace so the worker's spans join it
+        self.queue.put((action, symbol, time.monotonic(), instrumentation.current_context()))
+        with self._lock:
+            self.counters["queued"] += 1
+        return True
+
+    def _should_coalesce(self, action, symbol, now):
+        with self._lock:
+            last_run = self._last_run.get((symbol, action))
+            if last_run is not None and now - last_run < self.coalesce_window:
+                self.counters["coalesced"] += 1
+                return True
+            self._last_run[(symbol, action)] = now
+            return False
+
+    def _work(self):
+        while True:
+            intent = self.queue.get()
+            if intent is None:
+                self.queue.task_done()
+                return
+            action, symbol, queued_at, context = intent
+            instrumentation.observe("trade_queue.wait", time.monotonic() - queued_at)
+            try:
+                if self._should_coalesce(action, symbol, time.monotonic()):
+                    continue
+                with instrumentation.attach(context), instrumentation.span("trade_queue.handle"):
+                    self.handler(action, symbol)
+                with self._lock:
+                    self.counters["processed"] += 1
+            except Exception as error:
+                with self._lock:
+                    self.counters["failed"] += 1
+                print(f"Error: {error}")
+            finally:
+                self._latencies.append(time.monotonic() - queued_at)
+                self.queue.task_done()
+
+    def metrics(self):
+        """
+        Returns the queue depth, intent counters and processing latency percentiles.
+
+        Returns:
+            dict: Queue metrics, latencies in seconds.
+        """
+        latencies = sorted(self._latencies)
+        result = {"queue_depth": self.queue.qsize()}
+        with self._lock:
+            result.update(self.counters)
+        if latencies:
+            result["latency_p50"] = latencies[len(latencies) // 2]
+            result["latency_p99"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            result["latency_max"] = latencies[-1]
+        return result